@@ -1,18 +1,86 @@
 import os
 import json
-from google import genai
+import asyncio
 from dotenv import load_dotenv
+from tenacity import AsyncRetrying, stop_after_attempt, wait_exponential_jitter
+import metrics
 
 load_dotenv()
 
-# Cliente do SDK novo
-client = genai.Client(api_key=os.environ["GEMINI_API_KEY"])
+
+def _build_client():
+    """ Cliente do SDK novo. Com GEMINI_FAKE=1 usa o modelo falso local (sem rede). """
+    if os.environ.get("GEMINI_FAKE") == "1":
+        import fake_genai
+        return fake_genai.FakeGenaiClient.from_env()
+    # O SDK do Google leva ~1s para importar: só é carregado na primeira chamada ao modelo,
+    # e sem GEMINI_API_KEY quem falha é a chamada (que cai na dica padrão), não a subida da API
+    from google import genai
+    return genai.Client(api_key=os.environ["GEMINI_API_KEY"])
+
+
+# Criado na primeira chamada (get_client) ou trocado com set_client
+client = None
 
 # MODELO RECOMENDADO
 MODEL_NAME = "models/gemini-2.5-flash"   # ou gemini-3.0-pro-preview (se sua conta tiver acesso)
 
+# --- Limites das chamadas ao modelo ---
+# Chamadas simultâneas ao Gemini no processo inteiro
+AI_MAX_CONCURRENCY = int(os.environ.get("AI_MAX_CONCURRENCY", 8))
+# Timeout de cada tentativa (segundos)
+AI_CALL_TIMEOUT = float(os.environ.get("AI_CALL_TIMEOUT", 20))
+# Tentativas por chamada (com backoff exponencial entre elas)
+AI_MAX_ATTEMPTS = int(os.environ.get("AI_MAX_ATTEMPTS", 3))
+# Prazo total (fila + tentativas) antes de desistir e devolver a dica padrão
+AI_HINT_DEADLINE = float(os.environ.get("AI_HINT_DEADLINE", 12))
+AI_PLAN_DEADLINE = float(os.environ.get("AI_PLAN_DEADLINE", 90))
+
+FALLBACK_HINT = "Tente revisar o enunciado com atenção aos detalhes principais."
+
+_semaphore: asyncio.Semaphore | None = None
+
+
+def set_client(new_client):
+    """ Troca o cliente do modelo (ex: por um fake_genai.FakeGenaiClient em testes). """
+    global client
+    client = new_client
+
 
-def generate_study_plan_ai(months: int, focus_areas: list[str]):
+def get_client():
+    global client
+    if client is None:
+        client = _build_client()
+    return client
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(AI_MAX_CONCURRENCY)
+    return _semaphore
+
+
+async def _generate_text(prompt: str, config: dict | None = None) -> str:
+    """
+    Faz uma chamada ao modelo respeitando o limite global de concorrência,
+    com timeout por tentativa e retries com backoff.
+    """
+    async for attempt in AsyncRetrying(
+        stop=stop_after_attempt(AI_MAX_ATTEMPTS),
+        wait=wait_exponential_jitter(initial=0.5, max=4),
+        reraise=True,
+    ):
+        with attempt:
+            async with _get_semaphore():
+                response = await asyncio.wait_for(
+                    get_client().aio.models.generate_content(model=MODEL_NAME, contents=prompt, config=config),
+                    timeout=AI_CALL_TIMEOUT,
+                )
+            return response.text
+
+
+async def generate_study_plan_ai(months: int, focus_areas: list[str]):
     """
     Gera o plano de estudos usando JSON mode REAL do novo SDK.
     """
@@ -37,29 +105,27 @@ def generate_study_plan_ai(months: int, focus_areas: list[str]):
     """
 
     try:
-        response = client.models.generate_content(
-            model=MODEL_NAME,
-            contents=prompt,
-            generation_config={
-                "response_mime_type": "application/json"
-            }
-        )
-
-        return json.loads(response.text)
+        with metrics.ai_call("plano"):
+            text = await asyncio.wait_for(
+                _generate_text(prompt, config={"response_mime_type": "application/json"}),
+                timeout=AI_PLAN_DEADLINE,
+            )
+            return json.loads(text)
 
     except Exception as e:
-        print(f"Erro na IA (Plano): {e}")
+        print(f"Erro na IA (Plano): {e!r}")
         return None
 
 
+# Versão do prompt da dica. Mude sempre que o texto abaixo mudar, para que as
+# dicas guardadas (hint_cache / tabela question_hints) sejam geradas de novo.
+HINT_PROMPT_VERSION = "v1"
 
-def generate_question_hint(question_text: str, options: dict, correct_option: str):
-    """
-    Gera uma dica pedagógica (texto comum).
-    """
+
+def _hint_prompt(question_text: str, options: dict, correct_option: str) -> str:
     correct_text = options.get(correct_option, "Resposta não identificada")
 
-    prompt = f"""
+    return f"""
     Você é a IAra, uma tutora amigável.
     O aluno está travado nesta questão:
     "{question_text}"
@@ -70,13 +136,49 @@ def generate_question_hint(question_text: str, options: dict, correct_option: st
     Dê uma dica CURTA (máximo 2 frases) que ajude ele a pensar, sem dar a resposta.
     """
 
+
+async def generate_question_hint(question_text: str, options: dict, correct_option: str):
+    """
+    Gera uma dica pedagógica (texto comum).
+    Se o modelo falhar ou passar do prazo (AI_HINT_DEADLINE), devolve FALLBACK_HINT.
+    """
+    prompt = _hint_prompt(question_text, options, correct_option)
+
     try:
-        response = client.models.generate_content(
-            model=MODEL_NAME,
-            contents=prompt,
-        )
-        return response.text.strip()
+        with metrics.ai_call("dica"):
+            text = await asyncio.wait_for(_generate_text(prompt), timeout=AI_HINT_DEADLINE)
+        return text.strip()
 
     except Exception as e:
-        print(f"Erro na IA (Dica): {e}")
-        return "Tente revisar o enunciado com atenção aos detalhes principais."
+        print(f"Erro na IA (Dica): {e!r}")
+        return FALLBACK_HINT
+
+
+async def stream_question_hint(question_text: str, options: dict, correct_option: str):
+    """
+    Mesma dica de generate_question_hint, mas devolve os pedaços do texto conforme
+    o modelo os gera (API de streaming do SDK). Sem retries: depois que o primeiro
+    pedaço saiu não dá para recomeçar. Erros sobem para quem chamou.
+    Se quem consome parar de iterar (cliente desconectou), o stream do modelo é fechado.
+    """
+    prompt = _hint_prompt(question_text, options, correct_option)
+
+    with metrics.ai_call("dica_stream"):
+        async with _get_semaphore():
+            stream = await asyncio.wait_for(
+                get_client().aio.models.generate_content_stream(model=MODEL_NAME, contents=prompt),
+                timeout=AI_CALL_TIMEOUT,
+            )
+            try:
+                while True:
+                    try:
+                        # Timeout entre um pedaço e outro, não para o stream inteiro
+                        chunk = await asyncio.wait_for(anext(stream), timeout=AI_CALL_TIMEOUT)
+                    except StopAsyncIteration:
+                        return
+                    if chunk.text:
+                        yield chunk.text
+            finally:
+                aclose = getattr(stream, "aclose", None)
+                if aclose is not None:
+                    await aclose()
@@ -0,0 +1,144 @@
+# benchmarks/bench_async.py
+"""
+Benchmark dos endpoints 'async def' contra a versão síncrona (threadpool).
+
+Um endpoint 'def' do FastAPI ocupa uma thread do threadpool (40 por padrão)
+enquanto espera o banco; um 'async def' com AsyncSession só ocupa uma conexão.
+Para deixar isso visível no SQLite local, cada comando SQL ganha uma latência
+artificial (--db-latency-ms), como se o banco estivesse em outra máquina.
+
+Compara GET /cronograma/me (async) com uma cópia síncrona registrada só aqui
+(GET /bench/sync/cronograma/me), com a mesma rajada de requisições. Uso:
+
+    python benchmarks/bench_async.py --requests 2000 --concurrency 200
+    python benchmarks/bench_async.py --db-latency-ms 20 --threadpool 40
+
+Com latência baixa, o gargalo dos dois lados é a CPU (o Python da própria API) e
+a diferença some; a vantagem do async aparece quando o banco é que demora.
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def add_db_latency(latency: float):
+    """ Faz cada comando SQL esperar 'latency' segundos na thread do driver. """
+    from sqlalchemy import event
+    from database import async_engine, engine
+
+    def slow(statement):
+        time.sleep(latency)
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        dbapi_connection.set_trace_callback(slow)
+
+    # No aiosqlite a conexão sqlite3 vive na thread do próprio driver
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def on_connect_async(dbapi_connection, connection_record):
+        dbapi_connection.run_async(lambda conn: conn.set_trace_callback(slow))
+
+
+def add_sync_route(app):
+    """ A versão 'def' de GET /cronograma/me, como era antes da camada assíncrona. """
+    from fastapi import Depends
+    from sqlalchemy.orm import Session
+    import crud, schemas, security
+    from database import get_db
+
+    @app.get("/bench/sync/cronograma/me", response_model=schemas.Cronograma)
+    def sync_cronograma(db: Session = Depends(get_db),
+                        current_user: security.Principal = Depends(security.get_current_user)):
+        cronograma_id, _ = crud.get_cronograma_version(db, owner_id=current_user.id)
+        return crud.get_cronograma_tree(db, cronograma_id=cronograma_id)
+
+
+async def burst(client, path: str, headers: dict, total: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    failures = 0
+
+    async def one():
+        nonlocal failures
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.get(path, headers=headers)
+            latencies.append((time.perf_counter() - start) * 1000)
+            failures += response.status_code != 200
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return time.perf_counter() - start, latencies, failures
+
+
+async def run(args):
+    import anyio.to_thread
+    import httpx
+    import main, migrate
+    migrate.migrate()  # o ASGITransport não roda o lifespan do app
+
+    anyio.to_thread.current_default_thread_limiter().total_tokens = args.threadpool
+    add_sync_route(main.app)
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        await client.post("/register", json={"email": "aluno@seshat.com", "password": "senha-forte"})
+        token = (await client.post("/login", data={"username": "aluno@seshat.com", "password": "senha-forte"})).json()
+        headers = {"Authorization": f"Bearer {token['access_token']}"}
+        # Cria o cronograma padrão e algumas matérias para a árvore não vir vazia
+        await client.get("/cronograma/me", headers=headers)
+        for i in range(3):
+            materia = (await client.post("/cronograma/materias", json={"nome": f"Matéria {i}"}, headers=headers)).json()
+            for j in range(3):
+                await client.post(f"/cronograma/materias/{materia['id']}/topicos", json={"nome": f"Tópico {j}"}, headers=headers)
+
+        add_db_latency(args.db_latency_ms / 1000)
+        # Conexões abertas antes da latência não passaram pelo evento 'connect'
+        await main.database.async_engine.dispose()
+        main.database.engine.dispose()
+
+        print(f"{args.requests} requisições, {args.concurrency} simultâneas, threadpool de {args.threadpool}, "
+              f"{args.db_latency_ms:g}ms por comando SQL")
+        print(f"{'endpoint':>28} | {'req/s':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'falhas':>6}")
+        for name, path in [("def + Session", "/bench/sync/cronograma/me"), ("async def + AsyncSession", "/cronograma/me")]:
+            await burst(client, path, headers, min(args.requests, args.concurrency), args.concurrency)  # aquecimento
+            elapsed, latencies, failures = await burst(client, path, headers, args.requests, args.concurrency)
+            print(f"{name:>28} | {args.requests / elapsed:>8.0f} {percentile(latencies, 50):>7.1f}ms "
+                  f"{percentile(latencies, 95):>7.1f}ms {percentile(latencies, 99):>7.1f}ms {failures:>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--threadpool", type=int, default=40, help="Threads do threadpool (padrão do Starlette: 40)")
+    parser.add_argument("--db-latency-ms", type=float, default=100, help="Latência artificial por comando SQL")
+    parser.add_argument("--pool-size", type=int, default=200, help="Conexões por engine (DB_POOL_SIZE)")
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="seshat-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+    os.environ["DB_POOL_SIZE"] = str(args.pool_size)
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    os.environ.setdefault("GEMINI_FAKE", "1")
+    os.environ.setdefault("BCRYPT_ROUNDS", "4")
+    try:
+        asyncio.run(run(args))
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
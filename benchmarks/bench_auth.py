@@ -0,0 +1,81 @@
+# benchmarks/bench_auth.py
+"""
+Microbenchmark do custo da dependência de autenticação por requisição.
+
+Compara o caminho antigo (decodificar o JWT + buscar o usuário por email)
+com security.get_current_user (cache de tokens + busca por chave primária).
+Uso:
+
+    python benchmarks/bench_auth.py --iterations 5000
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def measure(fn, iterations: int) -> tuple[float, float]:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1_000_000)
+    samples.sort()
+    return samples[len(samples) // 2], samples[int(len(samples) * 0.99)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="seshat-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+
+    from jose import jwt
+    import crud, models, security
+    from database import SessionLocal, engine
+
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        user = models.User(email="bench@seshat.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        legacy_token = security.create_access_token(data={"sub": user.email})
+        token = security.create_access_token(data={"sub": user.email, "uid": user.id})
+
+        def before():
+            payload = jwt.decode(legacy_token, security.SECRET_KEY, algorithms=[security.ALGORITHM])
+            crud.get_user_by_email(db, email=payload["sub"])
+
+        def after_cold():
+            security._token_cache.clear()
+            db.expunge_all() # Força o SELECT por chave primária (sem o identity map da sessão)
+            security.get_current_user(token=token, db=db)
+
+        def after_warm():
+            security.get_current_user(token=token, db=db)
+
+        print(f"{'caminho':<40} {'p50':>10} {'p99':>10}")
+        for name, fn in [
+            ("antes (jwt.decode + busca por email)", before),
+            ("depois, cache frio (decode + PK)", after_cold),
+            ("depois, cache quente", after_warm),
+        ]:
+            p50, p99 = measure(fn, args.iterations)
+            print(f"{name:<40} {p50:>8.1f}µs {p99:>8.1f}µs")
+    finally:
+        db.close()
+        engine.dispose()
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,387 @@
+# benchmarks/bench_load.py
+"""
+Teste de carga local da API inteira (sem tocar na produção do Render).
+
+1. Semeia um banco novo multiplicando o questoes.json (--scale cópias, cada uma com
+   o texto marcado para não ser tratada como duplicada);
+2. Sobe a API com o uvicorn em outro processo, com o modelo falso (fake_genai) no
+   lugar do Gemini, com latência configurável;
+3. Cada aluno virtual faz login e repete uma mistura de ações (sortear e responder
+   questões, ler e editar o cronograma, pedir dicas, buscar...) até o fim do tempo;
+4. Mostra vazão, erros e p50/p95/p99 por endpoint e salva tudo em JSON, para
+   comparar commits (--compare com o JSON de outra execução).
+
+    python benchmarks/bench_load.py                                   # 60s, 50 alunos, SQLite
+    python benchmarks/bench_load.py --duration 120 --users 200 --scale 100 --ai-latency-ms 800
+    python benchmarks/bench_load.py --compare loadtest-1a2b3c4.json
+    python benchmarks/bench_load.py --database-url postgresql://localhost/seshat_carga  # banco APAGADO antes!
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SEED_BATCH_SIZE = 5000
+
+# Peso de cada ação na mistura (proporção aproximada do uso real do app)
+WORKLOAD = {
+    "sortear": 25,        # GET /perguntas/{subject}
+    "responder": 25,      # POST /perguntas/verificar
+    "cronograma": 15,     # GET /cronograma/me (com If-None-Match, como o frontend)
+    "semanal": 5,         # GET /cronograma/me/semanal
+    "editar": 10,         # POST/PATCH/DELETE no cronograma
+    "dica": 5,            # POST /ia/dica
+    "buscar": 5,          # GET /perguntas/busca
+    "catalogo": 3,        # GET /catalogo
+    "login": 2,           # POST /login
+}
+SEARCH_TERMS = ["energia", "função", "população", "reação", "século", "gráfico", "território", "velocidade"]
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def git_commit() -> tuple[str, bool]:
+    """ (commit atual, se há mudanças não commitadas) — vai no JSON para saber o que foi medido. """
+    try:
+        sha = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                             text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                                    capture_output=True, text=True).stdout.strip())
+        return sha, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return "desconhecido", False
+
+
+# --- Banco ---
+
+def seed(scale: int) -> tuple[int, list[str]]:
+    """ Cria o schema e insere 'scale' cópias do questoes.json. Retorna (questões, matérias). """
+    import crud, database, migrate, models, schemas
+
+    # Banco descartável: começa do zero
+    models.Base.metadata.drop_all(bind=database.engine)
+    migrate.migrate()
+
+    with open(os.path.join(ROOT, "questoes.json"), encoding="utf-8") as f:
+        base = json.load(f)
+
+    total = 0
+    with database.SessionLocal() as db:
+        batch = []
+        for copy in range(scale):
+            for question in base:
+                text = question["text"] if copy == 0 else f"{question['text']}\n(variação {copy})"
+                batch.append(schemas.QuestionCreate(**{**question, "text": text}))
+                if len(batch) == SEED_BATCH_SIZE:
+                    total += sum(i is not None for i in crud.create_questions(db, batch))
+                    batch = []
+        if batch:
+            total += sum(i is not None for i in crud.create_questions(db, batch))
+    database.engine.dispose()
+    return total, sorted({question["subject"] for question in base})
+
+
+# --- Servidor ---
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(args, port: int, log_path: str) -> subprocess.Popen:
+    env = dict(os.environ)
+    env.update(
+        DATABASE_URL=args.database_url,
+        GEMINI_FAKE="1",
+        GEMINI_FAKE_LATENCY_MS=str(args.ai_latency_ms),
+        SECRET_KEY=env.get("SECRET_KEY", "benchmark"),
+    )
+    if args.bcrypt_rounds:
+        env["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+    log = open(log_path, "w")
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(args.workers), "--log-level", "warning", "--no-access-log"],
+        cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+
+
+async def wait_ready(client, server: subprocess.Popen, log_path: str, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            with open(log_path) as f:
+                raise SystemExit(f"A API não subiu:\n{f.read()[-3000:]}")
+        try:
+            if (await client.get("/")).status_code == 200:
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.2)
+    raise SystemExit("A API não respondeu a tempo.")
+
+
+# --- Carga ---
+
+class Recorder:
+    """ Latências e erros por endpoint; só grava depois do aquecimento. """
+
+    def __init__(self):
+        self.recording = False
+        self.latencies: dict[str, list[float]] = {}
+        self.errors: Counter = Counter()
+        self.statuses: dict[str, Counter] = {}
+
+    async def call(self, client, method: str, endpoint: str, url: str, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            status_code = response.status_code
+        except Exception:
+            response, status_code = None, 0
+        elapsed = (time.perf_counter() - start) * 1000
+        if self.recording:
+            self.latencies.setdefault(endpoint, []).append(elapsed)
+            self.statuses.setdefault(endpoint, Counter())[str(status_code)] += 1
+            if status_code == 0 or status_code >= 400:
+                self.errors[endpoint] += 1
+        return response
+
+
+class Student:
+    """ Um aluno virtual: guarda o token, o ETag do cronograma e o que já viu. """
+
+    def __init__(self, index: int, subjects: list[str], recorder: Recorder, seed: int):
+        self.email = f"aluno{index}@carga.seshat"
+        self.password = "senha-de-carga"
+        self.subjects = subjects
+        self.recorder = recorder
+        self.rng = random.Random(seed + index)
+        self.headers: dict = {}
+        self.etag: str | None = None
+        self.seen: list[int] = []
+        self.materias: dict[int, list[int]] = {}  # materia_id -> ids dos tópicos
+
+    async def login(self, client):
+        response = await self.recorder.call(client, "POST", "POST /login", "/login",
+                                            data={"username": self.email, "password": self.password})
+        if response is not None and response.status_code == 200:
+            self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    async def sortear(self, client):
+        subject = self.rng.choice(self.subjects)
+        response = await self.recorder.call(client, "GET", "GET /perguntas/{subject}", f"/perguntas/{subject}",
+                                            params={"count": 10})
+        if response is not None and response.status_code == 200:
+            self.seen = [q["id"] for q in response.json()] + self.seen[:40]
+
+    async def responder(self, client):
+        if not self.seen:
+            return await self.sortear(client)
+        await self.recorder.call(client, "POST", "POST /perguntas/verificar", "/perguntas/verificar",
+                                 headers=self.headers, json={"question_id": self.rng.choice(self.seen),
+                                                             "user_answer": self.rng.choice("ABCDE")})
+
+    async def cronograma(self, client):
+        headers = {**self.headers, **({"If-None-Match": self.etag} if self.etag else {})}
+        response = await self.recorder.call(client, "GET", "GET /cronograma/me", "/cronograma/me", headers=headers)
+        if response is not None and response.status_code == 200:
+            self.etag = response.headers.get("etag")
+            self.materias = {m["id"]: [t["id"] for t in m["topicos"]] for m in response.json()["materias"]}
+
+    async def semanal(self, client):
+        await self.recorder.call(client, "GET", "GET /cronograma/me/semanal", "/cronograma/me/semanal",
+                                 headers=self.headers)
+
+    async def editar(self, client):
+        # Cria matérias e tópicos até o limite (3x3) e depois conclui tópicos ou apaga a matéria
+        if not self.materias or (len(self.materias) < 3 and self.rng.random() < 0.3):
+            response = await self.recorder.call(client, "POST", "POST /cronograma/materias", "/cronograma/materias",
+                                                headers=self.headers, json={"nome": f"Matéria {self.rng.random():.4f}"})
+            if response is not None and response.status_code == 200:
+                self.materias[response.json()["id"]] = []
+            return
+        materia_id = self.rng.choice(list(self.materias))
+        topicos = self.materias[materia_id]
+        if len(topicos) < 3:
+            response = await self.recorder.call(
+                client, "POST", "POST /cronograma/materias/{materia_id}/topicos",
+                f"/cronograma/materias/{materia_id}/topicos", headers=self.headers, json={"nome": "Tópico"})
+            if response is not None and response.status_code == 200:
+                topicos.append(response.json()["id"])
+        elif self.rng.random() < 0.5:
+            await self.recorder.call(client, "PATCH", "PATCH /cronograma/topicos", "/cronograma/topicos",
+                                     headers=self.headers, json=[{"id": self.rng.choice(topicos), "concluido": True}])
+        else:
+            await self.recorder.call(client, "DELETE", "DELETE /cronograma/materias/{materia_id}",
+                                     f"/cronograma/materias/{materia_id}", headers=self.headers)
+            self.materias.pop(materia_id, None)
+
+    async def dica(self, client):
+        if not self.seen:
+            return await self.sortear(client)
+        await self.recorder.call(client, "POST", "POST /ia/dica", "/ia/dica", headers=self.headers,
+                                 json={"question_id": self.rng.choice(self.seen)})
+
+    async def buscar(self, client):
+        await self.recorder.call(client, "GET", "GET /perguntas/busca", "/perguntas/busca",
+                                 params={"q": self.rng.choice(SEARCH_TERMS), "limit": 20})
+
+    async def catalogo(self, client):
+        await self.recorder.call(client, "GET", "GET /catalogo", "/catalogo")
+
+    async def run(self, client, deadline: float, think_time: float):
+        await self.login(client)
+        actions, weights = list(WORKLOAD), list(WORKLOAD.values())
+        while time.monotonic() < deadline:
+            await getattr(self, self.rng.choices(actions, weights)[0])(client)
+            if think_time:
+                await asyncio.sleep(self.rng.expovariate(1 / think_time))
+
+
+async def run_load(args, subjects: list[str]) -> tuple[Recorder, float]:
+    import httpx
+
+    port = free_port()
+    log_path = os.path.join(args.tmpdir, "uvicorn.log")
+    server = start_server(args, port, log_path)
+    limits = httpx.Limits(max_connections=args.users + 10, max_keepalive_connections=args.users + 10)
+    recorder = Recorder()
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+            await wait_ready(client, server, log_path)
+            students = [Student(i, subjects, recorder, args.seed) for i in range(args.users)]
+            semaphore = asyncio.Semaphore(10)
+
+            async def register(student):
+                async with semaphore:
+                    await client.post("/register", json={"email": student.email, "password": student.password})
+
+            await asyncio.gather(*(register(student) for student in students))
+
+            start = time.monotonic()
+            deadline = start + args.warmup + args.duration
+
+            async def start_recording():
+                await asyncio.sleep(args.warmup)
+                recorder.recording = True
+
+            await asyncio.gather(start_recording(), *(s.run(client, deadline, args.think_time_ms / 1000) for s in students))
+            measured = time.monotonic() - start - args.warmup
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+    return recorder, measured
+
+
+# --- Relatório ---
+
+def summarize(recorder: Recorder, duration: float) -> dict:
+    def stats(samples: list[float], errors: int) -> dict:
+        return {
+            "requisicoes": len(samples),
+            "req_por_s": round(len(samples) / duration, 2),
+            "erros": errors,
+            "p50_ms": round(percentile(samples, 50), 2),
+            "p95_ms": round(percentile(samples, 95), 2),
+            "p99_ms": round(percentile(samples, 99), 2),
+        }
+
+    endpoints = {
+        endpoint: {**stats(samples, recorder.errors[endpoint]), "status": dict(recorder.statuses[endpoint])}
+        for endpoint, samples in sorted(recorder.latencies.items())
+    }
+    everything = [latency for samples in recorder.latencies.values() for latency in samples]
+    return {"total": stats(everything, sum(recorder.errors.values())) if everything else {}, "endpoints": endpoints}
+
+
+def print_report(result: dict, previous: dict | None):
+    print(f"{'endpoint':>46} | {'req/s':>8} {'erros':>6} {'p50':>9} {'p95':>9} {'p99':>9}")
+    rows = [*result["endpoints"].items(), ("TOTAL", result["total"])]
+    for endpoint, stats in rows:
+        line = (f"{endpoint:>46} | {stats['req_por_s']:>8.1f} {stats['erros']:>6} {stats['p50_ms']:>7.1f}ms "
+                f"{stats['p95_ms']:>7.1f}ms {stats['p99_ms']:>7.1f}ms")
+        old = (previous or {}).get("total" if endpoint == "TOTAL" else "endpoints", {})
+        old = old if endpoint == "TOTAL" else old.get(endpoint)
+        if old:
+            def delta(key):
+                return f"{(stats[key] - old[key]) / old[key] * 100:+.0f}%" if old[key] else "n/a"
+            line += f"   (vs {previous['commit']}: req/s {delta('req_por_s')}, p95 {delta('p95_ms')})"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=60, help="Segundos medidos (depois do aquecimento)")
+    parser.add_argument("--warmup", type=float, default=5, help="Segundos de carga antes de começar a medir")
+    parser.add_argument("--users", type=int, default=50, help="Alunos virtuais simultâneos")
+    parser.add_argument("--think-time-ms", type=float, default=100, help="Pausa média entre as ações de um aluno")
+    parser.add_argument("--scale", type=int, default=50, help="Cópias do questoes.json no banco")
+    parser.add_argument("--ai-latency-ms", type=float, default=500, help="Latência do modelo falso")
+    parser.add_argument("--workers", type=int, default=1, help="Processos do uvicorn")
+    parser.add_argument("--bcrypt-rounds", type=int, default=None, help="Custo do bcrypt (padrão: o da API)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--database-url", default=None, help="PostgreSQL descartável (as tabelas são apagadas)")
+    parser.add_argument("--output", default=None, help="Arquivo JSON do resultado (padrão: loadtest-<commit>.json)")
+    parser.add_argument("--compare", default=None, help="JSON de outra execução para comparar")
+    args = parser.parse_args()
+
+    args.tmpdir = tempfile.mkdtemp(prefix="seshat-carga-")
+    if args.database_url is None:
+        args.database_url = f"sqlite:///{os.path.join(args.tmpdir, 'carga.db')}"
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+
+    try:
+        start = time.perf_counter()
+        questions, subjects = seed(args.scale)
+        print(f"{questions} questões semeadas em {time.perf_counter() - start:.1f}s")
+        recorder, measured = asyncio.run(run_load(args, subjects))
+    finally:
+        shutil.rmtree(args.tmpdir, ignore_errors=True)
+
+    commit, dirty = git_commit()
+    result = {
+        "commit": commit + ("-modificado" if dirty else ""),
+        "data": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": {key: value for key, value in vars(args).items() if key not in ("tmpdir", "output", "compare")}
+                  | {"database_url": args.database_url.split(":", 1)[0], "questoes": questions},
+        "duracao_medida_s": round(measured, 2),
+        **summarize(recorder, measured),
+    }
+
+    previous = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            previous = json.load(f)
+    print(f"{args.users} alunos, {measured:.0f}s medidos, modelo falso com {args.ai_latency_ms:g}ms")
+    print_report(result, previous)
+
+    output = args.output or f"loadtest-{result['commit']}.json"
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"Resultado salvo em {output}")
+
+
+if __name__ == "__main__":
+    main()
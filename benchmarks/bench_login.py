@@ -0,0 +1,96 @@
+# benchmarks/bench_login.py
+"""
+Benchmark de login sob carga concorrente.
+
+Dispara uma rajada de POST /login e, ao mesmo tempo, requisições leves
+(GET /perguntas/{subject}) para medir o quanto o bcrypt atrapalha o resto da API.
+Uso:
+
+    python benchmarks/bench_login.py --logins 200 --concurrency 50
+    BCRYPT_ROUNDS=10 BCRYPT_WORKERS=4 python benchmarks/bench_login.py
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def run(args):
+    import httpx
+    import main, migrate, passwords
+    migrate.migrate()  # o ASGITransport não roda o lifespan do app
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for i in range(args.users):
+            await client.post("/register", json={"email": f"aluno{i}@seshat.com", "password": "senha-forte"})
+        await client.post("/perguntas", json={
+            "subject": "Matemática", "text": "Quanto é 2 + 2?", "options": {"A": "3", "B": "4"}, "correct_answer": "B",
+        })
+
+        semaphore = asyncio.Semaphore(args.concurrency)
+        login_latencies, other_latencies = [], []
+        failures = 0
+        done = asyncio.Event()
+
+        async def login(i):
+            nonlocal failures
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post("/login", data={"username": f"aluno{i % args.users}@seshat.com", "password": "senha-forte"})
+                login_latencies.append((time.perf_counter() - start) * 1000)
+                failures += response.status_code != 200
+
+        async def background_reads():
+            while not done.is_set():
+                start = time.perf_counter()
+                await client.get("/perguntas/Matemática?count=1")
+                other_latencies.append((time.perf_counter() - start) * 1000)
+                await asyncio.sleep(0.005)
+
+        reader = asyncio.create_task(background_reads())
+        start = time.perf_counter()
+        await asyncio.gather(*(login(i) for i in range(args.logins)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await reader
+
+    print(f"bcrypt: rounds={passwords.BCRYPT_ROUNDS} workers={passwords.BCRYPT_WORKERS}")
+    print(f"logins: {args.logins} em {elapsed:.2f}s -> {args.logins / elapsed:.1f} logins/s ({failures} falhas)")
+    print(f"latência do login:           p50 {percentile(login_latencies, 50):8.1f}ms  p99 {percentile(login_latencies, 99):8.1f}ms")
+    if other_latencies:
+        print(f"latência de outras rotas:    p50 {percentile(other_latencies, 50):8.1f}ms  p99 {percentile(other_latencies, 99):8.1f}ms")
+    print(f"pool do bcrypt: {passwords.stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="seshat-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    os.environ.setdefault("GEMINI_FAKE", "1")
+    os.environ.setdefault("BCRYPT_MAX_QUEUE", str(args.logins))
+    try:
+        asyncio.run(run(args))
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
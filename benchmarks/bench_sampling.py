@@ -0,0 +1,129 @@
+# benchmarks/bench_sampling.py
+"""
+Benchmark do sorteio de questões (GET /perguntas/{subject}).
+
+Compara o ORDER BY random() antigo com o pool de IDs (question_pool) conforme o
+banco cresce. Uso:
+
+    python benchmarks/bench_sampling.py                 # 1k, 10k, 100k, 1M (SQLite temporário)
+    python benchmarks/bench_sampling.py --sizes 1000 50000 --database-url postgresql://localhost/seshat_bench --drop-database
+
+Com --database-url, TODAS as tabelas do banco são apagadas antes de começar: use só
+um banco descartável e confirme com --drop-database (sem ele o benchmark não roda).
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SUBJECTS = ["Matemática", "Física", "Química", "Biologia", "História", "Geografia", "Português", "Inglês"]
+SOURCES = ["ENEM", "FUVEST", "UNICAMP"]
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def grow_to(db, models, current: int, target: int):
+    """ Insere questões sintéticas até a tabela ter 'target' linhas. """
+    from sqlalchemy import insert
+    batch = []
+    for i in range(current, target):
+        batch.append({
+            "subject": SUBJECTS[i % len(SUBJECTS)],
+            "text": f"Questão sintética {i}",
+            "options": {"A": "a", "B": "b", "C": "c", "D": "d", "E": "e"},
+            "correct_answer": "A",
+            "source": SOURCES[i % len(SOURCES)],
+            "year": 2000 + i % 25,
+        })
+        if len(batch) == 50_000:
+            db.execute(insert(models.Question), batch)
+            batch.clear()
+    if batch:
+        db.execute(insert(models.Question), batch)
+    db.commit()
+
+
+def measure(fn, iterations: int) -> list[float]:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--legacy-iterations", type=int, default=20, help="ORDER BY random() é lento; use menos repetições")
+    parser.add_argument("--count", type=int, default=10)
+    parser.add_argument("--database-url", default=None, help="Banco descartável (as tabelas são apagadas)")
+    parser.add_argument("--drop-database", action="store_true",
+                        help="Confirma que o banco de --database-url pode ser apagado")
+    args = parser.parse_args()
+    if args.database_url is not None and not args.drop_database:
+        parser.error("--database-url apaga todas as tabelas do banco; confirme com --drop-database "
+                     "(ou rode sem --database-url para usar um SQLite temporário)")
+
+    tmpdir = None
+    if args.database_url is None:
+        tmpdir = tempfile.mkdtemp(prefix="seshat-bench-")
+        args.database_url = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+    os.environ["DATABASE_URL"] = args.database_url
+
+    from sqlalchemy import func
+    import crud, models, question_pool
+    from database import SessionLocal, engine
+
+    # Banco descartável: começa do zero. Todas as tabelas, porque question_search e
+    # question_hints têm chave estrangeira para questions
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    current = 0
+    print(f"{'questões':>10} | {'pool p50':>9} {'pool p99':>9} | {'random() p50':>12} {'random() p99':>12} | {'carga do pool':>13}")
+    try:
+        for size in sorted(args.sizes):
+            grow_to(db, models, current, size)
+            current = size
+
+            def legacy():
+                subject = random.choice(SUBJECTS)
+                db.query(models.Question).filter(models.Question.subject == subject) \
+                    .order_by(func.random()).limit(args.count).all()
+
+            def pooled():
+                crud.get_questions_by_subject(db, subject=random.choice(SUBJECTS), count=args.count)
+
+            # A primeira chamada de cada filtro carrega o pool; medimos à parte
+            question_pool.invalidate()
+            start = time.perf_counter()
+            for subject in SUBJECTS:
+                question_pool.get_ids(db, subject)
+            warmup_ms = (time.perf_counter() - start) * 1000 / len(SUBJECTS)
+
+            new = measure(pooled, args.iterations)
+            old = measure(legacy, args.legacy_iterations)
+            print(f"{size:>10} | {percentile(new, 50):>7.2f}ms {percentile(new, 99):>7.2f}ms | "
+                  f"{percentile(old, 50):>10.2f}ms {percentile(old, 99):>10.2f}ms | {warmup_ms:>11.2f}ms")
+    finally:
+        db.close()
+        if tmpdir:
+            engine.dispose()
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
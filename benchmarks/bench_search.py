@@ -0,0 +1,158 @@
+# benchmarks/bench_search.py
+"""
+Benchmark da busca textual (GET /perguntas/busca).
+
+Gera um banco sintético de questões em português e compara a busca pelo índice
+(question_search: FTS5 no SQLite, GIN no PostgreSQL) com uma varredura
+'text LIKE %termo%' na tabela de questões. Uso:
+
+    python benchmarks/bench_search.py                    # 500k questões (SQLite temporário)
+    python benchmarks/bench_search.py --size 50000 --database-url postgresql://...
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SUBJECTS = ["Matemática", "Física", "Química", "Biologia", "História", "Geografia", "Português", "Inglês"]
+SOURCES = ["ENEM", "FUVEST", "UNICAMP"]
+SYLLABLES = ["fun", "ção", "e", "qua", "cé", "lu", "la", "re", "vo", "ener", "gi", "á", "ci", "do", "pe",
+             "rí", "o", "gião", "ná", "li", "se", "grá", "fi", "co", "pres", "são", "ín", "di", "nú", "me",
+             "ro", "po", "pu", "ta", "ti", "ca", "for", "ça", "ve", "ter"]
+FILLER = ["de", "da", "do", "em", "para", "com", "que", "o", "a", "um", "uma", "sobre", "entre"]
+
+
+def vocabulary() -> list[str]:
+    """ 64 mil palavras de 3 sílabas, em ordem fixa (a posição define a frequência). """
+    rng = random.Random(1)
+    words = [a + b + c for a in SYLLABLES for b in SYLLABLES for c in SYLLABLES]
+    rng.shuffle(words)
+    return words
+
+
+def zipf_word(rng: random.Random, words: list[str]) -> str:
+    # Poucas palavras muito comuns e uma cauda longa de raras, como num texto de verdade
+    return words[min(len(words), int(rng.paretovariate(1.0))) - 1]
+
+
+def grow_to(db, models, size: int, seed: int = 42):
+    """ Insere 'size' questões sintéticas (enunciados de ~30 palavras). """
+    from sqlalchemy import insert
+    rng = random.Random(seed)
+    words = vocabulary()
+    batch = []
+    for i in range(size):
+        text = " ".join(zipf_word(rng, words) if rng.random() < 0.6 else rng.choice(FILLER) for _ in range(30))
+        batch.append({
+            "subject": SUBJECTS[i % len(SUBJECTS)],
+            "text": f"{text} ({i})",
+            "options": {"A": zipf_word(rng, words), "B": zipf_word(rng, words), "C": zipf_word(rng, words)},
+            "correct_answer": "A",
+            "source": SOURCES[i % len(SOURCES)],
+            "year": 2000 + i % 25,
+        })
+        if len(batch) == 50_000:
+            db.execute(insert(models.Question), batch)
+            batch.clear()
+    if batch:
+        db.execute(insert(models.Question), batch)
+    db.commit()
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def measure(fn, queries: list[str]) -> list[float]:
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(query)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=500_000)
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--scan-iterations", type=int, default=10, help="A varredura é lenta; use menos repetições")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    tmpdir = None
+    if args.database_url is None:
+        tmpdir = tempfile.mkdtemp(prefix="seshat-bench-")
+        args.database_url = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+    os.environ["DATABASE_URL"] = args.database_url
+
+    import models, question_search
+    from database import SessionLocal, engine
+
+    tables = [models.QuestionSearch.__table__, models.Question.__table__]
+    models.Base.metadata.drop_all(bind=engine, tables=tables)
+    models.Base.metadata.create_all(bind=engine, tables=tables)
+
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        grow_to(db, models, args.size)
+        print(f"{args.size} questões inseridas em {time.perf_counter() - start:.1f}s")
+        start = time.perf_counter()
+        question_search.backfill(db)
+        print(f"Índice de busca construído em {time.perf_counter() - start:.1f}s")
+
+        rng = random.Random(7)
+        words = vocabulary()
+        # Consultas com 1 e 2 termos entre as 5 mil palavras mais comuns, sem acento (como o aluno digita)
+        queries = [
+            " ".join(question_search.normalize(rng.choice(words[:5000])) for _ in range(rng.choice([1, 2])))
+            for _ in range(args.iterations)
+        ]
+
+        def indexed(query):
+            question_search.search_ids(db, query, limit=args.limit)
+
+        def indexed_filtered(query):
+            question_search.search_ids(db, query, subject=rng.choice(SUBJECTS), limit=args.limit)
+
+        def deep_page(query):
+            ids, cursor = question_search.search_ids(db, query, limit=args.limit)
+            for _ in range(4):
+                if not cursor:
+                    break
+                ids, cursor = question_search.search_ids(db, query, limit=args.limit, cursor=cursor)
+
+        def scan(query):
+            # O que dava para fazer sem índice (e ainda sensível a acentos)
+            filters = [models.Question.text.like(f"%{term}%") for term in query.split()]
+            db.query(models.Question.id).filter(*filters).limit(args.limit).all()
+
+        results = [
+            ("índice", measure(indexed, queries)),
+            ("índice + matéria", measure(indexed_filtered, queries)),
+            ("índice, 5 páginas", measure(deep_page, queries[: max(1, args.iterations // 5)])),
+            ("LIKE (varredura)", measure(scan, queries[: args.scan_iterations])),
+        ]
+        print(f"{'consulta':>20} | {'p50':>9} {'p95':>9} {'p99':>9}")
+        for name, samples in results:
+            print(f"{name:>20} | {percentile(samples, 50):>7.2f}ms {percentile(samples, 95):>7.2f}ms "
+                  f"{percentile(samples, 99):>7.2f}ms")
+    finally:
+        db.close()
+        if tmpdir:
+            engine.dispose()
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# benchmarks/bench_serialization.py
+"""
+Benchmark da serialização das listas de questões (GET /perguntas/{subject}).
+
+Compara, para respostas de 10, 50 e 90 questões:
+  - pydantic + json: o caminho antigo (validação no schemas.Question e JSONResponse);
+  - pydantic + orjson: o mesmo, com ORJSONResponse (a nova classe padrão do app);
+  - bytes em cache: question_cache.payload_list com o JSON de cada questão já pronto.
+Também confere que os três produzem o mesmo JSON. Uso:
+
+    python benchmarks/bench_serialization.py
+    python benchmarks/bench_serialization.py --iterations 5000
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SIZES = (10, 50, 90)
+
+
+def fake_questions(question_cache, count: int, seed: int = 42) -> list:
+    """ Questões com o tamanho típico do banco (enunciado ~600 caracteres, 5 alternativas). """
+    rng = random.Random(seed)
+    words = ["função", "energia", "gráfico", "população", "reação", "território", "análise", "século", "força"]
+    questions = []
+    for i in range(count):
+        text = " ".join(rng.choice(words) for _ in range(80))
+        options = {letter: " ".join(rng.choice(words) for _ in range(8)) for letter in "ABCDE"}
+        questions.append(question_cache.CachedQuestion(
+            id=i + 1, subject="Matemática", text=text, options=options, correct_answer="A",
+            source="ENEM", year=2000 + i % 25,
+        ))
+    return questions
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def measure(fn, iterations: int) -> list[float]:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1_000_000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    import orjson
+    from pydantic import TypeAdapter
+    import question_cache, schemas
+
+    adapter = TypeAdapter(list[schemas.Question])
+
+    def pydantic_data(questions):
+        # O que o FastAPI faz com response_model=List[schemas.Question]
+        validated = adapter.validate_python(questions, from_attributes=True)
+        return adapter.dump_python(validated, mode="json")
+
+    def pydantic_json(questions):
+        # Igual ao JSONResponse.render
+        return json.dumps(pydantic_data(questions), ensure_ascii=False, allow_nan=False,
+                          indent=None, separators=(",", ":")).encode("utf-8")
+
+    def pydantic_orjson(questions):
+        return orjson.dumps(pydantic_data(questions))
+
+    print(f"{'questões':>8} | {'caminho':>18} | {'p50':>9} {'p95':>9} {'p99':>9}")
+    for size in SIZES:
+        questions = fake_questions(question_cache, size)
+        question_cache.invalidate()
+        question_cache.payload_list(questions)  # aquece o cache de bytes
+
+        expected = json.loads(pydantic_json(questions))
+        assert json.loads(pydantic_orjson(questions)) == expected
+        assert json.loads(question_cache.payload_list(questions)) == expected
+
+        for name, fn in [
+            ("pydantic + json", lambda: pydantic_json(questions)),
+            ("pydantic + orjson", lambda: pydantic_orjson(questions)),
+            ("bytes em cache", lambda: question_cache.payload_list(questions)),
+        ]:
+            samples = measure(fn, args.iterations)
+            print(f"{size:>8} | {name:>18} | {percentile(samples, 50):>7.1f}µs "
+                  f"{percentile(samples, 95):>7.1f}µs {percentile(samples, 99):>7.1f}µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# benchmarks/bench_startup.py
+"""
+Benchmark da subida a frio da API.
+
+Cada rodada é um processo Python novo (nada importado ainda), como uma instância
+que o host acabou de acordar. Mede:
+  - import: 'import main';
+  - startup: o lifespan do app (migrate.migrate, se MIGRATE_ON_STARTUP=1);
+  - 1ª requisição: GET /catalogo (vai ao banco) até a resposta 200.
+
+Roda com um banco SQLite novo (a primeira subida, que cria tudo) e com o banco já
+migrado (o caso comum). Sem GEMINI_API_KEY, de propósito: a API tem que subir sem ela.
+Se a mediana passar do orçamento, sai com código 1 (dá para usar no CI; o mesmo
+orçamento é conferido em tests/test_startup.py):
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 10 --import-budget-ms 1500 --budget-ms 3000
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Orçamentos padrão (mediana, banco já migrado); tests/test_startup.py usa os mesmos
+IMPORT_BUDGET_MS = 1500
+BUDGET_MS = 3000
+
+CHILD = """
+import json, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient  # do teste, não da API: fica fora da medição
+client_loaded = time.perf_counter()
+with TestClient(main.app) as client:  # roda o lifespan
+    ready = time.perf_counter()
+    response = client.get("/catalogo")
+    answered = time.perf_counter()
+print(json.dumps({
+    "status": response.status_code,
+    "import_ms": (imported - start) * 1000,
+    "startup_ms": (ready - client_loaded) * 1000,
+    "first_request_ms": (answered - ready) * 1000,
+    "total_ms": (answered - start - (client_loaded - imported)) * 1000,
+}))
+"""
+
+
+def cold_start(database_url: str) -> dict:
+    env = {key: value for key, value in os.environ.items() if key != "GEMINI_API_KEY"}
+    env.update(DATABASE_URL=database_url, SECRET_KEY=env.get("SECRET_KEY", "benchmark"))
+    result = subprocess.run([sys.executable, "-c", CHILD], cwd=ROOT, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise SystemExit(f"A API não subiu:\n{result.stderr}")
+    sample = json.loads(result.stdout.strip().splitlines()[-1])
+    if sample["status"] != 200:
+        raise SystemExit(f"A primeira requisição respondeu {sample['status']}")
+    return sample
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--import-budget-ms", type=float, default=IMPORT_BUDGET_MS, help="Orçamento da mediana de 'import main'")
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS,
+                        help="Orçamento da mediana até a 1ª resposta, com o banco já migrado")
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="seshat-bench-")
+    try:
+        results = {"banco novo": [], "banco migrado": []}
+        for i in range(args.runs):
+            results["banco novo"].append(cold_start(f"sqlite:///{os.path.join(tmpdir, f'novo{i}.db')}"))
+        migrated = f"sqlite:///{os.path.join(tmpdir, 'migrado.db')}"
+        cold_start(migrated)
+        for _ in range(args.runs):
+            results["banco migrado"].append(cold_start(migrated))
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    columns = ["import_ms", "startup_ms", "first_request_ms", "total_ms"]
+    print(f"Mediana de {args.runs} subidas (processos novos)")
+    print(f"{'':>14} | {'import':>9} {'startup':>9} {'1ª req.':>9} {'total':>9}")
+    medians = {}
+    for name, samples in results.items():
+        medians[name] = {column: statistics.median(s[column] for s in samples) for column in columns}
+        print(f"{name:>14} | " + " ".join(f"{medians[name][column]:>7.0f}ms" for column in columns))
+
+    failures = []
+    if medians["banco migrado"]["import_ms"] > args.import_budget_ms:
+        failures.append(f"import {medians['banco migrado']['import_ms']:.0f}ms > {args.import_budget_ms:.0f}ms")
+    if medians["banco migrado"]["total_ms"] > args.budget_ms:
+        failures.append(f"total {medians['banco migrado']['total_ms']:.0f}ms > {args.budget_ms:.0f}ms")
+    if failures:
+        print("ACIMA DO ORÇAMENTO: " + "; ".join(failures))
+        sys.exit(1)
+    print(f"Dentro do orçamento (import <= {args.import_budget_ms:.0f}ms, total <= {args.budget_ms:.0f}ms)")
+
+
+if __name__ == "__main__":
+    main()
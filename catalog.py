@@ -0,0 +1,136 @@
+# catalog.py
+
+import os
+import threading
+import time
+from collections import Counter
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+import models
+
+# --- Catálogo de matérias, fontes e anos ---
+# A tabela 'question_facets' guarda quantas questões há em cada (subject, source, year).
+# Ela é atualizada na mesma transação das inserções de questões (increment) e
+# recalculada inteira depois de uma importação em massa (rebuild). O GET /catalogo
+# lê só essa tabela (poucas linhas) e ainda guarda o resultado em memória.
+
+# Tempo máximo (segundos) do catálogo em memória. Protege contra inserções feitas por outro processo.
+CATALOG_CACHE_TTL = float(os.environ.get("CATALOG_CACHE_TTL", 60))
+
+_cached: tuple[float, dict] | None = None
+_lock = threading.Lock()
+
+
+def _key(subject: str, source: str | None, year: int | None) -> tuple[str, str, int]:
+    return (subject, source or "", year or 0)
+
+
+def _upsert(db: Session):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    stmt = dialect_insert(models.QuestionFacet)
+    return stmt.on_conflict_do_update(
+        index_elements=["subject", "source", "year"],
+        set_={"total": models.QuestionFacet.total + stmt.excluded.total},
+    )
+
+
+def increment(db: Session, questions: list):
+    """
+    Soma as questões novas (objetos ou dicts com subject/source/year) às contagens.
+    Não faz commit: chame antes do commit da inserção e 'invalidate' depois dele.
+    """
+    counts = Counter(
+        _key(q["subject"], q.get("source"), q.get("year")) if isinstance(q, dict) else _key(q.subject, q.source, q.year)
+        for q in questions
+    )
+    if not counts:
+        return
+    db.execute(_upsert(db), [
+        {"subject": subject, "source": source, "year": year, "total": total}
+        for (subject, source, year), total in counts.items()
+    ])
+
+
+def rebuild(db: Session):
+    """ Recalcula a tabela inteira com um GROUP BY (depois de importações em massa). Faz commit. """
+    source = func.coalesce(models.Question.source, "")
+    year = func.coalesce(models.Question.year, 0)
+    db.query(models.QuestionFacet).delete(synchronize_session=False)
+    db.execute(insert(models.QuestionFacet).from_select(
+        ["subject", "source", "year", "total"],
+        select(models.Question.subject, source, year, func.count()).group_by(models.Question.subject, source, year),
+    ))
+    db.commit()
+    invalidate()
+
+
+def ensure_built(db: Session):
+    """ Na primeira subida com a tabela nova, ela está vazia: calcula a partir das questões. """
+    if db.query(models.QuestionFacet.subject).first() is None and db.query(models.Question.id).first() is not None:
+        rebuild(db)
+
+
+def _build(db: Session) -> dict:
+    rows = db.query(models.QuestionFacet).filter(models.QuestionFacet.total > 0).order_by(
+        models.QuestionFacet.subject, models.QuestionFacet.source, models.QuestionFacet.year
+    ).all()
+    subjects: dict[str, dict] = {}
+    sources = Counter()
+    years = Counter()
+    combinations = []
+    for row in rows:
+        source = row.source or None
+        year = row.year or None
+        subject = subjects.setdefault(row.subject, {"subject": row.subject, "total": 0, "fontes": Counter(), "anos": Counter()})
+        subject["total"] += row.total
+        if source:
+            subject["fontes"][source] += row.total
+            sources[source] += row.total
+        if year:
+            subject["anos"][year] += row.total
+            years[year] += row.total
+        combinations.append({"subject": row.subject, "source": source, "year": year, "total": row.total})
+    return {
+        "total": sum(subject["total"] for subject in subjects.values()),
+        "materias": [
+            {**subject, "fontes": dict(subject["fontes"]), "anos": dict(sorted(subject["anos"].items()))}
+            for subject in subjects.values()
+        ],
+        "fontes": dict(sources),
+        "anos": dict(sorted(years.items())),
+        "combinacoes": combinations,
+    }
+
+
+def get_catalog(db: Session) -> dict:
+    """ Catálogo em memória; só lê a tabela de contagens quando ele expirou ou foi invalidado. """
+    global _cached
+    now = time.monotonic()
+    with _lock:
+        cached = _cached
+    if cached and now - cached[0] < CATALOG_CACHE_TTL:
+        return cached[1]
+    catalog = _build(db)
+    with _lock:
+        _cached = (now, catalog)
+    return catalog
+
+
+def invalidate():
+    global _cached
+    with _lock:
+        _cached = None
+
+
+if __name__ == "__main__":
+    # Recalcula as contagens (ex: depois de apagar questões direto no banco)
+    import database
+    from database import SessionLocal
+    database.sync_schema(models.Base.metadata)
+    with SessionLocal() as db:
+        rebuild(db)
+        print(f"Catálogo recalculado: {get_catalog(db)['total']} questões.")
@@ -1,53 +1,144 @@
 # crud.py
 from sqlalchemy.orm import Session, joinedload # <-- ADICIONE joinedload AQUI
-from sqlalchemy import func
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, insert, select, update, case, and_, literal_column
+import io
+from datetime import datetime, timezone
+from types import SimpleNamespace
+import json
 # Importa HTTPException para podermos retornar erros de lógica de negócio
 from fastapi import HTTPException, status 
 import models, schemas
-from passlib.context import CryptContext
-
-# ... (pwd_context, verify_password, get_password_hash, ... )
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+import question_pool, question_cache, question_search, catalog
+import passwords
+import study_plan
 
+# O hash de senha mora em passwords.py (pool dedicado do bcrypt); estas funções ficam por compatibilidade
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    plain_password_bytes = plain_password.encode('utf-8')
-    if len(plain_password_bytes) > 72: plain_password_bytes = plain_password_bytes[:72]
-    return pwd_context.verify(plain_password_bytes, hashed_password)
+    return passwords.verify_password(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    password_bytes = password.encode('utf-8')
-    if len(password_bytes) > 72: password_bytes = password_bytes[:72]
-    return pwd_context.hash(password_bytes)
+    return passwords.hash_password(password)
 
 # --- CRUD para Usuários ---
 def get_user_by_email(db: Session, email: str):
     return db.query(models.User).filter(models.User.email == email).first()
 
-def create_user(db: Session, user: schemas.UserCreate):
-    hashed_password = get_password_hash(user.password)
+def create_user(db: Session, user: schemas.UserCreate, hashed_password: str | None = None):
+    """ Cria o usuário. Passe 'hashed_password' quando o hash já foi calculado (ex: no pool do bcrypt). """
+    if hashed_password is None:
+        hashed_password = get_password_hash(user.password)
     db_user = models.User(email=user.email, hashed_password=hashed_password)
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
     return db_user
 
+def update_user_password_hash(db: Session, db_user: models.User, hashed_password: str):
+    """ Troca o hash guardado (ex: quando o custo do bcrypt mudou). """
+    db_user.hashed_password = hashed_password
+    db.commit()
+    return db_user
+
 # --- CRUD para Questões ---
 def get_questions_by_subject(db: Session, subject: str, count: int, source: str | None = None, year: int | None = None):
-    query = db.query(models.Question).filter(models.Question.subject == subject)
-    if source:
-        query = query.filter(models.Question.source == source)
-    if year:
-        query = query.filter(models.Question.year == year)
-    return query.order_by(func.random()).limit(count).all()
+    """ Sorteia questões do filtro usando o pool de IDs em memória (sem ORDER BY random()). """
+    ids = question_pool.sample_ids(db, subject=subject, count=count, source=source, year=year)
+    if not ids:
+        return []
+    questions = db.query(models.Question).filter(models.Question.id.in_(ids)).all()
+    # O IN (...) não garante ordem; mantém a ordem sorteada
+    position = {question_id: i for i, question_id in enumerate(ids)}
+    return sorted(questions, key=lambda q: position[q.id])
 
 # // NOVO: Função para buscar uma única questão pelo seu ID (necessária para verificação)
-def get_question_by_id(db: Session, question_id: int):
-    """ Busca uma questão específica pelo seu ID. """
-    return db.query(models.Question).filter(models.Question.id == question_id).first()
+def get_question_by_id(db: Session, question_id: int) -> question_cache.CachedQuestion | None:
+    """
+    Busca uma questão específica pelo seu ID.
+    Lê primeiro do cache em memória; só vai ao banco quando a questão não está lá.
+    Retorna uma cópia compacta (question_cache.CachedQuestion), não o objeto ORM.
+    """
+    cached = question_cache.get(question_id)
+    if cached is not None:
+        return cached
+    db_question = db.query(models.Question).filter(models.Question.id == question_id).first()
+    if db_question is None:
+        return None
+    return question_cache.put(db_question)
 # // FIM DO NOVO CÓDIGO
 
+def get_questions_by_ids(db: Session, question_ids: list[int]) -> dict[int, question_cache.CachedQuestion]:
+    """
+    Busca várias questões de uma vez. O que não está no cache é resolvido
+    em uma única consulta IN (...). IDs inexistentes ficam fora do dicionário.
+    """
+    found = {}
+    missing = set()
+    for question_id in question_ids:
+        cached = question_cache.get(question_id)
+        if cached is not None:
+            found[question_id] = cached
+        else:
+            missing.add(question_id)
+
+    if missing:
+        for db_question in db.query(models.Question).filter(models.Question.id.in_(missing)):
+            found[db_question.id] = question_cache.put(db_question)
+    return found
+
+# Campos que podem ser pedidos em GET /perguntas?fields= (o gabarito não é listado)
+QUESTION_LIST_FIELDS = ("id", "subject", "text", "options", "source", "year")
+
+def list_questions(db: Session, fields: list[str], limit: int, after: tuple | None = None,
+                   subject: str | None = None, source: str | None = None, year: int | None = None):
+    """
+    Lista as questões em ordem de (subject, ano, id), buscando só as colunas de 'fields'.
+    'after' é a chave (subject, ano, id) da última questão da página anterior.
+    Retorna (itens, chave da última questão ou None se acabou).
+
+    A continuação é dividida em três buscas pelo índice ix_questions_subject_year_id
+    (mesmo subject e ano com id maior; mesmo subject com ano maior; subject maior),
+    porque o SQLite não usa o índice inteiro numa comparação de tuplas. Assim cada
+    página custa o mesmo, não importa a profundidade (ao contrário do OFFSET).
+    """
+    # 0 literal (não parâmetro), para a expressão bater com a do índice
+    year_key = func.coalesce(models.Question.year, literal_column("0"))
+    columns = [getattr(models.Question, field) for field in fields]
+    base = db.query(
+        *columns,
+        models.Question.subject.label("_subject"), year_key.label("_year"), models.Question.id.label("_id"),
+    )
+    if subject:
+        base = base.filter(models.Question.subject == subject)
+    if source:
+        base = base.filter(models.Question.source == source)
+    if year:
+        base = base.filter(models.Question.year == year)
+
+    order = (models.Question.subject, year_key, models.Question.id)
+    if after is None:
+        ranges = [((), order)]
+    else:
+        # Cada busca ordena só pelas colunas que variam nela (com as outras fixas por '=',
+        # o SQLite ordenaria em memória em vez de seguir o índice)
+        after_subject, after_year, after_id = after
+        ranges = [
+            ((models.Question.subject == after_subject, year_key == after_year, models.Question.id > after_id), order[2:]),
+            ((models.Question.subject == after_subject, year_key > after_year), order[1:]),
+            ((models.Question.subject > after_subject,), order),
+        ]
+
+    rows = []
+    for conditions, order_by in ranges:
+        rows += base.filter(*conditions).order_by(*order_by).limit(limit + 1 - len(rows)).all()
+        if len(rows) > limit:
+            break
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    items = [{field: getattr(row, field) for field in fields} for row in rows]
+    last = (rows[-1]._subject, rows[-1]._year, rows[-1]._id) if has_more else None
+    return items, last
+
 def create_question(db: Session, question: schemas.QuestionCreate):
     db_question = models.Question(
         subject=question.subject,
@@ -58,10 +149,94 @@ def create_question(db: Session, question: schemas.QuestionCreate):
         year=question.year
     )
     db.add(db_question)
+    db.flush()
+    catalog.increment(db, [db_question])
+    # Entra no índice de busca na mesma transação do insert
+    question_search.index(db, [db_question])
     db.commit()
     db.refresh(db_question)
+    question_pool.invalidate(subject=db_question.subject)
+    question_cache.invalidate(db_question.id)
+    catalog.invalidate()
     return db_question
 
+def _copy_questions_postgres(db: Session, rows: list[dict]):
+    """ Caminho rápido do PostgreSQL: COPY ... FROM STDIN em vez de INSERTs. """
+    def field(value):
+        if value is None:
+            return "" # Campo vazio sem aspas = NULL no formato CSV do COPY
+        if isinstance(value, int):
+            return str(value)
+        return '"' + value.replace('"', '""') + '"'
+
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write(",".join(field(v) for v in (
+            row["subject"], row["text"], json.dumps(row["options"], ensure_ascii=False),
+            row["correct_answer"], row["source"], row["year"],
+        )))
+        buffer.write("\n")
+    buffer.seek(0)
+
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            "COPY questions (subject, text, options, correct_answer, source, year) FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+    finally:
+        cursor.close()
+
+def bulk_insert_questions(db: Session, rows: list[dict]):
+    """
+    Insere muitas questões numa única transação (COPY no PostgreSQL, executemany nos outros bancos).
+    Cada item tem os campos de schemas.QuestionCreate.
+    """
+    if not rows:
+        return
+    if db.get_bind().dialect.name == "postgresql":
+        _copy_questions_postgres(db, rows)
+    else:
+        db.execute(insert(models.Question), rows)
+    db.commit()
+    question_pool.invalidate()
+    # O índice de busca e o catálogo são atualizados uma vez no fim da importação
+    # (question_search.backfill e catalog.rebuild)
+
+def create_questions(db: Session, questions: list[schemas.QuestionCreate]) -> list[int | None]:
+    """
+    Insere várias questões numa única transação e devolve o ID de cada uma, na mesma ordem.
+    Questões cujo texto já existe (no banco ou repetido na lista) não são inseridas e ficam com None.
+    A comparação com o banco não é atômica: duas chamadas simultâneas com o mesmo texto inserem as duas.
+    """
+    texts = {q.text for q in questions}
+    existing = {text for (text,) in db.query(models.Question.text).filter(models.Question.text.in_(texts))} if texts else set()
+
+    rows = []
+    positions = []
+    for i, question in enumerate(questions):
+        if question.text in existing:
+            continue
+        existing.add(question.text)
+        rows.append(question.model_dump())
+        positions.append(i)
+
+    ids: list[int | None] = [None] * len(questions)
+    if rows:
+        new_ids = db.scalars(
+            insert(models.Question).returning(models.Question.id, sort_by_parameter_order=True), rows
+        ).all()
+        catalog.increment(db, rows)
+        question_search.index(db, [
+            SimpleNamespace(id=new_id, text=row["text"], options=row["options"]) for new_id, row in zip(new_ids, rows)
+        ])
+        db.commit()
+        for position, new_id in zip(positions, new_ids):
+            ids[position] = new_id
+        question_pool.invalidate()
+        catalog.invalidate()
+    return ids
+
 # --- CRUD para Cronogramas ---
 
 def get_cronograma_by_owner_id(db: Session, owner_id: int):
@@ -71,6 +246,33 @@ def get_cronograma_by_owner_id(db: Session, owner_id: int):
     """
     return db.query(models.Cronograma).filter(models.Cronograma.owner_id == owner_id).first()
 
+def get_cronograma_version(db: Session, owner_id: int) -> tuple[int, int] | None:
+    """ Só o (id, versao) do cronograma do usuário: o suficiente para responder 304 sem montar a árvore. """
+    row = db.query(models.Cronograma.id, models.Cronograma.versao).filter(models.Cronograma.owner_id == owner_id).first()
+    return tuple(row) if row else None
+
+def get_cronograma_tree(db: Session, cronograma_id: int):
+    """ Carrega o cronograma com matérias e tópicos em uma única consulta (sem N+1 na serialização). """
+    return db.query(models.Cronograma).options(
+        joinedload(models.Cronograma.materias).joinedload(models.MateriaCronograma.topicos)
+    ).filter(models.Cronograma.id == cronograma_id).first()
+
+def bump_cronograma_version(db: Session, cronograma_id: int):
+    """ Marca o cronograma como alterado (invalida o ETag). Não faz commit: vai junto com a mudança. """
+    db.query(models.Cronograma).filter(models.Cronograma.id == cronograma_id).update(
+        {models.Cronograma.versao: models.Cronograma.versao + 1}, synchronize_session=False
+    )
+
+def cronograma_changed(db: Session, cronograma_id: int, materia_ids: set[int] | None = None):
+    """
+    Chamar em toda mudança de matérias/tópicos, logo antes do commit:
+    atualiza o ETag (versao) e o plano de estudos guardado.
+    'materia_ids' = matérias cujos tópicos mudaram; None = a lista de matérias mudou.
+    """
+    db.flush()
+    bump_cronograma_version(db, cronograma_id)
+    study_plan.refresh(db, cronograma_id, materia_ids)
+
 def create_user_cronograma(db: Session, cronograma: schemas.CronogramaCreate, owner_id: int):
     """ Cria um novo cronograma "pai" para um usuário. """
     # Cria o objeto do banco de dados, ligando-o ao 'owner_id'
@@ -94,6 +296,7 @@ def add_materia_to_cronograma(db: Session, materia: schemas.MateriaCronogramaCre
     # 3. Se o limite estiver OK, cria e salva a nova matéria
     db_materia = models.MateriaCronograma(nome=materia.nome, cronograma_id=cronograma_id)
     db.add(db_materia)
+    bump_cronograma_version(db, cronograma_id)
     db.commit()
     db.refresh(db_materia)
     return db_materia
@@ -102,49 +305,157 @@ def get_materia_by_id(db: Session, materia_id: int):
     """ Função auxiliar para buscar uma matéria específica """
     return db.query(models.MateriaCronograma).filter(models.MateriaCronograma.id == materia_id).first()
 
-def add_topico_to_materia(db: Session, topico: schemas.TopicoCronogramaCreate, materia_id: int):
-    """ Adiciona um novo tópico a uma matéria, respeitando o limite de 3. """
-    
-    # 1. Pega a matéria pai para verificar o limite
-    db_materia = get_materia_by_id(db, materia_id)
-    
-    # 2. Verifica se a matéria existe
-    if not db_materia:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, 
-                            detail="Matéria não encontrada.")
+def add_topico_to_materia(db: Session, topico: schemas.TopicoCronogramaCreate, db_materia: models.MateriaCronograma,
+                          topicos_count: int):
+    """
+    Adiciona um novo tópico a uma matéria, respeitando o limite de 3.
+    Recebe a matéria e o número de tópicos dela já carregados (get_owned_materia_with_topicos_count).
+    """
     
-    # 3. Verifica a lógica de negócio (limite de 3 tópicos)
-    if len(db_materia.topicos) >= 3:
+    # 1. Verifica a lógica de negócio (limite de 3 tópicos)
+    if topicos_count >= 3:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, 
                             detail="Limite de 3 tópicos por matéria atingido.")
     
-    # 4. Se tudo estiver OK, cria e salva o novo tópico
-    db_topico = models.TopicoCronograma(nome=topico.nome, materia_id=materia_id)
+    # 2. Se tudo estiver OK, cria e salva o novo tópico
+    db_topico = models.TopicoCronograma(nome=topico.nome, materia_id=db_materia.id)
     db.add(db_topico)
+    cronograma_changed(db, db_materia.cronograma_id, materia_ids={db_materia.id})
     db.commit()
     db.refresh(db_topico)
     return db_topico
 
-def delete_materia_from_cronograma(db: Session, materia_id: int, user_id: int):
-    db_materia = get_materia_by_id(db, materia_id=materia_id)
-    if not db_materia:
+def add_ai_plan_to_cronograma(db: Session, cronograma_id: int, plan: dict) -> list[models.MateriaCronograma]:
+    """
+    Insere as matérias e tópicos gerados pela IA em uma única transação,
+    respeitando os limites de 3 matérias por cronograma e 3 tópicos por matéria.
+    """
+    existing = db.query(func.count(models.MateriaCronograma.id)).filter(
+        models.MateriaCronograma.cronograma_id == cronograma_id
+    ).scalar()
+    available = 3 - existing
+    if available <= 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="Limite de 3 matérias por cronograma atingido.")
+
+    db_materias = []
+    for materia in (plan.get("materias") or [])[:available]:
+        if not isinstance(materia, dict) or not materia.get("nome"):
+            continue
+        db_materia = models.MateriaCronograma(nome=str(materia["nome"]), cronograma_id=cronograma_id)
+        db_materia.topicos = [
+            models.TopicoCronograma(nome=str(nome)) for nome in (materia.get("topicos") or [])[:3] if nome
+        ]
+        db_materias.append(db_materia)
+    if not db_materias:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="O plano gerado não tem matérias válidas.")
+
+    db.add_all(db_materias)
+    cronograma_changed(db, cronograma_id)
+    db.commit()
+    for db_materia in db_materias:
+        db.refresh(db_materia)
+    return db_materias
+
+# --- Verificação de dono (um JOIN, em vez de navegar topico.materia.cronograma) ---
+
+def _get_owned_materia_row(db: Session, materia_id: int, user_id: int, forbidden_detail: str, *columns):
+    """ (matéria, *columns) em uma consulta, com o dono do cronograma no JOIN. 404 se não existe, 403 se é de outro usuário. """
+    row = db.query(models.MateriaCronograma, models.Cronograma.owner_id, *columns).join(
+        models.Cronograma, models.MateriaCronograma.cronograma_id == models.Cronograma.id
+    ).filter(models.MateriaCronograma.id == materia_id).first()
+    if not row:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Matéria não encontrada.")
-    if db_materia.cronograma.owner_id != user_id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Você não tem permissão para deletar esta matéria.")
-    db.delete(db_materia)
+    db_materia, owner_id, *values = row
+    if owner_id != user_id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=forbidden_detail)
+    return db_materia, *values
+
+def get_owned_materia(db: Session, materia_id: int, user_id: int, forbidden_detail: str) -> models.MateriaCronograma:
+    """ Busca a matéria junto com o dono do cronograma em uma consulta. 404 se não existe, 403 se é de outro usuário. """
+    db_materia, = _get_owned_materia_row(db, materia_id, user_id, forbidden_detail)
+    return db_materia
+
+def get_owned_materia_with_topicos_count(db: Session, materia_id: int, user_id: int,
+                                         forbidden_detail: str) -> tuple[models.MateriaCronograma, int]:
+    """ Igual a get_owned_materia, contando os tópicos da matéria na mesma consulta (sem carregar 'topicos'). """
+    topicos_count = select(func.count(models.TopicoCronograma.id)).where(
+        models.TopicoCronograma.materia_id == models.MateriaCronograma.id
+    ).correlate(models.MateriaCronograma).scalar_subquery()
+    return _get_owned_materia_row(db, materia_id, user_id, forbidden_detail, topicos_count)
+
+def get_owned_topico(db: Session, topico_id: int, user_id: int, forbidden_detail: str) -> tuple[models.TopicoCronograma, int]:
+    """ Busca o tópico e o ID do cronograma dele, verificando o dono em uma consulta. """
+    row = db.query(models.TopicoCronograma, models.Cronograma.id, models.Cronograma.owner_id).join(
+        models.MateriaCronograma, models.TopicoCronograma.materia_id == models.MateriaCronograma.id
+    ).join(
+        models.Cronograma, models.MateriaCronograma.cronograma_id == models.Cronograma.id
+    ).filter(models.TopicoCronograma.id == topico_id).first()
+    if not row:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tópico não encontrada.")
+    db_topico, cronograma_id, owner_id = row
+    if owner_id != user_id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=forbidden_detail)
+    return db_topico, cronograma_id
+
+def _owned_materia_ids(user_id: int):
+    """ Subconsulta com os IDs das matérias que pertencem ao usuário. """
+    return select(models.MateriaCronograma.id).join(
+        models.Cronograma, models.MateriaCronograma.cronograma_id == models.Cronograma.id
+    ).where(models.Cronograma.owner_id == user_id)
+
+def delete_materia_from_cronograma(db: Session, materia_id: int, user_id: int):
+    db_materia = get_owned_materia(db, materia_id, user_id, "Você não tem permissão para deletar esta matéria.")
+    # Apaga os tópicos e a matéria direto no banco, sem carregar os tópicos para a sessão
+    db.query(models.TopicoCronograma).filter(models.TopicoCronograma.materia_id == materia_id).delete(synchronize_session=False)
+    db.query(models.MateriaCronograma).filter(models.MateriaCronograma.id == materia_id).delete(synchronize_session=False)
+    cronograma_changed(db, db_materia.cronograma_id)
     db.commit()
     return {"detail": "Matéria deletada com sucesso."}
 
 def delete_topico_from_materia(db: Session, topico_id: int, user_id: int):
-    db_topico = db.query(models.TopicoCronograma).filter(models.TopicoCronograma.id == topico_id).first()
-    if not db_topico:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tópico não encontrada.")
-    if db_topico.materia.cronograma.owner_id != user_id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Você não tem permissão para deletar este tópico.")
+    db_topico, cronograma_id = get_owned_topico(db, topico_id, user_id, "Você não tem permissão para deletar este tópico.")
     db.delete(db_topico)
+    cronograma_changed(db, cronograma_id, materia_ids={db_topico.materia_id})
     db.commit()
     return {"detail": "Tópico deletado com sucesso."}
 
+def update_topicos(db: Session, updates: list[schemas.TopicoCronogramaUpdate], user_id: int):
+    """
+    Atualiza nome e/ou 'concluido' de vários tópicos em um único UPDATE.
+    A verificação de dono vai no próprio WHERE (JOIN com matérias/cronogramas),
+    então tópicos de outros usuários simplesmente não são alterados.
+    Retorna (tópicos atualizados, IDs não encontrados).
+    """
+    ids = {u.id for u in updates}
+    nomes = {u.id: u.nome for u in updates if u.nome is not None}
+    concluidos = {u.id: u.concluido for u in updates if u.concluido is not None}
+
+    values = {}
+    if nomes:
+        values[models.TopicoCronograma.nome] = case(nomes, value=models.TopicoCronograma.id, else_=models.TopicoCronograma.nome)
+    if concluidos:
+        values[models.TopicoCronograma.concluido] = case(concluidos, value=models.TopicoCronograma.id, else_=models.TopicoCronograma.concluido)
+
+    owned = and_(models.TopicoCronograma.id.in_(ids), models.TopicoCronograma.materia_id.in_(_owned_materia_ids(user_id)))
+    if values:
+        db.execute(update(models.TopicoCronograma).where(owned).values(values).execution_options(synchronize_session=False))
+
+    rows = db.query(models.TopicoCronograma, models.MateriaCronograma.cronograma_id).join(
+        models.MateriaCronograma, models.TopicoCronograma.materia_id == models.MateriaCronograma.id
+    ).filter(owned).all()
+    if values:
+        for cronograma_id in {cronograma_id for _, cronograma_id in rows}:
+            cronograma_changed(db, cronograma_id, materia_ids={
+                topico.materia_id for topico, topico_cronograma_id in rows if topico_cronograma_id == cronograma_id
+            })
+    # Serializa antes do commit: depois dele os objetos expiram e cada um voltaria ao banco
+    updated = [schemas.TopicoCronograma.model_validate(topico) for topico, _ in rows]
+    db.commit()
+
+    found = {topico.id for topico in updated}
+    return updated, sorted(ids - found)
+
 # --- NOVO: Funções de Lógica do Cronograma ---
 
 def generate_weekly_schedule(db: Session, cronograma_id: int):
@@ -156,7 +467,10 @@ def generate_weekly_schedule(db: Session, cronograma_id: int):
     db_cronograma = db.query(models.Cronograma).options(
         joinedload(models.Cronograma.materias).joinedload(models.MateriaCronograma.topicos)
     ).filter(models.Cronograma.id == cronograma_id).first()
-    
+    return build_weekly_schedule(db_cronograma)
+
+def build_weekly_schedule(db_cronograma: models.Cronograma | None):
+    """ A distribuição em si, a partir do cronograma já carregado com matérias e tópicos. """
     if not db_cronograma or not db_cronograma.materias:
         return {"detalhe": "Nenhuma matéria encontrada neste cronograma. Adicione matérias e tópicos primeiro."}
 
@@ -194,4 +508,68 @@ def generate_weekly_schedule(db: Session, cronograma_id: int):
         
         topico_idx += 1 
         
-    return plano_semanal
\ No newline at end of file
+    return plano_semanal
+
+# --- CRUD para Simulados ---
+
+def create_simulado(db: Session, owner_id: int, cotas: dict[str, int], source: str | None = None,
+                    year: int | None = None, exclude: list[int] | None = None) -> models.Simulado:
+    """
+    Monta um simulado estratificado: 'cotas[subject]' questões sorteadas de cada matéria.
+    O sorteio usa os pools de IDs em memória (question_pool) e as questões vêm do cache
+    ou de uma única consulta IN; nenhum ORDER BY random(). Matérias com menos questões
+    que a cota entram com o que houver (veja 'cotas' no resultado).
+    """
+    excluded = set(exclude or [])
+    sampled = {
+        subject: question_pool.sample_ids(db, subject=subject, count=count, source=source, year=year, exclude=excluded)
+        for subject, count in cotas.items()
+    }
+    ids = [question_id for subject_ids in sampled.values() for question_id in subject_ids]
+    found = get_questions_by_ids(db, ids)
+
+    db_simulado = models.Simulado(
+        owner_id=owner_id,
+        filtros={"source": source, "year": year},
+        cotas={subject: {"pedidas": cotas[subject], "obtidas": len(sampled[subject])} for subject in cotas},
+        questoes=[found[question_id]._asdict() for question_id in ids if question_id in found],
+    )
+    db.add(db_simulado)
+    db.commit()
+    db.refresh(db_simulado)
+    return db_simulado
+
+def get_simulado(db: Session, simulado_id: int, owner_id: int) -> models.Simulado:
+    """ Busca um simulado do usuário (404 se não existe ou é de outro usuário). """
+    db_simulado = db.query(models.Simulado).filter(
+        models.Simulado.id == simulado_id, models.Simulado.owner_id == owner_id
+    ).first()
+    if db_simulado is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Simulado não encontrado.")
+    return db_simulado
+
+def grade_simulado(db: Session, db_simulado: models.Simulado, answers: list[schemas.AnswerCheckRequest]) -> dict:
+    """
+    Corrige as respostas usando o gabarito guardado no próprio simulado (sem consultar as questões).
+    Guarda as respostas e a nota; corrigir de novo substitui a correção anterior.
+    """
+    gabarito = {q["id"]: q["correct_answer"] for q in db_simulado.questoes}
+    results = []
+    respostas = {}
+    score = 0
+    for answer in answers:
+        correct_answer = gabarito.get(answer.question_id)
+        if correct_answer is None:
+            results.append({"question_id": answer.question_id, "error": "Questão não faz parte do simulado."})
+            continue
+        is_correct = (correct_answer == answer.user_answer)
+        score += is_correct
+        respostas[str(answer.question_id)] = answer.user_answer
+        results.append({"question_id": answer.question_id, "is_correct": is_correct, "correct_answer": correct_answer})
+
+    db_simulado.respostas = respostas
+    db_simulado.acertos = score
+    db_simulado.corrigido_em = datetime.now(timezone.utc)
+    db.commit()
+    return {"results": results, "score": score, "total": len(gabarito)}
+
@@ -0,0 +1,97 @@
+# crud_async.py
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+import models, schemas
+import question_pool, question_cache
+import crud
+
+# --- Versões assíncronas das funções de leitura mais usadas do crud.py ---
+# Para os endpoints 'async def' (questões, verificação, cronograma): a consulta é
+# aguardada no event loop em vez de prender uma thread do threadpool.
+# Usam os mesmos caches em memória (question_pool, question_cache) que o crud.py.
+# Funções mais complexas e só de leitura (ex: crud.list_questions) podem ser
+# reaproveitadas com 'await db.run_sync(...)'.
+
+# --- Usuários ---
+
+async def get_user(db: AsyncSession, user_id: int) -> models.User | None:
+    return await db.get(models.User, user_id)
+
+async def get_user_by_email(db: AsyncSession, email: str) -> models.User | None:
+    return await db.scalar(select(models.User).where(models.User.email == email))
+
+async def create_user(db: AsyncSession, user: schemas.UserCreate, hashed_password: str) -> models.User:
+    db_user = models.User(email=user.email, hashed_password=hashed_password)
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
+
+async def update_user_password_hash(db: AsyncSession, db_user: models.User, hashed_password: str) -> models.User:
+    db_user.hashed_password = hashed_password
+    await db.commit()
+    return db_user
+
+# --- Questões ---
+
+async def get_questions_by_subject(db: AsyncSession, subject: str, count: int, source: str | None = None,
+                                   year: int | None = None) -> list[question_cache.CachedQuestion]:
+    """ Igual a crud.get_questions_by_subject: sorteio no pool de IDs e uma consulta IN (...). """
+    ids = await question_pool.sample_ids_async(db, subject=subject, count=count, source=source, year=year)
+    found = await get_questions_by_ids(db, ids)
+    return [found[question_id] for question_id in ids if question_id in found]
+
+async def get_question_by_id(db: AsyncSession, question_id: int) -> question_cache.CachedQuestion | None:
+    cached = question_cache.get(question_id)
+    if cached is not None:
+        return cached
+    db_question = await db.get(models.Question, question_id)
+    if db_question is None:
+        return None
+    return question_cache.put(db_question)
+
+async def get_questions_by_ids(db: AsyncSession, question_ids: list[int]) -> dict[int, question_cache.CachedQuestion]:
+    """ Cache primeiro; o que faltar vem numa única consulta IN (...). """
+    found = {}
+    missing = set()
+    for question_id in question_ids:
+        cached = question_cache.get(question_id)
+        if cached is not None:
+            found[question_id] = cached
+        else:
+            missing.add(question_id)
+
+    if missing:
+        for db_question in await db.scalars(select(models.Question).where(models.Question.id.in_(missing))):
+            found[db_question.id] = question_cache.put(db_question)
+    return found
+
+# --- Cronogramas ---
+
+async def get_cronograma_by_owner_id(db: AsyncSession, owner_id: int) -> models.Cronograma | None:
+    return await db.scalar(select(models.Cronograma).where(models.Cronograma.owner_id == owner_id).limit(1))
+
+async def get_cronograma_version(db: AsyncSession, owner_id: int) -> tuple[int, int] | None:
+    row = (await db.execute(
+        select(models.Cronograma.id, models.Cronograma.versao).where(models.Cronograma.owner_id == owner_id).limit(1)
+    )).first()
+    return tuple(row) if row else None
+
+async def get_cronograma_tree(db: AsyncSession, cronograma_id: int) -> models.Cronograma | None:
+    """ Cronograma com matérias e tópicos em uma única consulta (nada de lazy load depois). """
+    result = await db.scalars(select(models.Cronograma).options(
+        joinedload(models.Cronograma.materias).joinedload(models.MateriaCronograma.topicos)
+    ).where(models.Cronograma.id == cronograma_id))
+    return result.unique().first()
+
+async def create_user_cronograma(db: AsyncSession, cronograma: schemas.CronogramaCreate, owner_id: int) -> models.Cronograma:
+    db_cronograma = models.Cronograma(**cronograma.model_dump(), owner_id=owner_id)
+    db.add(db_cronograma)
+    await db.commit()
+    await db.refresh(db_cronograma)
+    return db_cronograma
+
+async def generate_weekly_schedule(db: AsyncSession, cronograma_id: int):
+    return crud.build_weekly_schedule(await get_cronograma_tree(db, cronograma_id))
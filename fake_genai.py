@@ -0,0 +1,135 @@
+# fake_genai.py
+
+import asyncio
+import json
+import os
+import random
+import time
+
+# --- Modelo falso (stand-in do Gemini) ---
+# Imita a parte do SDK google-genai que o ai_service usa
+# (client.models / client.aio.models), sem rede e sem chave de API.
+# Serve para testes, benchmarks e para rodar a API localmente com GEMINI_FAKE=1.
+# Permite injetar latência e falhas.
+
+FAKE_HINT = "Pense no que o enunciado pede antes de olhar as alternativas."
+
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+def _fake_text(contents, config) -> str:
+    """ Responde JSON quando o pedido é em JSON mode (plano de estudos) e texto comum para dicas. """
+    config = config or {}
+    if config.get("response_mime_type") == "application/json":
+        return json.dumps({
+            "nome_plano": "Plano de Estudos (modelo falso)",
+            "materias": [
+                {"nome": f"Matéria {i}", "topicos": [f"Tópico {i}.{j}" for j in range(1, 4)]}
+                for i in range(1, 4)
+            ],
+        }, ensure_ascii=False)
+    return FAKE_HINT
+
+
+class FakeGenaiClient:
+    """
+    Cliente falso. 'latency' é o tempo (segundos) de cada chamada, 'failure_rate'
+    a probabilidade de uma chamada levantar erro. 'fail_next(n)' força as próximas n falhas.
+    """
+
+    def __init__(self, latency: float = 0.0, failure_rate: float = 0.0, seed: int | None = None):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._forced_failures = 0
+        self._random = random.Random(seed)
+        self.models = _FakeModels(self)
+        self.aio = _FakeAio(self)
+
+    @classmethod
+    def from_env(cls) -> "FakeGenaiClient":
+        return cls(
+            latency=float(os.environ.get("GEMINI_FAKE_LATENCY_MS", 0)) / 1000,
+            failure_rate=float(os.environ.get("GEMINI_FAKE_FAILURE_RATE", 0)),
+        )
+
+    def fail_next(self, count: int = 1):
+        self._forced_failures += count
+
+    def _should_fail(self) -> bool:
+        self.calls += 1
+        if self._forced_failures > 0:
+            self._forced_failures -= 1
+            return True
+        return self._random.random() < self.failure_rate
+
+    def _enter(self):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def _exit(self):
+        self.in_flight -= 1
+
+
+class _FakeModels:
+    def __init__(self, owner: FakeGenaiClient):
+        self._owner = owner
+
+    def generate_content(self, *, model: str, contents, config=None):
+        owner = self._owner
+        owner._enter()
+        try:
+            time.sleep(owner.latency)
+            if owner._should_fail():
+                raise RuntimeError("Falha injetada no modelo falso")
+            return FakeResponse(_fake_text(contents, config))
+        finally:
+            owner._exit()
+
+
+class _FakeAsyncModels:
+    def __init__(self, owner: FakeGenaiClient):
+        self._owner = owner
+
+    async def generate_content(self, *, model: str, contents, config=None):
+        owner = self._owner
+        owner._enter()
+        try:
+            await asyncio.sleep(owner.latency)
+            if owner._should_fail():
+                raise RuntimeError("Falha injetada no modelo falso")
+            return FakeResponse(_fake_text(contents, config))
+        finally:
+            owner._exit()
+
+
+    async def generate_content_stream(self, *, model: str, contents, config=None):
+        """ Como no SDK: a chamada é aguardada e devolve um iterador assíncrono de pedaços. """
+        owner = self._owner
+        text = _fake_text(contents, config)
+        words = text.split(" ")
+        chunks = [word + (" " if i < len(words) - 1 else "") for i, word in enumerate(words)]
+
+        async def stream():
+            owner._enter()
+            try:
+                if owner._should_fail():
+                    raise RuntimeError("Falha injetada no modelo falso")
+                for chunk in chunks:
+                    # A latência total é dividida entre os pedaços
+                    await asyncio.sleep(owner.latency / len(chunks))
+                    yield FakeResponse(chunk)
+            finally:
+                owner._exit()
+
+        return stream()
+
+
+class _FakeAio:
+    def __init__(self, owner: FakeGenaiClient):
+        self.models = _FakeAsyncModels(owner)
@@ -0,0 +1,269 @@
+# hint_cache.py
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from cachetools import LRUCache
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+import ai_service, models
+from database import SessionLocal
+
+# --- Cache de dicas da IA ---
+# Ordem de busca: LRU em memória -> tabela question_hints -> Gemini.
+# Requisições simultâneas para a mesma questão sem dica compartilham uma
+# única geração em andamento (single-flight), em vez de cada uma chamar o modelo.
+
+HINT_CACHE_SIZE = int(os.environ.get("HINT_CACHE_SIZE", 10000))
+
+# (question_id, prompt_version) -> (content_hash, dica)
+_memory: LRUCache = LRUCache(maxsize=HINT_CACHE_SIZE)
+_memory_lock = threading.Lock()
+# (question_id, prompt_version) -> asyncio.Task da geração em andamento
+_in_flight: dict[tuple, asyncio.Task] = {}
+
+_stats = {
+    "memory_hits": 0,
+    "db_hits": 0,
+    "shared_in_flight": 0, # Requisições que aproveitaram uma geração em andamento
+    "generated": 0,
+    "fallbacks": 0,
+    "generation_seconds": 0.0,
+    "latency_saved_seconds": 0.0,
+}
+
+
+def question_digest(question) -> str:
+    """ Hash do conteúdo que entra no prompt. Se a questão mudar, a dica guardada deixa de valer. """
+    payload = json.dumps([question.text, question.options, question.correct_answer], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def options_as_dict(options) -> dict:
+    """ O prompt espera um dicionário; se for lista, converte para {"0": "Opção A", "1": "Opção B"} """
+    if isinstance(options, list):
+        return {str(i): opt for i, opt in enumerate(options)}
+    return options
+
+
+def _average_generation_seconds() -> float:
+    if not _stats["generated"]:
+        return 0.0
+    return _stats["generation_seconds"] / _stats["generated"]
+
+
+def _count_hit(kind: str):
+    _stats[kind] += 1
+    _stats["latency_saved_seconds"] += _average_generation_seconds()
+
+
+def remember(question_id: int, prompt_version: str, content_hash: str, hint: str):
+    with _memory_lock:
+        _memory[(question_id, prompt_version)] = (content_hash, hint)
+
+
+def _from_memory(key: tuple, content_hash: str) -> str | None:
+    with _memory_lock:
+        entry = _memory.get(key)
+    if entry and entry[0] == content_hash:
+        return entry[1]
+    return None
+
+
+# --- Acesso ao banco (síncrono; roda no threadpool) ---
+
+def load_hint(db: Session, question_id: int, prompt_version: str, content_hash: str) -> str | None:
+    row = db.query(models.QuestionHint).filter(
+        models.QuestionHint.question_id == question_id,
+        models.QuestionHint.prompt_version == prompt_version,
+    ).first()
+    if row and row.content_hash == content_hash:
+        return row.hint
+    return None
+
+
+def save_hints(db: Session, hints: list[tuple[int, str, str, str]]):
+    """
+    Grava (ou atualiza) várias dicas numa transação só.
+    Cada item é (question_id, prompt_version, content_hash, dica).
+    """
+    if not hints:
+        return
+    keys = {(question_id, version) for question_id, version, _, _ in hints}
+    existing = {
+        (row.question_id, row.prompt_version): row
+        for row in db.query(models.QuestionHint).filter(
+            models.QuestionHint.question_id.in_({question_id for question_id, _ in keys})
+        )
+        if (row.question_id, row.prompt_version) in keys
+    }
+    for question_id, version, content_hash, hint in hints:
+        row = existing.get((question_id, version))
+        if row is None:
+            row = models.QuestionHint(question_id=question_id, prompt_version=version)
+            db.add(row)
+            existing[(question_id, version)] = row
+        row.content_hash = content_hash
+        row.hint = hint
+    db.commit()
+
+
+def _load_hint_in_thread(question_id: int, prompt_version: str, content_hash: str) -> str | None:
+    with SessionLocal() as db:
+        return load_hint(db, question_id, prompt_version, content_hash)
+
+
+def _save_hint_in_thread(question_id: int, prompt_version: str, content_hash: str, hint: str):
+    with SessionLocal() as db:
+        try:
+            save_hints(db, [(question_id, prompt_version, content_hash, hint)])
+        except IntegrityError:
+            # Outro processo gravou a mesma dica ao mesmo tempo; a dele serve.
+            db.rollback()
+
+
+# --- Busca com single-flight ---
+
+async def _resolve(question, key: tuple, content_hash: str) -> str:
+    question_id, prompt_version = key
+
+    hint = await run_in_threadpool(_load_hint_in_thread, question_id, prompt_version, content_hash)
+    if hint is not None:
+        _count_hit("db_hits")
+        remember(question_id, prompt_version, content_hash, hint)
+        return hint
+
+    start = time.perf_counter()
+    hint = await ai_service.generate_question_hint(
+        question_text=question.text,
+        options=options_as_dict(question.options),
+        correct_option=question.correct_answer,
+    )
+    if hint == ai_service.FALLBACK_HINT:
+        # Dica padrão (modelo falhou/atrasou): não guarda, para tentar de novo depois.
+        _stats["fallbacks"] += 1
+        return hint
+
+    _stats["generated"] += 1
+    _stats["generation_seconds"] += time.perf_counter() - start
+    await run_in_threadpool(_save_hint_in_thread, question_id, prompt_version, content_hash, hint)
+    remember(question_id, prompt_version, content_hash, hint)
+    return hint
+
+
+def _start(question, key: tuple, content_hash: str) -> asyncio.Task:
+    task = asyncio.create_task(_resolve(question, key, content_hash))
+    _in_flight[key] = task
+    task.add_done_callback(lambda _: _in_flight.pop(key, None))
+    return task
+
+
+async def get_hint(question) -> str:
+    """
+    Devolve a dica da questão (models.Question ou question_cache.CachedQuestion),
+    gerando com a IA só quando ela ainda não existe para a versão atual do prompt.
+    """
+    key = (question.id, ai_service.HINT_PROMPT_VERSION)
+    content_hash = question_digest(question)
+
+    hint = _from_memory(key, content_hash)
+    if hint is not None:
+        _count_hit("memory_hits")
+        return hint
+
+    while True:
+        task = _in_flight.get(key)
+        if task is None:
+            task = _start(question, key, content_hash)
+        else:
+            _count_hit("shared_in_flight")
+        # 'shield': se este cliente desistir, a geração continua para os outros que esperam por ela
+        hint = await asyncio.shield(task)
+        if hint is not None:
+            return hint
+        # A geração compartilhada era um stream abandonado pelo cliente: gera de novo
+
+
+async def stream_hint(question):
+    """
+    Versão em streaming de get_hint: devolve a dica em pedaços conforme o modelo gera.
+    Dicas já guardadas (ou em geração por outra requisição) saem de uma vez só.
+    Enquanto o stream roda, quem pedir a mesma dica espera por ele em vez de chamar o modelo.
+    Se o cliente desconectar no meio, o stream do modelo é fechado e nada é guardado.
+    """
+    key = (question.id, ai_service.HINT_PROMPT_VERSION)
+    content_hash = question_digest(question)
+
+    hint = _from_memory(key, content_hash)
+    if hint is not None:
+        _count_hit("memory_hits")
+        yield hint
+        return
+
+    task = _in_flight.get(key)
+    if task is not None:
+        hint = await asyncio.shield(task)
+        if hint is not None:
+            _count_hit("shared_in_flight")
+            yield hint
+            return
+
+    hint = await run_in_threadpool(_load_hint_in_thread, key[0], key[1], content_hash)
+    if hint is not None:
+        _count_hit("db_hits")
+        remember(key[0], key[1], content_hash, hint)
+        yield hint
+        return
+
+    future = asyncio.get_running_loop().create_future()
+    _in_flight.setdefault(key, future)
+    parts = []
+    hint = None
+    start = time.perf_counter()
+    stream = ai_service.stream_question_hint(
+        question_text=question.text,
+        options=options_as_dict(question.options),
+        correct_option=question.correct_answer,
+    )
+    try:
+        try:
+            async for piece in stream:
+                parts.append(piece)
+                yield piece
+        except Exception as e:
+            print(f"Erro na IA (Dica em streaming): {e!r}")
+            _stats["fallbacks"] += 1
+            if not parts:
+                yield ai_service.FALLBACK_HINT
+            return
+
+        hint = "".join(parts).strip()
+        _stats["generated"] += 1
+        _stats["generation_seconds"] += time.perf_counter() - start
+        remember(key[0], key[1], content_hash, hint)
+        # 'shield': a dica já foi toda enviada; grava mesmo se o cliente sair agora
+        await asyncio.shield(run_in_threadpool(_save_hint_in_thread, key[0], key[1], content_hash, hint))
+    finally:
+        await stream.aclose()
+        if _in_flight.get(key) is future:
+            del _in_flight[key]
+        if not future.done():
+            # None = sem dica (falha ou cliente desconectou); quem esperava gera de novo
+            future.set_result(hint)
+
+
+def stats() -> dict:
+    """ Taxa de acerto e latência economizada (estimada pela média das gerações). """
+    hits = _stats["memory_hits"] + _stats["db_hits"] + _stats["shared_in_flight"]
+    requests = hits + _stats["generated"] + _stats["fallbacks"]
+    return {
+        **_stats,
+        "hit_rate": (hits / requests) if requests else 0.0,
+        "avg_generation_seconds": _average_generation_seconds(),
+        "memory_size": len(_memory),
+        "in_flight": len(_in_flight),
+    }
@@ -1,27 +1,44 @@
 # main.py
 
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Request, Response, status
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse, PlainTextResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List 
-from datetime import timedelta
-import ai_service
+from contextlib import asynccontextmanager
+from datetime import date, timedelta
+from pydantic import ValidationError
+import json
+import orjson
+import catalog, hint_cache, metrics, plan_jobs, profiling, question_cache, question_search, study_plan
 
 # Importa todos os nossos módulos
-import crud, models, schemas, database, security 
-from database import engine, get_db
+import crud, crud_async, models, schemas, database, security, passwords, pagination, migrate
+from database import get_db, get_async_db
 
-# Cria todas as tabelas (incluindo as novas do cronograma)
-models.Base.metadata.create_all(bind=engine)
+
+# Cria/atualiza as tabelas na subida do servidor, não na importação do módulo (ver migrate.py)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if migrate.MIGRATE_ON_STARTUP:
+        await run_in_threadpool(migrate.migrate)
+    yield
 
 # Configuração do App e CORS
-app = FastAPI()
+# Respostas serializadas com orjson (bem mais rápido que o json da biblioteca padrão)
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 origins = [
     "http://localhost:5173",
     "https://projeto-se-shat.vercel.app" # Substitua pela URL do Vercel
 ]
 app.add_middleware(CORSMiddleware, allow_origins=origins, allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
+# Profiling sob demanda (cabeçalho X-Profile); fica por dentro do de métricas, que coleta o SQL
+app.add_middleware(profiling.ProfilingMiddleware)
+# Por último, para ficar por fora de todos os outros e medir a requisição inteira
+app.add_middleware(metrics.MetricsMiddleware)
 
 
 # --- Endpoints Públicos (Autenticação, Matérias, Questões) ---
@@ -35,53 +52,188 @@ def get_materias():
     subjects = ['Matemática', 'Português', 'História', 'Redação', 'Física','Linguagens', 'Química', 'Biologia', 'Geografia', 'Inglês']
     return {"materias_disponiveis": subjects}
 
+@app.get("/catalogo", response_model=schemas.Catalogo)
+def get_catalogo(db: Session = Depends(get_db)):
+    """
+    Quantas questões existem por matéria, fonte e ano, e cada combinação (subject, source, year)
+    que tem questões. Use para montar os filtros sem cair em combinações vazias.
+    """
+    return catalog.get_catalog(db)
+
+# /register e /login são 'async': o bcrypt roda no pool dedicado (passwords.py)
+# e o acesso ao banco vai para o threadpool, sem segurar uma thread durante o hash.
 @app.post("/register", response_model=schemas.User, status_code=status.HTTP_201_CREATED)
-def register_user(user_data: schemas.UserCreate, db: Session = Depends(get_db)):
-    db_user = crud.get_user_by_email(db, email=user_data.email)
+async def register_user(user_data: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
+    db_user = await crud_async.get_user_by_email(db, email=user_data.email)
     if db_user: raise HTTPException(status_code=400, detail="Este email já está registrado.")
-    new_user = crud.create_user(db=db, user=user_data)
+    hashed_password = await passwords.hash_password_async(user_data.password)
+    new_user = await crud_async.create_user(db, user=user_data, hashed_password=hashed_password)
     return new_user
 
 @app.post("/login", response_model=schemas.Token)
-def login_user(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    db_user = crud.get_user_by_email(db, email=form_data.username)
-    if not db_user or not crud.verify_password(form_data.password, db_user.hashed_password):
+async def login_user(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
+    db_user = await crud_async.get_user_by_email(db, email=form_data.username)
+    if db_user:
+        password_ok, new_hash = await passwords.verify_and_update_async(form_data.password, db_user.hashed_password)
+    if not db_user or not password_ok:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Email ou senha incorretos.", headers={"WWW-Authenticate": "Bearer"})
+    # O custo do bcrypt mudou desde que a senha foi salva: guarda o hash novo
+    if new_hash:
+        await crud_async.update_user_password_hash(db, db_user, new_hash)
     
-    access_token = security.create_access_token(data={"sub": db_user.email})
+    access_token = security.create_access_token(data={"sub": db_user.email, "uid": db_user.id})
     return {"access_token": access_token, "token_type": "bearer"}
 
 @app.post("/perguntas", response_model=schemas.Question, status_code=status.HTTP_201_CREATED)
 def post_new_question(question: schemas.QuestionCreate, db: Session = Depends(get_db)):
     return crud.create_question(db=db, question=question)
 
+# Máximo de questões aceitas em uma única requisição de /perguntas/lote
+QUESTION_BATCH_MAX_ITEMS = 5000
+
+def _import_questions_batch(body: bytes, content_type: str, db: Session) -> dict:
+    """ Parse, validação e insert de /perguntas/lote. Roda no threadpool: com 5000 itens, fora do event loop. """
+    try:
+        if content_type.startswith(("application/x-ndjson", "application/jsonl")):
+            records = [json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            records = json.loads(body)
+    except json.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Corpo da requisição não é JSON/NDJSON válido: {e}")
+    if not isinstance(records, list):
+        raise HTTPException(status_code=400, detail="Envie uma lista de questões.")
+    if len(records) > QUESTION_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail=f"Envie no máximo {QUESTION_BATCH_MAX_ITEMS} questões por lote.")
+
+    items = []
+    valid = []
+    for index, record in enumerate(records):
+        try:
+            valid.append((index, schemas.QuestionCreate.model_validate(record)))
+        except ValidationError as e:
+            detail = "; ".join(f"{'.'.join(map(str, err['loc'])) or 'item'}: {err['msg']}" for err in e.errors())
+            items.append({"index": index, "status": "invalida", "detail": detail})
+
+    ids = crud.create_questions(db, [question for _, question in valid])
+    for (index, _), question_id in zip(valid, ids):
+        if question_id is None:
+            items.append({"index": index, "status": "duplicada", "detail": "Já existe uma questão com este texto."})
+        else:
+            items.append({"index": index, "status": "criada", "id": question_id})
+    items.sort(key=lambda item: item["index"])
+
+    created = sum(1 for question_id in ids if question_id is not None)
+    return {
+        "created": created,
+        "duplicates": len(valid) - created,
+        "invalid": len(records) - len(valid),
+        "items": items,
+    }
+
+@app.post("/perguntas/lote", response_model=schemas.QuestionBatchResponse)
+async def post_new_questions_batch(request: Request, db: Session = Depends(get_db)):
+    """
+    Cadastra várias questões de uma vez, numa única transação.
+    Aceita um array JSON ou NDJSON (uma questão por linha, Content-Type: application/x-ndjson).
+    Cada item volta com seu próprio status, sem derrubar o lote inteiro.
+    """
+    # Só a leitura do corpo fica no event loop
+    body = await request.body()
+    return await run_in_threadpool(_import_questions_batch, body, request.headers.get("content-type", ""), db)
+
+# Máximo de questões por página em GET /perguntas
+MAX_PAGE_SIZE = 500
+
+@app.get("/perguntas", response_model=schemas.QuestionPage, response_model_exclude_unset=True)
+async def list_questions(
+    fields: str | None = None,
+    subject: str | None = None,
+    source: str | None = None,
+    year: int | None = None,
+    limit: int = 50,
+    cursor: str | None = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Lista o banco de questões em ordem de matéria, ano e ID, página por página.
+    'fields' escolhe as colunas (ex: fields=id,subject,year para não trazer enunciado e alternativas).
+    Para a próxima página, envie o 'next_cursor' recebido em 'cursor'.
+    """
+    selected = [f.strip() for f in fields.split(",") if f.strip()] if fields else list(crud.QUESTION_LIST_FIELDS)
+    unknown = [f for f in selected if f not in crud.QUESTION_LIST_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Campos desconhecidos: {', '.join(unknown)}. "
+                                                    f"Use: {', '.join(crud.QUESTION_LIST_FIELDS)}.")
+    if "id" not in selected:
+        selected.insert(0, "id")
+    try:
+        after = pagination.decode_cursor(cursor, str, int, int) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    items, last = await db.run_sync(
+        lambda session: crud.list_questions(session, fields=selected, limit=min(max(limit, 1), MAX_PAGE_SIZE),
+                                            after=after, subject=subject, source=source, year=year)
+    )
+    return {"items": items, "next_cursor": pagination.encode_cursor(*last) if last else None}
+
+# Precisa vir antes de /perguntas/{subject}, senão "busca" seria lido como matéria
+@app.get("/perguntas/busca", response_model=schemas.QuestionSearchResponse)
+async def search_questions(
+    q: str,
+    subject: str | None = None,
+    source: str | None = None,
+    year: int | None = None,
+    limit: int = 20,
+    cursor: str | None = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Busca textual (sem diferenciar acentos) no enunciado e nas alternativas, da questão
+    mais relevante para a menos. Para a próxima página, envie o 'next_cursor' recebido em 'cursor'.
+    """
+    try:
+        ids, next_cursor = await db.run_sync(
+            lambda session: question_search.search_ids(session, q, subject=subject, source=source, year=year,
+                                                       limit=limit, cursor=cursor)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    found = await crud_async.get_questions_by_ids(db, ids)
+    # JSON montado com os bytes já serializados de cada questão (question_cache.payload)
+    items = question_cache.payload_list([found[i] for i in ids if i in found])
+    return Response(content=b'{"items":' + items + b',"next_cursor":' + orjson.dumps(next_cursor) + b"}",
+                    media_type="application/json")
+
 @app.get("/perguntas/{subject}", response_model=List[schemas.Question])
-def read_questions_by_subject(
+async def read_questions_by_subject(
     subject: str, 
     count: int = 10, 
     source: str | None = None,
     year: int | None = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    questions = crud.get_questions_by_subject(db=db, subject=subject, count=count, source=source, year=year)
+    questions = await crud_async.get_questions_by_subject(db=db, subject=subject, count=count, source=source, year=year)
     if not questions:
          raise HTTPException(status_code=404, detail=f"Nenhuma pergunta encontrada para os filtros.")
-    return questions
+    # Sem passar pelo schemas.Question: as questões já têm o JSON pronto no cache
+    return Response(content=question_cache.payload_list(questions), media_type="application/json")
 
 
 # --- Endpoint para Verificar Resposta ---
 
 @app.post("/perguntas/verificar", response_model=schemas.AnswerCheckResponse)
-def check_question_answer(
+async def check_question_answer(
     answer_data: schemas.AnswerCheckRequest, 
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(security.get_current_user) 
+    db: AsyncSession = Depends(get_async_db),
+    current_user: security.Principal = Depends(security.get_current_user_async) 
 ):
     """
     Verifica se a resposta do usuário para uma questão está correta.
     Requer autenticação.
     """
-    question = crud.get_question_by_id(db, question_id=answer_data.question_id)
+    question = await crud_async.get_question_by_id(db, question_id=answer_data.question_id)
     if not question:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, 
                             detail="Questão não encontrada.")
@@ -94,9 +246,85 @@ def check_question_answer(
         "question_id": question.id 
     }
 
+# Máximo de respostas por requisição de /perguntas/verificar/lote (o ENEM tem 180 questões)
+ANSWER_BATCH_MAX_ITEMS = 500
+
+@app.post("/perguntas/verificar/lote", response_model=schemas.AnswerCheckBatchResponse)
+async def check_question_answers_batch(
+    answers: List[schemas.AnswerCheckRequest],
+    db: AsyncSession = Depends(get_async_db),
+    current_user: security.Principal = Depends(security.get_current_user_async)
+):
+    """
+    Verifica as respostas de um simulado inteiro em uma só requisição.
+    Questões inexistentes voltam com 'error' sem derrubar o lote.
+    Requer autenticação.
+    """
+    if len(answers) > ANSWER_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail=f"Envie no máximo {ANSWER_BATCH_MAX_ITEMS} respostas por lote.")
+    questions = await crud_async.get_questions_by_ids(db, question_ids=[a.question_id for a in answers])
+
+    results = []
+    score = 0
+    for answer in answers:
+        question = questions.get(answer.question_id)
+        if question is None:
+            results.append({"question_id": answer.question_id, "error": "Questão não encontrada."})
+            continue
+        is_correct = (question.correct_answer == answer.user_answer)
+        score += is_correct
+        results.append({
+            "question_id": question.id,
+            "is_correct": is_correct,
+            "correct_answer": question.correct_answer,
+        })
+
+    return {"results": results, "score": score, "total": len(answers)}
+
+# --- Simulados ---
+
+@app.post("/simulados", response_model=schemas.Simulado, status_code=status.HTTP_201_CREATED)
+def create_simulado(
+    simulado: schemas.SimuladoCreate,
+    db: Session = Depends(get_db),
+    current_user: security.Principal = Depends(security.get_current_user)
+):
+    """
+    Gera um simulado com cotas por matéria (ex: 45 de Matemática e 45 de Ciências da Natureza)
+    e o guarda, para ser recarregado e corrigido depois pelo ID.
+    """
+    if sum(simulado.cotas.values()) > schemas.MAX_SIMULADO_QUESTOES:
+        raise HTTPException(status_code=400,
+                            detail=f"Um simulado pode ter no máximo {schemas.MAX_SIMULADO_QUESTOES} questões.")
+    return crud.create_simulado(db, owner_id=current_user.id, cotas=simulado.cotas, source=simulado.source,
+                                year=simulado.year, exclude=simulado.excluir)
+
+@app.get("/simulados/{simulado_id}", response_model=schemas.Simulado)
+def read_simulado(
+    simulado_id: int,
+    db: Session = Depends(get_db),
+    current_user: security.Principal = Depends(security.get_current_user)
+):
+    """ Recarrega um simulado gerado antes (as mesmas questões, na mesma ordem). """
+    return crud.get_simulado(db, simulado_id=simulado_id, owner_id=current_user.id)
+
+@app.post("/simulados/{simulado_id}/respostas", response_model=schemas.AnswerCheckBatchResponse)
+def grade_simulado(
+    simulado_id: int,
+    answers: List[schemas.AnswerCheckRequest],
+    db: Session = Depends(get_db),
+    current_user: security.Principal = Depends(security.get_current_user)
+):
+    """
+    Corrige o simulado. 'total' é o número de questões do simulado (as não respondidas contam como erro).
+    """
+    db_simulado = crud.get_simulado(db, simulado_id=simulado_id, owner_id=current_user.id)
+    return crud.grade_simulado(db, db_simulado, answers)
+
 # --- Dependência para o Cronograma do Usuário ---
 
-def get_current_user_cronograma(db: Session = Depends(get_db), current_user: models.User = Depends(security.get_current_user)) -> models.Cronograma:
+def get_current_user_cronograma(db: Session = Depends(get_db), current_user: security.Principal = Depends(security.get_current_user)) -> models.Cronograma:
     """
     Dependência que busca o cronograma do usuário logado.
     Se não existir, cria um cronograma padrão para ele.
@@ -109,37 +337,108 @@ def get_current_user_cronograma(db: Session = Depends(get_db), current_user: mod
         
     return cronograma
 
+async def get_current_user_cronograma_async(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: security.Principal = Depends(security.get_current_user_async)
+) -> models.Cronograma:
+    """ Igual a get_current_user_cronograma, para os endpoints 'async def'. """
+    cronograma = await crud_async.get_cronograma_by_owner_id(db, owner_id=current_user.id)
+    if not cronograma:
+        default_cronograma = schemas.CronogramaCreate(nome=f"Cronograma de {current_user.email.split('@')[0]}")
+        cronograma = await crud_async.create_user_cronograma(db, cronograma=default_cronograma, owner_id=current_user.id)
+    return cronograma
+
 
 # --- Endpoints do Cronograma (Protegidos) ---
 
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
 @app.get("/cronograma/me", response_model=schemas.Cronograma)
-def get_my_cronograma(
-    # Esta dependência já faz o trabalho de buscar ou criar o cronograma
-    cronograma: models.Cronograma = Depends(get_current_user_cronograma)
+async def get_my_cronograma(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: security.Principal = Depends(security.get_current_user_async)
 ):
     """
     Busca o cronograma completo (com matérias e tópicos) do usuário logado.
     Cria um cronograma padrão se for o primeiro acesso.
+    Responde com ETag (a versão do cronograma); se o cliente mandar o mesmo ETag
+    em If-None-Match, devolve 304 sem montar a árvore.
     """
+    header = await crud_async.get_cronograma_version(db, owner_id=current_user.id)
+    if header is None:
+        cronograma = await get_current_user_cronograma_async(db=db, current_user=current_user)
+        header = (cronograma.id, cronograma.versao)
+
+    cronograma_id, versao = header
+    etag = f'W/"{cronograma_id}-{versao}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    cronograma = await crud_async.get_cronograma_tree(db, cronograma_id=cronograma_id)
+    # A árvore pode ter mudado entre as duas consultas: o ETag segue o que foi carregado
+    headers["ETag"] = f'W/"{cronograma.id}-{cronograma.versao}"'
+    response.headers.update(headers)
     return cronograma
 
 # --- NOVO: Endpoint para o Cronograma Semanal ---
 
 @app.get("/cronograma/me/semanal")
-def get_my_weekly_schedule(
-    db: Session = Depends(get_db),
+async def get_my_weekly_schedule(
+    db: AsyncSession = Depends(get_async_db),
     # Esta dependência garante que o usuário está logado e que o cronograma existe
-    cronograma: models.Cronograma = Depends(get_current_user_cronograma)
+    cronograma: models.Cronograma = Depends(get_current_user_cronograma_async)
 ):
     """
     Busca o cronograma do usuário e o formata em um plano de estudos
     semanal, distribuindo os tópicos (não concluídos) pelos dias.
     """
     # Chama a nova função de lógica que criamos no crud.py
-    return crud.generate_weekly_schedule(db, cronograma_id=cronograma.id)
+    return await crud_async.generate_weekly_schedule(db, cronograma_id=cronograma.id)
 
 # --- FIM DO NOVO CÓDIGO ---
 
+# --- Plano de Estudos de N semanas (guardado e atualizado a cada mudança) ---
+
+@app.post("/cronograma/me/plano", response_model=schemas.PlanoEstudoResponse)
+def configure_my_study_plan(
+    config: schemas.PlanoEstudoConfig,
+    db: Session = Depends(get_db),
+    cronograma: models.Cronograma = Depends(get_current_user_cronograma)
+):
+    """
+    Cria (ou reconfigura) o plano de estudos: quantas semanas, horas por dia da semana
+    e peso de cada matéria. O plano é gerado uma vez e guardado.
+    """
+    plano = study_plan.configure(
+        db, cronograma_id=cronograma.id, semanas=config.semanas, horas_por_dia=config.horas_por_dia,
+        pesos=config.pesos, data_inicio=config.data_inicio,
+    )
+    plano, sessoes = study_plan.get_sessions(db, owner_id=cronograma.owner_id)
+    return {"plano": plano, "sessoes": sessoes}
+
+@app.get("/cronograma/me/plano", response_model=schemas.PlanoEstudoResponse)
+def get_my_study_plan(
+    inicio: date | None = None,
+    fim: date | None = None,
+    db: Session = Depends(get_db),
+    current_user: security.Principal = Depends(security.get_current_user)
+):
+    """
+    Devolve o plano guardado (opcionalmente só entre 'inicio' e 'fim', no formato AAAA-MM-DD).
+    É uma leitura simples: o plano não é recalculado aqui.
+    """
+    plano, sessoes = study_plan.get_sessions(db, owner_id=current_user.id, inicio=inicio, fim=fim)
+    if plano is None:
+        raise HTTPException(status_code=404, detail="Nenhum plano de estudos criado. Use POST /cronograma/me/plano.")
+    return {"plano": plano, "sessoes": sessoes}
+
 @app.post("/cronograma/materias", response_model=schemas.MateriaCronograma)
 def add_materia_to_my_cronograma(
     materia_data: schemas.MateriaCronogramaCreate,
@@ -158,21 +457,17 @@ def add_topico_to_my_materia(
     materia_id: int,
     topico_data: schemas.TopicoCronogramaCreate,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(security.get_current_user)
+    current_user: security.Principal = Depends(security.get_current_user)
 ):
     """
     Adiciona um novo tópico customizado a uma matéria específica.
     Verifica se o usuário é dono da matéria e se o limite de 3 tópicos foi atingido.
     """
-    db_materia = crud.get_materia_by_id(db, materia_id=materia_id)
+    db_materia, topicos_count = crud.get_owned_materia_with_topicos_count(
+        db, materia_id=materia_id, user_id=current_user.id,
+        forbidden_detail="Você não tem permissão para editar esta matéria.")
     
-    if not db_materia:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Matéria não encontrada.")
-        
-    if db_materia.cronograma.owner_id != current_user.id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Você não tem permissão para editar esta matéria.")
-    
-    return crud.add_topico_to_materia(db, topico=topico_data, materia_id=materia_id)
+    return crud.add_topico_to_materia(db, topico=topico_data, db_materia=db_materia, topicos_count=topicos_count)
 
 # --- NOVOS: Endpoints DELETE para o Cronograma (Protegidos) ---
 
@@ -180,48 +475,156 @@ def add_topico_to_my_materia(
 def delete_materia(
     materia_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(security.get_current_user)
+    current_user: security.Principal = Depends(security.get_current_user)
 ):
     """ Deleta uma matéria (e seus tópicos) do cronograma do usuário logado. """
     return crud.delete_materia_from_cronograma(db, materia_id=materia_id, user_id=current_user.id)
 
+@app.patch("/cronograma/topicos", response_model=schemas.TopicoCronogramaBulkUpdateResponse)
+def update_my_topicos(
+    updates: List[schemas.TopicoCronogramaUpdate],
+    db: Session = Depends(get_db),
+    current_user: security.Principal = Depends(security.get_current_user)
+):
+    """
+    Marca tópicos como concluídos (ou não) e/ou renomeia vários tópicos de uma vez.
+    Tópicos que não existem ou são de outro usuário voltam em 'nao_encontrados'.
+    """
+    atualizados, nao_encontrados = crud.update_topicos(db, updates=updates, user_id=current_user.id)
+    return {"atualizados": atualizados, "nao_encontrados": nao_encontrados}
+
 @app.delete("/cronograma/topicos/{topico_id}")
 def delete_topico(
     topico_id: int,
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(security.get_current_user)
+    current_user: security.Principal = Depends(security.get_current_user)
 ):
     """ Deleta um tópico de uma matéria do cronograma do usuário logado. """
     return crud.delete_topico_from_materia(db, topico_id=topico_id, user_id=current_user.id)
 
+# --- Plano de estudos gerado pela IA (em segundo plano) ---
+
+def _plan_job_response(job: plan_jobs.PlanJob) -> dict:
+    return {"job_id": job.id, "status": job.status, "nome_plano": job.nome_plano, "materias": job.materias, "erro": job.erro}
+
+@app.post("/cronograma/ia", response_model=schemas.AIPlanJob, status_code=status.HTTP_202_ACCEPTED)
+async def request_ai_study_plan(
+    plan_request: schemas.AIPlanRequest,
+    cronograma: models.Cronograma = Depends(get_current_user_cronograma_async)
+):
+    """
+    Pede para a IA montar matérias e tópicos para o cronograma do usuário.
+    A geração roda em segundo plano: a resposta traz o 'job_id' para consultar o status.
+    """
+    job = await plan_jobs.enqueue(owner_id=cronograma.owner_id, cronograma_id=cronograma.id,
+                                  months=plan_request.months, focus=plan_request.focus)
+    return _plan_job_response(job)
+
+@app.get("/cronograma/ia/{job_id}", response_model=schemas.AIPlanJob)
+async def get_ai_study_plan_job(job_id: str, current_user: security.Principal = Depends(security.get_current_user_async)):
+    """
+    Status de um pedido de plano feito em POST /cronograma/ia.
+    É 'async' de propósito: plan_jobs._jobs (TTLCache) só é lido e escrito no event loop.
+    """
+    job = plan_jobs.get_job(job_id, owner_id=current_user.id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Pedido de plano não encontrado.")
+    return _plan_job_response(job)
+
 @app.post("/ia/dica")
-def get_question_hint(
+async def get_question_hint(
     request: schemas.HintRequest,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(security.get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: security.Principal = Depends(security.get_current_user_async)
 ):
     """
-    Gera uma dica para uma questão específica usando IA.
+    Gera uma dica para uma questão específica usando IA (ou devolve a já guardada).
+    É 'async' para não prender uma thread do servidor enquanto o modelo responde.
     """
     # 1. Busca a questão no banco para ter o contexto real
-    question = crud.get_question_by_id(db, question_id=request.question_id)
+    question = await crud_async.get_question_by_id(db, question_id=request.question_id)
+    # Devolve a conexão ao pool: a geração da dica pode levar segundos
+    await db.close()
     
     if not question:
         raise HTTPException(status_code=404, detail="Questão não encontrada.")
     
-    # 2. Chama o serviço de IA
-    # Precisamos garantir que 'options' seja um dicionário para o prompt
-    options_dict = question.options
-    if isinstance(options_dict, list):
-        # Se for lista, converte para dict: {"0": "Opção A", "1": "Opção B"}
-        options_dict = {str(i): opt for i, opt in enumerate(options_dict)}
-
-    hint = ai_service.generate_question_hint(
-        question_text=question.text,
-        options=options_dict,
-        correct_option=question.correct_answer
-    )
+    # 2. Busca a dica guardada ou chama o serviço de IA (uma geração por questão, mesmo com várias requisições juntas)
+    hint = await hint_cache.get_hint(question)
     
     return {"dica": hint}
 
+def _sse(event: str, data: dict) -> str:
+    """ Formata um evento Server-Sent Events (o JSON fica numa linha só). """
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.get("/ia/dica/{question_id}/stream")
+async def stream_question_hint(
+    question_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: security.Principal = Depends(security.get_current_user_async)
+):
+    """
+    Igual a POST /ia/dica, mas envia a dica por Server-Sent Events conforme a IA escreve.
+    Eventos: 'dica' (um pedaço do texto, em 'texto') e 'fim' (a dica inteira, em 'dica').
+    Se o cliente fechar a conexão, a geração no modelo é cancelada.
+    """
+    question = await crud_async.get_question_by_id(db, question_id=question_id)
+    # Devolve a conexão ao pool antes de começar o stream
+    await db.close()
+    if not question:
+        raise HTTPException(status_code=404, detail="Questão não encontrada.")
+
+    async def events():
+        parts = []
+        async for piece in hint_cache.stream_hint(question):
+            parts.append(piece)
+            yield _sse("dica", {"texto": piece})
+        yield _sse("fim", {"dica": "".join(parts).strip()})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/ia/metricas")
+def get_ai_cache_metrics():
+    """ Taxa de acerto dos caches de dicas e de questões, e latência economizada. """
+    return {"dicas": hint_cache.stats(), "questoes": question_cache.stats()}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """ Métricas da API (latência por rota, consultas ao banco, IA e caches) no formato do Prometheus. """
+    return PlainTextResponse(metrics.render({
+        "seshat_hint_cache": ("Cache de dicas da IA", hint_cache.stats()),
+        "seshat_question_cache": ("Cache de questões", question_cache.stats()),
+        "seshat_bcrypt": ("Pool de hash de senhas", passwords.stats()),
+    }), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+# --- Perfis de requisições (profiling.py), só com o segredo PROFILE_SECRET ---
+
+@app.get("/admin/perfis", dependencies=[Depends(profiling.require_profile_secret)])
+def list_profiles():
+    """ Perfis guardados, do mais novo para o mais antigo. """
+    return profiling.list_profiles()
+
+@app.get("/admin/perfis/{profile_id}", dependencies=[Depends(profiling.require_profile_secret)])
+def get_profile(profile_id: str):
+    """ Árvore de chamadas (texto do pstats) e os comandos SQL da requisição, com duração. """
+    entry = profiling.get_profile(profile_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Perfil não encontrado (pode ter saído do buffer).")
+    return {key: value for key, value in entry.items() if not key.startswith("_")}
+
+@app.get("/admin/perfis/{profile_id}/pstats", dependencies=[Depends(profiling.require_profile_secret)])
+def download_profile(profile_id: str):
+    """ O perfil no formato do cProfile, para abrir com pstats ou snakeviz. """
+    entry = profiling.get_profile(profile_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Perfil não encontrado (pode ter saído do buffer).")
+    return Response(content=entry["_pstats"], media_type="application/octet-stream",
+                    headers={"Content-Disposition": f'attachment; filename="perfil-{profile_id}.prof"'})
+
 # --- Fim do Arquivo ---
\ No newline at end of file
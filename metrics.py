@@ -0,0 +1,249 @@
+# metrics.py
+
+import asyncio
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# --- Métricas da API no formato do Prometheus (GET /metrics) ---
+# Tudo fica em memória, no próprio processo, sem serviço externo:
+# - MetricsMiddleware (ASGI puro): latência e status por rota, requisições em andamento;
+# - eventos do SQLAlchemy: quantos comandos SQL e quanto tempo de banco cada requisição gastou
+#   (um número alto de consultas numa rota simples costuma ser N+1 de relacionamento lazy);
+# - ai_call(): duração e resultado de cada chamada ao modelo (ai_service).
+# A rota entra nos rótulos pelo molde ("/perguntas/{subject}"), nunca pelo caminho real,
+# para o número de séries não crescer com os IDs.
+
+# Manda o cabeçalho X-DB-Query-Count em toda resposta (ligue com METRICS_QUERY_HEADER=1, só para depurar)
+METRICS_QUERY_HEADER = os.environ.get("METRICS_QUERY_HEADER", "0") == "1"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+AI_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 90)
+
+
+class _RequestStats:
+    """ Consultas ao banco da requisição atual (compartilhado com o threadpool pelo contextvar). """
+    __slots__ = ("queries", "db_seconds", "statements")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.statements = None  # lista de (sql, segundos) só quando alguém pediu (profiling.py)
+
+
+class _Histogram:
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.series: dict[tuple, list] = {}  # rótulos -> [contagem por faixa..., soma, total]
+
+    def observe(self, labels: tuple, value: float):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0] * len(self.buckets) + [0.0, 0]
+        for i, upper in enumerate(self.buckets):
+            if value <= upper:
+                series[i] += 1
+        series[-2] += value
+        series[-1] += 1
+
+
+_current: ContextVar[_RequestStats | None] = ContextVar("metrics_request", default=None)
+_lock = threading.Lock()
+_in_flight = 0
+_requests: dict[tuple, int] = {}  # (método, rota, status) -> total
+_latency = _Histogram(LATENCY_BUCKETS)
+_queries_per_request = _Histogram(QUERY_COUNT_BUCKETS)
+_db_seconds: dict[tuple, float] = {}  # (método, rota) -> tempo de banco somado
+_db_totals = {"queries": 0, "seconds": 0.0}  # inclui o que roda fora de requisições
+_ai = _Histogram(AI_BUCKETS)
+
+
+# --- Banco: vale para todas as engines (a síncrona e a assíncrona) ---
+
+# O início fica no contexto de execução do comando: se ele der erro, o 'after' não roda
+# e o valor vai embora junto com o contexto, sem sobrar nada na conexão.
+# Sem contexto (raro), vale o da conexão, que o próximo comando sobrescreve.
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_start = time.perf_counter()
+    else:
+        conn.info["metrics_start"] = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = context._query_start if context is not None else conn.info.pop("metrics_start")
+    elapsed = time.perf_counter() - start
+    request = _current.get()
+    if request is not None:
+        request.queries += 1
+        request.db_seconds += elapsed
+        if request.statements is not None:
+            request.statements.append((statement, elapsed))
+    with _lock:
+        _db_totals["queries"] += 1
+        _db_totals["seconds"] += elapsed
+
+
+def current_query_count() -> int:
+    """ Comandos SQL executados até agora na requisição atual (0 fora de requisições). """
+    request = _current.get()
+    return request.queries if request is not None else 0
+
+
+def record_statements() -> list | None:
+    """
+    Passa a guardar o texto e a duração de cada comando SQL da requisição atual.
+    Retorna a lista que vai sendo preenchida (None fora de uma requisição).
+    """
+    request = _current.get()
+    if request is None:
+        return None
+    request.statements = []
+    return request.statements
+
+
+# --- IA ---
+
+@contextmanager
+def ai_call(operation: str):
+    """ Mede uma chamada ao modelo: with metrics.ai_call("dica"): ... """
+    start = time.perf_counter()
+    outcome = "erro"
+    try:
+        yield
+        outcome = "ok"
+    except (GeneratorExit, asyncio.CancelledError):
+        # Quem esperava desistiu antes do fim (ex: cliente desconectou no meio do stream)
+        outcome = "cancelado"
+        raise
+    finally:
+        with _lock:
+            _ai.observe((operation, outcome), time.perf_counter() - start)
+
+
+# --- Requisições HTTP ---
+
+class MetricsMiddleware:
+    """ Middleware ASGI puro (sem BaseHTTPMiddleware, que bufferiza e atrapalha o streaming). """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        global _in_flight
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request = _RequestStats()
+        token = _current.set(request)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if METRICS_QUERY_HEADER:
+                    # Só conta o que rodou até o início da resposta (num stream, o resto fica de fora)
+                    message["headers"] = [*message.get("headers", []),
+                                          (b"x-db-query-count", str(request.queries).encode())]
+            await send(message)
+
+        with _lock:
+            _in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _current.reset(token)
+            # O roteador grava a rota encontrada no próprio scope
+            route = getattr(scope.get("route"), "path", "<sem rota>")
+            labels = (scope["method"], route)
+            with _lock:
+                _in_flight -= 1
+                _requests[(*labels, str(status_code))] = _requests.get((*labels, str(status_code)), 0) + 1
+                _latency.observe(labels, elapsed)
+                _queries_per_request.observe(labels, request.queries)
+                _db_seconds[labels] = _db_seconds.get(labels, 0.0) + request.db_seconds
+
+
+# --- Exposição no formato texto do Prometheus ---
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _render_histogram(lines: list, name: str, help_text: str, names: tuple, histogram: _Histogram):
+    lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for values, series in sorted(histogram.series.items()):
+        for upper, count in [*zip(histogram.buckets, series), ("+Inf", series[-1])]:
+            le = f'le="{upper}"'
+            lines.append(f"{name}_bucket{_labels(names, values, le)} {count}")
+        lines.append(f"{name}_sum{_labels(names, values)} {series[-2]}")
+        lines.append(f"{name}_count{_labels(names, values)} {series[-1]}")
+
+
+def _render_gauges(lines: list, prefix: str, help_text: str, stats: dict):
+    """ Os dicionários de stats() dos caches viram gauges (só os valores numéricos). """
+    for key, value in stats.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            continue
+        name = f"{prefix}_{key}"
+        lines += [f"# HELP {name} {help_text} ({key})", f"# TYPE {name} gauge", f"{name} {value}"]
+
+
+def render(extra_stats: dict[str, tuple[str, dict]] | None = None) -> str:
+    """
+    Todas as métricas no formato texto do Prometheus.
+    'extra_stats' é {prefixo: (descrição, stats())}, para incluir os contadores dos caches.
+    """
+    lines = []
+    with _lock:
+        lines += ["# HELP seshat_http_requests_in_flight Requisições sendo atendidas agora",
+                  "# TYPE seshat_http_requests_in_flight gauge",
+                  f"seshat_http_requests_in_flight {_in_flight}"]
+
+        lines += ["# HELP seshat_http_requests_total Requisições atendidas, por rota e status",
+                  "# TYPE seshat_http_requests_total counter"]
+        for values, count in sorted(_requests.items()):
+            lines.append(f"seshat_http_requests_total{_labels(('method', 'route', 'status'), values)} {count}")
+
+        _render_histogram(lines, "seshat_http_request_duration_seconds", "Latência das requisições, por rota",
+                          ("method", "route"), _latency)
+        _render_histogram(lines, "seshat_db_queries_per_request", "Comandos SQL por requisição, por rota",
+                          ("method", "route"), _queries_per_request)
+
+        lines += ["# HELP seshat_db_request_seconds_total Tempo gasto no banco pelas requisições, por rota",
+                  "# TYPE seshat_db_request_seconds_total counter"]
+        for values, seconds in sorted(_db_seconds.items()):
+            lines.append(f"seshat_db_request_seconds_total{_labels(('method', 'route'), values)} {seconds}")
+
+        lines += ["# HELP seshat_db_queries_total Comandos SQL executados pelo processo",
+                  "# TYPE seshat_db_queries_total counter",
+                  f"seshat_db_queries_total {_db_totals['queries']}",
+                  "# HELP seshat_db_seconds_total Tempo gasto no banco pelo processo",
+                  "# TYPE seshat_db_seconds_total counter",
+                  f"seshat_db_seconds_total {_db_totals['seconds']}"]
+
+        _render_histogram(lines, "seshat_ai_call_duration_seconds", "Duração das chamadas ao modelo, por operação",
+                          ("operation", "outcome"), _ai)
+
+    for prefix, (help_text, stats) in (extra_stats or {}).items():
+        _render_gauges(lines, prefix, help_text, stats)
+    return "\n".join(lines) + "\n"
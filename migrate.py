@@ -0,0 +1,31 @@
+# migrate.py
+
+import os
+import database, models
+import catalog, question_search
+
+# --- Passo de migração: schema + dados derivados ---
+# Antes, importar o main já criava/alterava as tabelas no banco, o que deixava a
+# subida lenta (e qualquer script que importasse o main mexia no banco). Agora isso
+# roda aqui: no startup do servidor (lifespan do main) ou explicitamente no deploy:
+#
+#     python migrate.py
+#
+# Com a migração no deploy, MIGRATE_ON_STARTUP=0 deixa a subida de cada instância
+# sem nenhum acesso ao banco.
+
+MIGRATE_ON_STARTUP = os.environ.get("MIGRATE_ON_STARTUP", "1") == "1"
+
+
+def migrate():
+    """ Cria as tabelas/colunas/índices que faltam, indexa as questões novas para a busca e monta o catálogo. """
+    database.sync_schema(models.Base.metadata)
+    # Só as questões que ainda não estão no índice de busca (ex: importadas pelo COPY)
+    with database.SessionLocal() as db:
+        question_search.backfill(db)
+        catalog.ensure_built(db)
+
+
+if __name__ == "__main__":
+    migrate()
+    print("Banco atualizado.")
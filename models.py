@@ -1,8 +1,9 @@
 # models.py
 
 # ALTERADO: Importa ForeignKey e relationship
-from sqlalchemy import Boolean, Column, Integer, String, JSON, ForeignKey
+from sqlalchemy import Boolean, Column, Integer, String, Text, JSON, ForeignKey, DateTime, UniqueConstraint, Date, Float, Index, DDL, event, func
 from sqlalchemy.orm import relationship # Importa relationship
+from datetime import datetime, timezone
 from database import Base
 
 # --- Tabela de Usuários (Já existe) ---
@@ -29,6 +30,69 @@ class Question(Base):
     source = Column(String, index=True, nullable=True)
     year = Column(Integer, index=True, nullable=True)
 
+# Ordem da listagem paginada (GET /perguntas). 'coalesce' porque o ano pode ser nulo
+# e o cursor precisa de um valor comparável.
+Index("ix_questions_subject_year_id", Question.subject, func.coalesce(Question.year, 0), Question.id)
+
+
+# --- Tabela 'question_facets' ---
+# Quantas questões existem em cada combinação (subject, source, year); base do
+# GET /catalogo. Mantida por catalog.py. Sem fonte/ano é guardado como "" e 0,
+# porque fazem parte da chave primária.
+class QuestionFacet(Base):
+    __tablename__ = "question_facets"
+    subject = Column(String, primary_key=True)
+    source = Column(String, primary_key=True, default="")
+    year = Column(Integer, primary_key=True, default=0)
+    total = Column(Integer, nullable=False, default=0)
+
+
+# --- Tabela 'question_search' ---
+# Texto de cada questão normalizado para a busca textual (minúsculas, sem acentos;
+# veja question_search.normalize). O índice de texto depende do banco:
+# GIN sobre to_tsvector('portuguese') no PostgreSQL e uma tabela FTS5 no SQLite.
+class QuestionSearch(Base):
+    __tablename__ = "question_search"
+    question_id = Column(Integer, ForeignKey("questions.id", ondelete="CASCADE"), primary_key=True)
+    documento = Column(Text, nullable=False)
+
+
+event.listen(QuestionSearch.__table__, "after_create", DDL(
+    "CREATE INDEX IF NOT EXISTS ix_question_search_documento_fts "
+    "ON question_search USING gin (to_tsvector('portuguese', documento))"
+).execute_if(dialect="postgresql"))
+
+# No SQLite, 'question_search_fts' indexa o conteúdo de question_search (content=...);
+# os triggers mantêm os dois sincronizados.
+for _ddl in (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS question_search_fts USING fts5("
+    "documento, content='question_search', content_rowid='question_id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS question_search_ai AFTER INSERT ON question_search BEGIN "
+    "INSERT INTO question_search_fts(rowid, documento) VALUES (new.question_id, new.documento); END",
+    "CREATE TRIGGER IF NOT EXISTS question_search_ad AFTER DELETE ON question_search BEGIN "
+    "INSERT INTO question_search_fts(question_search_fts, rowid, documento) VALUES ('delete', old.question_id, old.documento); END",
+    "CREATE TRIGGER IF NOT EXISTS question_search_au AFTER UPDATE ON question_search BEGIN "
+    "INSERT INTO question_search_fts(question_search_fts, rowid, documento) VALUES ('delete', old.question_id, old.documento); "
+    "INSERT INTO question_search_fts(rowid, documento) VALUES (new.question_id, new.documento); END",
+):
+    event.listen(QuestionSearch.__table__, "after_create", DDL(_ddl).execute_if(dialect="sqlite"))
+
+
+# --- Tabela 'question_hints' ---
+# Dicas geradas pela IA, guardadas para não chamar o Gemini de novo para a mesma questão.
+# 'prompt_version' muda quando o prompt da dica muda; 'content_hash' quando a questão muda.
+class QuestionHint(Base):
+    __tablename__ = "question_hints"
+    __table_args__ = (UniqueConstraint("question_id", "prompt_version", name="uq_question_hints_question_version"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    question_id = Column(Integer, ForeignKey("questions.id"), nullable=False, index=True)
+    prompt_version = Column(String, nullable=False)
+    content_hash = Column(String, nullable=False)
+    hint = Column(String, nullable=False)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
 
 # --- NOVO: Tabela 'cronogramas' ---
 # Cada linha é um cronograma "pai"
@@ -37,6 +101,8 @@ class Cronograma(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     nome = Column(String, index=True, default="Meu Cronograma") # Ex: "Plano Reta Final ENEM"
+    # Incrementada a cada mudança em matérias/tópicos; vira o ETag de GET /cronograma/me
+    versao = Column(Integer, nullable=False, default=0, server_default="0")
     
     # Chave estrangeira para ligar este cronograma a um usuário
     owner_id = Column(Integer, ForeignKey("users.id"))
@@ -80,4 +146,59 @@ class TopicoCronograma(Base):
     materia_id = Column(Integer, ForeignKey("materias_cronograma.id"))
     
     # Relacionamento
-    materia = relationship("MateriaCronograma", back_populates="topicos")
\ No newline at end of file
+    materia = relationship("MateriaCronograma", back_populates="topicos")
+
+
+# --- Tabela 'planos_estudo' ---
+# Plano de estudos de N semanas gerado a partir do cronograma (um por cronograma).
+# Guardado no banco e atualizado aos poucos quando os tópicos mudam (ver study_plan.py).
+class PlanoEstudo(Base):
+    __tablename__ = "planos_estudo"
+
+    id = Column(Integer, primary_key=True, index=True)
+    cronograma_id = Column(Integer, ForeignKey("cronogramas.id"), unique=True, nullable=False)
+    data_inicio = Column(Date, nullable=False)
+    semanas = Column(Integer, nullable=False, default=4)
+    horas_por_dia = Column(JSON, nullable=False) # 7 valores, de segunda a domingo
+    pesos = Column(JSON, nullable=False, default=dict) # {"<materia_id>": peso}; quem não aparece tem peso 1
+
+    sessoes = relationship("SessaoEstudo", back_populates="plano", cascade="all, delete-orphan")
+
+
+# --- Tabela 'sessoes_estudo' ---
+# Cada linha é um bloco de estudo em um dia do plano.
+# materia_id/topico_id não são chaves estrangeiras de propósito: o plano é refeito
+# na mesma transação em que matérias e tópicos são apagados.
+class SessaoEstudo(Base):
+    __tablename__ = "sessoes_estudo"
+    __table_args__ = (
+        Index("ix_sessoes_estudo_plano_data", "plano_id", "data"),
+        Index("ix_sessoes_estudo_plano_materia", "plano_id", "materia_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    plano_id = Column(Integer, ForeignKey("planos_estudo.id"), nullable=False)
+    data = Column(Date, nullable=False)
+    materia_id = Column(Integer, nullable=False)
+    topico_id = Column(Integer, nullable=True)
+    horas = Column(Float, nullable=False)
+
+    plano = relationship("PlanoEstudo", back_populates="sessoes")
+
+
+# --- Tabela 'simulados' ---
+# Um simulado gerado para o usuário. 'questoes' guarda uma cópia das questões
+# (com o gabarito), para que recarregar e corrigir não dependam do banco de questões.
+class Simulado(Base):
+    __tablename__ = "simulados"
+
+    id = Column(Integer, primary_key=True, index=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    filtros = Column(JSON, nullable=False) # {"source": ..., "year": ...}
+    cotas = Column(JSON, nullable=False) # {"<subject>": {"pedidas": n, "obtidas": m}}
+    questoes = Column(JSON, nullable=False) # Cópia das questões, na ordem do simulado
+    respostas = Column(JSON, nullable=True) # {"<question_id>": resposta}, depois da correção
+    acertos = Column(Integer, nullable=True)
+    corrigido_em = Column(DateTime, nullable=True)
+
@@ -0,0 +1,26 @@
+# pagination.py
+
+import base64
+import json
+
+# --- Cursores de paginação (keyset) ---
+# O cursor é opaco para o cliente: são os valores da chave de ordenação da última
+# linha da página, em JSON, codificados em base64 para URL. A próxima página
+# continua a partir deles com um WHERE (chave) > (cursor), sem OFFSET.
+
+
+def encode_cursor(*values) -> str:
+    raw = json.dumps(list(values), ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, *types) -> tuple:
+    """ Decodifica e converte cada valor com o tipo correspondente. Levanta ValueError se for inválido. """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if len(values) != len(types):
+            raise ValueError
+        return tuple(cast(value) for cast, value in zip(types, values))
+    except Exception as e:
+        raise ValueError("Cursor inválido.") from e
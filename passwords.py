@@ -0,0 +1,104 @@
+# passwords.py
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+# --- Hash de senhas (bcrypt) isolado em um pool próprio ---
+# O bcrypt é lento de propósito. Rodando direto nos endpoints, ele ocupava o
+# mesmo threadpool que atende todas as outras rotas síncronas, e uma rajada de
+# logins no começo da aula deixava a API inteira lenta. Aqui ele roda em um
+# pool dedicado e limitado; se a fila passar do limite, respondemos 503.
+# (O bcrypt libera o GIL durante o cálculo, então threads bastam.)
+
+# Custo do bcrypt. Ao mudar, as senhas antigas são refeitas no próximo login.
+BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", 12))
+BCRYPT_WORKERS = int(os.environ.get("BCRYPT_WORKERS", 2))
+# Máximo de hashes esperando na fila antes de recusar novos pedidos
+BCRYPT_MAX_QUEUE = int(os.environ.get("BCRYPT_MAX_QUEUE", 64))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+_executor = ThreadPoolExecutor(max_workers=BCRYPT_WORKERS, thread_name_prefix="bcrypt")
+_lock = threading.Lock()
+_stats = {"pending": 0, "running": 0, "completed": 0, "cancelled": 0, "rejected": 0, "rehashed": 0}
+
+
+def _to_bytes(password: str) -> bytes:
+    # O bcrypt só considera os primeiros 72 bytes
+    password_bytes = password.encode('utf-8')
+    if len(password_bytes) > 72: password_bytes = password_bytes[:72]
+    return password_bytes
+
+
+# --- Versões síncronas (rodam na thread atual) ---
+
+def hash_password(password: str) -> str:
+    return pwd_context.hash(_to_bytes(password))
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(_to_bytes(plain_password), hashed_password)
+
+def verify_and_update(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """ Verifica a senha e, se o hash usa um custo diferente de BCRYPT_ROUNDS, devolve o hash novo. """
+    return pwd_context.verify_and_update(_to_bytes(plain_password), hashed_password)
+
+
+# --- Versões assíncronas (rodam no pool dedicado) ---
+
+def _tracked(fn, *args):
+    with _lock:
+        _stats["running"] += 1
+    try:
+        return fn(*args)
+    finally:
+        with _lock:
+            _stats["running"] -= 1
+
+
+def _finished(future):
+    # Roda quando o hash termina e também quando o pedido é cancelado ainda na fila
+    # (cliente desconectou): nesse caso o _tracked nem chega a rodar
+    with _lock:
+        _stats["pending"] -= 1
+        _stats["cancelled" if future.cancelled() else "completed"] += 1
+
+
+async def _run(fn, *args):
+    with _lock:
+        queued = _stats["pending"] - _stats["running"]
+        if queued >= BCRYPT_MAX_QUEUE:
+            _stats["rejected"] += 1
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                                detail="Servidor ocupado. Tente novamente em instantes.",
+                                headers={"Retry-After": "1"})
+        _stats["pending"] += 1
+    future = _executor.submit(_tracked, fn, *args)
+    future.add_done_callback(_finished)
+    return await asyncio.wrap_future(future)
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run(hash_password, password)
+
+async def verify_and_update_async(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    ok, new_hash = await _run(verify_and_update, plain_password, hashed_password)
+    if new_hash:
+        with _lock:
+            _stats["rehashed"] += 1
+    return ok, new_hash
+
+
+def stats() -> dict:
+    """ Profundidade da fila e contadores do pool de hash. """
+    with _lock:
+        return {
+            **_stats,
+            "queue_depth": _stats["pending"] - _stats["running"],
+            "workers": BCRYPT_WORKERS,
+            "max_queue": BCRYPT_MAX_QUEUE,
+            "rounds": BCRYPT_ROUNDS,
+        }
@@ -0,0 +1,113 @@
+# plan_jobs.py
+
+import asyncio
+import os
+import time
+import uuid
+from dataclasses import dataclass, field
+from cachetools import TTLCache
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+import ai_service, crud, schemas
+from database import SessionLocal
+
+# --- Jobs de geração de plano de estudos com IA ---
+# A chamada ao Gemini para montar um plano leva muitos segundos, então
+# POST /cronograma/ia só enfileira um job e devolve o ID; um pool de workers
+# assíncronos (no próprio processo) executa os jobs, e o cliente consulta o
+# status em GET /cronograma/ia/{job_id}.
+
+PLAN_JOB_WORKERS = int(os.environ.get("PLAN_JOB_WORKERS", 2))
+PLAN_JOB_MAX_QUEUE = int(os.environ.get("PLAN_JOB_MAX_QUEUE", 100))
+# Por quanto tempo (segundos) o resultado de um job fica disponível para consulta
+PLAN_JOB_TTL = float(os.environ.get("PLAN_JOB_TTL", 3600))
+
+
+@dataclass
+class PlanJob:
+    id: str
+    owner_id: int
+    cronograma_id: int
+    months: int
+    focus: list[str]
+    status: str = "pendente" # pendente -> executando -> concluido | erro
+    created_at: float = field(default_factory=time.time)
+    nome_plano: str | None = None
+    materias: list | None = None
+    erro: str | None = None
+
+
+# Sem lock: só é usado no event loop (enqueue, workers e o GET de status, que é 'async')
+_jobs: TTLCache = TTLCache(maxsize=10000, ttl=PLAN_JOB_TTL)
+_queue: asyncio.Queue | None = None
+_workers: list[asyncio.Task] = []
+_loop: asyncio.AbstractEventLoop | None = None
+
+
+def _apply_plan(job: PlanJob, plan: dict) -> list:
+    """ Grava as matérias/tópicos do plano no cronograma (uma transação) e devolve o que foi criado. """
+    with SessionLocal() as db:
+        materias = crud.add_ai_plan_to_cronograma(db, cronograma_id=job.cronograma_id, plan=plan)
+        return [schemas.MateriaCronograma.model_validate(m).model_dump() for m in materias]
+
+
+async def _run(job: PlanJob):
+    job.status = "executando"
+    plan = await ai_service.generate_study_plan_ai(job.months, job.focus)
+    if not isinstance(plan, dict):
+        job.status = "erro"
+        job.erro = "A IA não conseguiu gerar o plano. Tente novamente."
+        return
+    try:
+        job.materias = await run_in_threadpool(_apply_plan, job, plan)
+    except HTTPException as e:
+        job.status = "erro"
+        job.erro = e.detail
+        return
+    job.nome_plano = plan.get("nome_plano")
+    job.status = "concluido"
+
+
+async def _worker():
+    while True:
+        job = await _queue.get()
+        try:
+            await _run(job)
+        except Exception as e:
+            print(f"Erro no job de plano {job.id}: {e!r}")
+            job.status = "erro"
+            job.erro = "Erro inesperado ao gerar o plano."
+        finally:
+            _queue.task_done()
+
+
+def _ensure_workers():
+    """ Sobe os workers no event loop atual na primeira vez que um job é enfileirado. """
+    global _queue, _workers, _loop
+    loop = asyncio.get_running_loop()
+    if _loop is loop and _queue is not None:
+        return
+    _loop = loop
+    _queue = asyncio.Queue(maxsize=PLAN_JOB_MAX_QUEUE)
+    _workers = [loop.create_task(_worker()) for _ in range(PLAN_JOB_WORKERS)]
+
+
+async def enqueue(owner_id: int, cronograma_id: int, months: int, focus: list[str]) -> PlanJob:
+    _ensure_workers()
+    job = PlanJob(id=uuid.uuid4().hex, owner_id=owner_id, cronograma_id=cronograma_id, months=months, focus=focus)
+    try:
+        _queue.put_nowait(job)
+    except asyncio.QueueFull:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            detail="Muitos planos sendo gerados agora. Tente novamente em instantes.",
+                            headers={"Retry-After": "5"})
+    _jobs[job.id] = job
+    return job
+
+
+def get_job(job_id: str, owner_id: int) -> PlanJob | None:
+    """ Busca o job; jobs de outros usuários são tratados como inexistentes. """
+    job = _jobs.get(job_id)
+    if job is None or job.owner_id != owner_id:
+        return None
+    return job
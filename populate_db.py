@@ -1,70 +1,178 @@
 # populate_db.py
 
+import argparse
+import hashlib
 import json
+import time
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
-from database import SessionLocal, engine # Importa do nosso arquivo database.py
+import database
+from database import SessionLocal # Importa do nosso arquivo database.py
 import models, schemas # Importa nossos modelos e schemas
 import crud # Importa nossas funções CRUD
+import catalog, question_search
 
 # Garante que as tabelas existam antes de tentar inserir
-models.Base.metadata.create_all(bind=engine)
+database.sync_schema(models.Base.metadata)
+
+# Tamanho do bloco lido do arquivo e quantidade de questões por transação
+READ_CHUNK_SIZE = 64 * 1024
+DEFAULT_BATCH_SIZE = 5000
+
+
+# --- Leitura incremental do arquivo ---
+
+def _iter_json_array(f):
+    """ Lê um array JSON ([{...}, {...}]) elemento por elemento, sem carregar o arquivo inteiro. """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    eof = False
+    started = False
+
+    while True:
+        # Pula espaços e vírgulas entre os elementos
+        buffer = buffer.lstrip(" \t\r\n,")
+        if not started and buffer:
+            if buffer[0] != "[":
+                raise ValueError("O arquivo JSON deve conter uma lista de questões.")
+            buffer = buffer[1:]
+            started = True
+            continue
+        if buffer.startswith("]"):
+            return
+        if buffer:
+            try:
+                record, end = decoder.raw_decode(buffer)
+                yield record
+                buffer = buffer[end:]
+                continue
+            except json.JSONDecodeError:
+                # Elemento cortado no meio do bloco: lê mais e tenta de novo
+                if eof:
+                    raise
+        if eof:
+            if started:
+                raise ValueError("Fim inesperado do arquivo JSON (falta o ']').")
+            return
+        chunk = f.read(READ_CHUNK_SIZE)
+        eof = not chunk
+        buffer += chunk
+
+
+def _iter_ndjson(f):
+    """ Uma questão por linha (NDJSON / JSON Lines). """
+    for line in f:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def iter_question_records(json_filepath: str):
+    """ Devolve as questões do arquivo uma por vez. Aceita array JSON ou NDJSON. """
+    with open(json_filepath, 'r', encoding='utf-8') as f:
+        first = f.read(1)
+        while first and first.isspace():
+            first = f.read(1)
+        f.seek(0)
+        if first == "[":
+            yield from _iter_json_array(f)
+        else:
+            yield from _iter_ndjson(f)
+
+
+# --- Deduplicação ---
+
+def content_hash(text: str) -> bytes:
+    """ Hash do texto da questão (a mesma regra de duplicata de antes: texto igual). """
+    return hashlib.sha256(text.encode("utf-8")).digest()[:16]
+
+
+def load_existing_hashes(db: Session) -> set[bytes]:
+    """ Carrega uma vez os hashes das questões que já estão no banco (lendo em blocos). """
+    query = db.query(models.Question.text).execution_options(stream_results=True, yield_per=DEFAULT_BATCH_SIZE)
+    return {content_hash(text) for (text,) in query}
+
+
+def populate_questions_from_json(db: Session, json_filepath: str = "questoes.json", batch_size: int = DEFAULT_BATCH_SIZE):
+    """ Lê um arquivo JSON/NDJSON em streaming e insere as questões no banco em lotes. """
 
-def populate_questions_from_json(db: Session, json_filepath: str = "questoes.json"):
-    """ Lê um arquivo JSON e insere as questões no banco de dados. """
-    
     print(f"Lendo questões do arquivo: {json_filepath}")
-    try:
-        with open(json_filepath, 'r', encoding='utf-8') as f:
-            questions_data = json.load(f)
-    except FileNotFoundError:
-        print(f"Erro: Arquivo '{json_filepath}' não encontrado.")
-        return
-    except json.JSONDecodeError:
-        print(f"Erro: Falha ao decodificar o JSON no arquivo '{json_filepath}'. Verifique a formatação.")
-        return
+    start = time.perf_counter()
+    seen = load_existing_hashes(db)
+    print(f"{len(seen)} questões já existentes no banco.")
 
-    print(f"Encontradas {len(questions_data)} questões no JSON.")
-    
+    questions_read = 0
     questions_added = 0
-    for q_data in questions_data:
-        # Verifica se todos os campos obrigatórios estão presentes
-        required_fields = ["subject", "text", "options", "correct_answer"]
-        if not all(field in q_data for field in required_fields):
-            print(f"AVISO: Pulando questão por falta de campos obrigatórios: {q_data.get('text', 'Texto não encontrado')}")
-            continue
+    skipped_invalid = 0
+    skipped_duplicates = 0
+    batch = []
 
-        # Cria um objeto schema Pydantic para validação (opcional, mas bom)
+    def flush():
+        nonlocal questions_added
         try:
-            question_schema = schemas.QuestionCreate(**q_data)
+            crud.bulk_insert_questions(db, batch)
         except Exception as e:
-            print(f"AVISO: Pulando questão devido a erro de validação Pydantic: {e} - Dados: {q_data.get('text', 'Texto não encontrado')}")
-            continue
+            db.rollback() # Desfaz o lote inteiro em caso de erro
+            raise RuntimeError(f"ERRO ao inserir lote de {len(batch)} questões: {e}") from e
+        questions_added += len(batch)
+        elapsed = time.perf_counter() - start
+        print(f"{questions_added} questões inseridas ({questions_added / elapsed:.0f} linhas/s)")
+        batch.clear()
 
-        # Verifica se uma questão com o mesmo texto já existe (evitar duplicatas simples)
-        # Nota: Uma verificação melhor poderia usar source e year também
-        existing_question = db.query(models.Question).filter(models.Question.text == question_schema.text).first()
-        if existing_question:
-            print(f"AVISO: Questão já existe no banco (baseado no texto), pulando: {question_schema.text[:50]}...")
-            continue
-            
-        # Usa a função CRUD para criar a questão
-        try:
-            crud.create_question(db=db, question=question_schema)
-            questions_added += 1
-        except Exception as e:
-            print(f"ERRO ao inserir questão: {e} - Dados: {question_schema.text[:50]}...")
-            db.rollback() # Desfaz a tentativa de adição em caso de erro
+    try:
+        for q_data in iter_question_records(json_filepath):
+            questions_read += 1
+            # Valida com o schema Pydantic (campos obrigatórios e tipos)
+            try:
+                question_schema = schemas.QuestionCreate(**q_data)
+            except (ValidationError, TypeError) as e:
+                text = q_data.get('text', 'Texto não encontrado') if isinstance(q_data, dict) else q_data
+                print(f"AVISO: Pulando questão devido a erro de validação: {e} - Dados: {str(text)[:50]}")
+                skipped_invalid += 1
+                continue
+
+            # Evita duplicatas (mesmo texto), tanto do banco quanto dentro do próprio arquivo
+            digest = content_hash(question_schema.text)
+            if digest in seen:
+                skipped_duplicates += 1
+                continue
+            seen.add(digest)
 
+            batch.append(question_schema.model_dump())
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+    except FileNotFoundError:
+        print(f"Erro: Arquivo '{json_filepath}' não encontrado.")
+        return
+    except (json.JSONDecodeError, ValueError) as e:
+        print(f"Erro: Falha ao decodificar o JSON no arquivo '{json_filepath}' ({e}). Verifique a formatação.")
+        return
+
+    indexed = question_search.backfill(db)
+    print(f"{indexed} questões indexadas para a busca.")
+    catalog.rebuild(db)
+
+    elapsed = time.perf_counter() - start
     print(f"--------------------------------------------------")
+    print(f"Questões lidas do arquivo: {questions_read}")
+    print(f"Puladas (inválidas): {skipped_invalid} | Puladas (duplicadas): {skipped_duplicates}")
     print(f"Total de questões adicionadas ao banco: {questions_added}")
+    print(f"Tempo: {elapsed:.2f}s ({questions_read / elapsed if elapsed else 0:.0f} linhas/s)")
     print(f"População do banco de dados concluída.")
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Importa questões de um arquivo JSON (lista) ou NDJSON.")
+    parser.add_argument("arquivo", nargs="?", default="questoes.json")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Questões por transação")
+    args = parser.parse_args()
+
     # Obtém uma sessão do banco de dados
     db = SessionLocal()
     try:
-        populate_questions_from_json(db)
+        populate_questions_from_json(db, args.arquivo, batch_size=args.batch_size)
     finally:
         # Garante que a sessão seja fechada, mesmo se ocorrer um erro
-        db.close()
\ No newline at end of file
+        db.close()
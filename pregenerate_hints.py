@@ -0,0 +1,154 @@
+# pregenerate_hints.py
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from sqlalchemy.orm import Session
+import database
+from database import SessionLocal
+import models
+import ai_service, hint_cache
+
+# Garante que as tabelas existam antes de tentar inserir
+database.sync_schema(models.Base.metadata)
+
+# --- Pré-geração das dicas da IA ---
+# Percorre a tabela 'questions' e gera (com a IA) as dicas que ainda não existem
+# para a versão atual do prompt, ou que ficaram velhas porque o texto/opções mudaram.
+# Rode depois de uma importação em massa para que nenhum aluno espere pelo modelo:
+#
+#     python pregenerate_hints.py                       # Gemini de verdade
+#     python pregenerate_hints.py --fake --fake-latency-ms 200   # modelo falso local
+#
+# O progresso é salvo em um arquivo de checkpoint; se a execução for interrompida,
+# a próxima continua de onde parou.
+
+DEFAULT_CHECKPOINT = ".pregenerate_hints.json"
+
+
+def load_checkpoint(path: str, prompt_version: str) -> int:
+    """ Último ID já processado (0 se não há checkpoint ou se ele é de outra versão do prompt). """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return 0
+    if data.get("prompt_version") != prompt_version:
+        return 0
+    return int(data.get("last_id", 0))
+
+
+def save_checkpoint(path: str, prompt_version: str, last_id: int):
+    # Escreve num arquivo temporário e renomeia, para nunca deixar um checkpoint pela metade
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({"prompt_version": prompt_version, "last_id": last_id}, f)
+    os.replace(tmp_path, path)
+
+
+def fetch_questions(db: Session, after_id: int, fetch_size: int) -> list:
+    """
+    Próximas 'fetch_size' questões depois de 'after_id', em ordem de ID (keyset, memória constante).
+    O lote é lido inteiro antes de qualquer escrita: um cursor aberto durante o commit
+    trava o banco no SQLite ('database is locked').
+    """
+    return db.query(
+        models.Question.id, models.Question.text, models.Question.options, models.Question.correct_answer
+    ).filter(models.Question.id > after_id).order_by(models.Question.id).limit(fetch_size).all()
+
+
+def stale_questions(db: Session, batch: list, prompt_version: str) -> list:
+    """ Filtra do lote as questões sem dica (ou com dica de conteúdo antigo) para esta versão do prompt. """
+    stored = dict(
+        db.query(models.QuestionHint.question_id, models.QuestionHint.content_hash).filter(
+            models.QuestionHint.prompt_version == prompt_version,
+            models.QuestionHint.question_id.in_([row.id for row in batch]),
+        )
+    )
+    return [row for row in batch if stored.get(row.id) != hint_cache.question_digest(row)]
+
+
+async def generate_batch(batch: list, prompt_version: str, concurrency: int) -> tuple[list, int]:
+    """ Gera as dicas de um lote com no máximo 'concurrency' chamadas ao mesmo tempo. """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def generate(row):
+        async with semaphore:
+            hint = await ai_service.generate_question_hint(
+                question_text=row.text,
+                options=hint_cache.options_as_dict(row.options),
+                correct_option=row.correct_answer,
+            )
+        return row, hint
+
+    results = await asyncio.gather(*(generate(row) for row in batch))
+    hints = [
+        (row.id, prompt_version, hint_cache.question_digest(row), hint)
+        for row, hint in results if hint != ai_service.FALLBACK_HINT
+    ]
+    return hints, len(results) - len(hints)
+
+
+async def pregenerate_hints(checkpoint_path: str, concurrency: int, batch_size: int, fetch_size: int):
+    prompt_version = ai_service.HINT_PROMPT_VERSION
+    last_id = load_checkpoint(checkpoint_path, prompt_version)
+    if last_id:
+        print(f"Retomando a partir da questão {last_id} (prompt {prompt_version}).")
+
+    db = SessionLocal()
+    scanned = generated = failed = 0
+    start = time.perf_counter()
+
+    async def flush(batch: list):
+        nonlocal scanned, generated, failed, last_id
+        stale = stale_questions(db, batch, prompt_version)
+        hints, batch_failed = await generate_batch(stale, prompt_version, concurrency)
+        hint_cache.save_hints(db, hints)
+        scanned += len(batch)
+        generated += len(hints)
+        failed += batch_failed
+        last_id = batch[-1].id
+        save_checkpoint(checkpoint_path, prompt_version, last_id)
+        print(f"Até a questão {last_id}: {scanned} lidas, {generated} dicas geradas, {failed} falhas "
+              f"({scanned / (time.perf_counter() - start):.1f} questões/s)")
+
+    try:
+        while True:
+            rows = fetch_questions(db, last_id, fetch_size)
+            if not rows:
+                break
+            for i in range(0, len(rows), batch_size):
+                await flush(rows[i:i + batch_size])
+    finally:
+        db.close()
+
+    # Terminou: a próxima execução começa do zero (e só regenera o que estiver velho)
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    print("--------------------------------------------------")
+    print(f"Questões verificadas: {scanned}")
+    print(f"Dicas geradas: {generated}")
+    print(f"Falhas (serão tentadas de novo na próxima execução): {failed}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pré-gera as dicas da IA para todas as questões do banco.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Chamadas simultâneas ao modelo")
+    parser.add_argument("--batch-size", type=int, default=50, help="Questões por lote gravado no banco")
+    parser.add_argument("--fetch-size", type=int, default=1000, help="Linhas buscadas por vez no cursor")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="Arquivo de checkpoint")
+    parser.add_argument("--restart", action="store_true", help="Ignora o checkpoint e começa do início")
+    parser.add_argument("--fake", action="store_true", help="Usa o modelo falso local (fake_genai) em vez do Gemini")
+    parser.add_argument("--fake-latency-ms", type=float, default=0, help="Latência do modelo falso")
+    args = parser.parse_args()
+
+    if args.fake:
+        import fake_genai
+        ai_service.set_client(fake_genai.FakeGenaiClient(latency=args.fake_latency_ms / 1000))
+    if args.restart and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+
+    asyncio.run(pregenerate_hints(args.checkpoint, args.concurrency, args.batch_size, args.fetch_size))
@@ -0,0 +1,136 @@
+# profiling.py
+
+import cProfile
+import hmac
+import io
+import marshal
+import os
+import pstats
+import threading
+import time
+import uuid
+from collections import deque
+from fastapi import Header, HTTPException, status
+import metrics
+
+# --- Profiling de uma requisição sob demanda (só para admins) ---
+# Quando um aluno reclama de uma rota lenta, mandamos a mesma requisição com o
+# cabeçalho 'X-Profile: <PROFILE_SECRET>'. Ela roda sob o cProfile e o resultado
+# (árvore de chamadas + comandos SQL com duração) fica guardado num buffer circular
+# em memória. A resposta traz 'X-Profile-Id'; o perfil é baixado em
+# GET /admin/perfis/{id} com o cabeçalho 'X-Profile-Secret'.
+#
+# Sem PROFILE_SECRET configurado, nada disso fica ativo. Sem o cabeçalho, o custo
+# por requisição é só procurar o cabeçalho na lista.
+#
+# O cProfile mede a thread do event loop: num endpoint 'async def' pega o código
+# da rota, mas também pode pegar outras requisições que rodaram no loop ao mesmo
+# tempo. Num endpoint 'def' (threadpool) só aparece a parte assíncrona; os comandos
+# SQL, esses sim, são só os da requisição.
+
+PROFILE_SECRET = os.environ.get("PROFILE_SECRET", "")
+# Quantos perfis ficam guardados (os mais antigos saem primeiro)
+PROFILE_BUFFER_SIZE = int(os.environ.get("PROFILE_BUFFER_SIZE", 20))
+# Linhas da árvore de chamadas no relatório em texto
+PROFILE_REPORT_LINES = int(os.environ.get("PROFILE_REPORT_LINES", 60))
+
+_HEADER = b"x-profile"
+
+_profiles: deque = deque(maxlen=PROFILE_BUFFER_SIZE)
+_lock = threading.Lock()
+# Só um perfil por vez: dois cProfile ativos na mesma thread se atrapalham
+_running = threading.Lock()
+
+
+def _secret_matches(value: str | bytes | None) -> bool:
+    if not PROFILE_SECRET or not value:
+        return False
+    if isinstance(value, bytes):
+        value = value.decode("latin-1")
+    return hmac.compare_digest(value, PROFILE_SECRET)
+
+
+def _report(profile: cProfile.Profile) -> str:
+    out = io.StringIO()
+    pstats.Stats(profile, stream=out).strip_dirs().sort_stats("cumulative").print_stats(PROFILE_REPORT_LINES)
+    return out.getvalue()
+
+
+class ProfilingMiddleware:
+    """ Middleware ASGI: roda sob o profiler as requisições com 'X-Profile' correto. """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not PROFILE_SECRET:
+            await self.app(scope, receive, send)
+            return
+        requested = next((value for name, value in scope["headers"] if name == _HEADER), None)
+        if requested is None or not _secret_matches(requested) or not _running.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = [*message.get("headers", []), (b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        statements = metrics.record_statements()
+        profile = cProfile.Profile()
+        start = time.perf_counter()
+        profile.enable()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profile.disable()
+            elapsed = time.perf_counter() - start
+            _running.release()
+            profile.create_stats()
+            # Antes do relatório: o pstats.Stats esvazia o 'stats' do profiler que recebe
+            raw_stats = marshal.dumps(profile.stats)
+            entry = {
+                "id": profile_id,
+                "criado_em": time.time(),
+                "metodo": scope["method"],
+                "caminho": scope["path"],
+                "rota": getattr(scope.get("route"), "path", None),
+                "status": status_code,
+                "duracao_ms": round(elapsed * 1000, 2),
+                "sql": [{"sql": sql, "duracao_ms": round(seconds * 1000, 3)} for sql, seconds in statements or []],
+                "arvore": _report(profile),
+                "_pstats": raw_stats,
+            }
+            with _lock:
+                _profiles.append(entry)
+
+
+# --- Acesso aos perfis guardados ---
+
+def require_profile_secret(x_profile_secret: str | None = Header(None)):
+    """ Dependência dos endpoints /admin/perfis. Sem PROFILE_SECRET, eles nem existem (404). """
+    if not PROFILE_SECRET:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not _secret_matches(x_profile_secret):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Segredo de profiling inválido.")
+
+
+def list_profiles() -> list[dict]:
+    """ Resumo dos perfis guardados, do mais novo para o mais antigo. """
+    with _lock:
+        entries = list(_profiles)
+    return [
+        {key: entry[key] for key in ("id", "criado_em", "metodo", "caminho", "rota", "status", "duracao_ms")}
+        | {"consultas_sql": len(entry["sql"])}
+        for entry in reversed(entries)
+    ]
+
+
+def get_profile(profile_id: str) -> dict | None:
+    with _lock:
+        return next((entry for entry in _profiles if entry["id"] == profile_id), None)
@@ -0,0 +1,129 @@
+# question_cache.py
+
+import os
+import threading
+from typing import NamedTuple
+import orjson
+from cachetools import TTLCache
+
+# --- Cache de leitura das questões por ID ---
+# As questões quase nunca mudam, então /perguntas/verificar e /ia/dica podem ser
+# respondidos sem ir ao banco. Guardamos só uma cópia compacta dos campos
+# (nunca o objeto do SQLAlchemy, que fica preso à sessão que o carregou).
+
+QUESTION_CACHE_SIZE = int(os.environ.get("QUESTION_CACHE_SIZE", 5000))
+QUESTION_CACHE_TTL = float(os.environ.get("QUESTION_CACHE_TTL", 3600))
+
+
+class CachedQuestion(NamedTuple):
+    """ Cópia imutável de uma questão. Tem os mesmos atributos do models.Question. """
+    id: int
+    subject: str
+    text: str
+    options: dict | list
+    correct_answer: str
+    source: str | None
+    year: int | None
+
+
+_cache: TTLCache = TTLCache(maxsize=QUESTION_CACHE_SIZE, ttl=QUESTION_CACHE_TTL)
+# JSON público (schemas.Question, sem o gabarito) já serializado de cada questão:
+# id -> (a CachedQuestion de onde veio, bytes). Um dict simples (a consulta num TTLCache
+# custa ~50x mais); vale enquanto a CachedQuestion for a mesma, então expira junto com ela.
+_payloads: dict[int, tuple[CachedQuestion, bytes]] = {}
+_lock = threading.Lock()
+_hits = 0
+_misses = 0
+
+
+def snapshot(question) -> CachedQuestion:
+    """ Converte um models.Question (ou qualquer objeto com os mesmos campos) na cópia compacta. """
+    return CachedQuestion(
+        id=question.id,
+        subject=question.subject,
+        text=question.text,
+        options=question.options,
+        correct_answer=question.correct_answer,
+        source=question.source,
+        year=question.year,
+    )
+
+
+def get(question_id: int) -> CachedQuestion | None:
+    """ Busca no cache, contabilizando acerto/erro. """
+    global _hits, _misses
+    with _lock:
+        cached = _cache.get(question_id)
+        if cached is None:
+            _misses += 1
+        else:
+            _hits += 1
+    return cached
+
+
+def put(question) -> CachedQuestion:
+    cached = question if isinstance(question, CachedQuestion) else snapshot(question)
+    with _lock:
+        _cache[cached.id] = cached
+    return cached
+
+
+def invalidate(question_id: int | None = None):
+    """ Remove uma questão do cache (ou todas, sem 'question_id'). Chamar em toda escrita de questão. """
+    with _lock:
+        if question_id is None:
+            _cache.clear()
+            _payloads.clear()
+        else:
+            _cache.pop(question_id, None)
+            _payloads.pop(question_id, None)
+
+
+# --- JSON pronto para as listas de questões ---
+# As listas (GET /perguntas/{subject}, /perguntas/busca) devolvem sempre os mesmos
+# dados estáticos; em vez de validar cada questão no schemas.Question e serializar
+# de novo a cada requisição, guardamos os bytes de cada uma e só juntamos.
+
+def _serialize(question: CachedQuestion) -> bytes:
+    """ Bytes do JSON de schemas.Question (mesmos campos e ordem) para a questão. """
+    return orjson.dumps({
+        "subject": question.subject,
+        "text": question.text,
+        "options": question.options,
+        "source": question.source,
+        "year": question.year,
+        "id": question.id,
+    })
+
+
+def payload_list(questions: list[CachedQuestion]) -> bytes:
+    """ Array JSON com as questões, montado a partir dos bytes guardados (um lock só para a lista toda). """
+    with _lock:
+        stored = [_payloads.get(question.id) for question in questions]
+    parts = []
+    missing = {}
+    for question, entry in zip(questions, stored):
+        if entry is None or entry[0] is not question:
+            entry = missing[question.id] = (question, _serialize(question))
+        parts.append(entry[1])
+    if missing:
+        with _lock:
+            _payloads.update(missing)
+            # Limite de tamanho: descarta os mais antigos (o dict guarda a ordem de inserção)
+            while len(_payloads) > QUESTION_CACHE_SIZE:
+                del _payloads[next(iter(_payloads))]
+    return b"[" + b",".join(parts) + b"]"
+
+
+def stats() -> dict:
+    """ Contadores do cache, para monitoramento. """
+    with _lock:
+        total = _hits + _misses
+        return {
+            "hits": _hits,
+            "misses": _misses,
+            "hit_rate": (_hits / total) if total else 0.0,
+            "size": len(_cache),
+            "payloads": len(_payloads),
+            "max_size": _cache.maxsize,
+        }
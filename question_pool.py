@@ -0,0 +1,115 @@
+# question_pool.py
+
+import os
+import random
+import threading
+from cachetools import TTLCache
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+import models
+
+# --- Pool de IDs de questões por filtro ---
+# Em vez de ordenar a tabela inteira com ORDER BY random() a cada requisição,
+# guardamos em memória a lista de IDs de cada filtro (subject, source, year)
+# e sorteamos os IDs aqui mesmo. O banco só precisa buscar as linhas pela
+# chave primária, então o custo não cresce com o tamanho do banco de questões.
+
+# Tempo máximo (em segundos) que um pool fica em memória antes de ser recarregado.
+# Protege contra questões inseridas por outro processo/worker.
+POOL_TTL_SECONDS = float(os.environ.get("QUESTION_POOL_TTL", 300))
+# Quantos filtros ficam em memória. A chave vem da URL (GET /perguntas/{subject}),
+# então sem limite qualquer cliente faria a memória crescer pedindo filtros aleatórios.
+POOL_MAX_FILTERS = int(os.environ.get("QUESTION_POOL_MAX_FILTERS", 1024))
+
+_pools: TTLCache = TTLCache(maxsize=POOL_MAX_FILTERS, ttl=POOL_TTL_SECONDS)
+# Muda a cada invalidate(): uma carga que começou antes dele não guarda a lista velha
+_generation = 0
+_lock = threading.Lock()
+
+
+def _pool_key(subject: str, source: str | None, year: int | None) -> tuple:
+    # Mesma semântica do filtro antigo: valores "falsos" não filtram nada
+    return (subject, source or None, year or None)
+
+
+def _ids_statement(subject: str, source: str | None, year: int | None):
+    """ Todos os IDs que atendem ao filtro. Usa só o índice, sem ordenar. """
+    stmt = select(models.Question.id).where(models.Question.subject == subject)
+    if source:
+        stmt = stmt.where(models.Question.source == source)
+    if year:
+        stmt = stmt.where(models.Question.year == year)
+    return stmt
+
+
+def _cached(key: tuple) -> tuple[list[int] | None, int]:
+    """ O pool do filtro (None se não está em memória) e a geração atual, para passar ao _store. """
+    with _lock:
+        return _pools.get(key), _generation
+
+
+def _store(key: tuple, generation: int, ids: list[int]):
+    # Filtros sem questões não são guardados: são baratos de consultar e é o que um
+    # cliente pedindo matérias/anos inventados geraria
+    if not ids:
+        return
+    with _lock:
+        if generation == _generation:
+            _pools[key] = ids
+
+
+def _sample(ids: list[int], count: int, exclude: set[int] | None) -> list[int]:
+    if exclude:
+        ids = [question_id for question_id in ids if question_id not in exclude]
+    return random.sample(ids, min(max(count, 0), len(ids)))
+
+
+def get_ids(db: Session, subject: str, source: str | None = None, year: int | None = None) -> list[int]:
+    """ Retorna a lista de IDs do filtro, recarregando o pool se ele expirou. """
+    key = _pool_key(subject, source, year)
+    ids, generation = _cached(key)
+    if ids is None:
+        ids = list(db.scalars(_ids_statement(*key)))
+        _store(key, generation, ids)
+    return ids
+
+
+def sample_ids(db: Session, subject: str, count: int, source: str | None = None, year: int | None = None,
+               exclude: set[int] | None = None) -> list[int]:
+    """
+    Sorteia até 'count' IDs distintos do filtro, sem passar pelo banco quando o pool está quente.
+    IDs em 'exclude' (ex: questões que o aluno já fez) não são sorteados.
+    """
+    return _sample(get_ids(db, subject, source=source, year=year), count, exclude)
+
+
+# --- Versões assíncronas (AsyncSession), com os mesmos pools ---
+
+async def get_ids_async(db: AsyncSession, subject: str, source: str | None = None, year: int | None = None) -> list[int]:
+    key = _pool_key(subject, source, year)
+    ids, generation = _cached(key)
+    if ids is None:
+        ids = list(await db.scalars(_ids_statement(*key)))
+        _store(key, generation, ids)
+    return ids
+
+
+async def sample_ids_async(db: AsyncSession, subject: str, count: int, source: str | None = None,
+                           year: int | None = None, exclude: set[int] | None = None) -> list[int]:
+    return _sample(await get_ids_async(db, subject, source=source, year=year), count, exclude)
+
+
+def invalidate(subject: str | None = None):
+    """
+    Descarta os pools afetados por uma escrita.
+    Sem 'subject', descarta tudo (ex: depois de uma importação em massa).
+    """
+    global _generation
+    with _lock:
+        _generation += 1
+        if subject is None:
+            _pools.clear()
+            return
+        for key in [k for k in _pools if k[0] == subject]:
+            del _pools[key]
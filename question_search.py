@@ -0,0 +1,150 @@
+# question_search.py
+
+import re
+import unicodedata
+from sqlalchemy import insert, text
+from sqlalchemy.orm import Session
+import models
+from pagination import decode_cursor, encode_cursor
+
+# --- Busca textual nas questões ---
+# O texto de cada questão é normalizado aqui em Python (minúsculas, sem acentos)
+# e guardado em 'question_search'. O banco cuida do índice e do ranking:
+# - PostgreSQL: to_tsvector('portuguese') + índice GIN, ordenado por ts_rank;
+# - SQLite: tabela FTS5 (tokenizer unicode61 sem diacríticos), ordenado por bm25.
+# A paginação é por cursor (keyset) sobre (relevância, id), sem OFFSET.
+
+BACKFILL_BATCH_SIZE = 5000
+MAX_SEARCH_LIMIT = 100
+
+_WORD = re.compile(r"\w+")
+
+
+def normalize(value: str) -> str:
+    """ 'Função Quadrática' -> 'funcao quadratica' """
+    decomposed = unicodedata.normalize("NFKD", value or "")
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).lower()
+
+
+def document(question) -> str:
+    """ Texto indexado da questão: enunciado e alternativas. """
+    options = question.options.values() if isinstance(question.options, dict) else (question.options or [])
+    return normalize(" ".join([question.text, *map(str, options)]))
+
+
+# --- Indexação ---
+
+def _insert_ignoring_duplicates(db: Session, rows: list[dict]):
+    # Outro processo pode ter indexado as mesmas questões ao mesmo tempo
+    stmt = insert(models.QuestionSearch)
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+        stmt = pg_insert(models.QuestionSearch).on_conflict_do_nothing()
+    elif db.get_bind().dialect.name == "sqlite":
+        stmt = stmt.prefix_with("OR IGNORE")
+    db.execute(stmt, rows)
+
+
+def index(db: Session, questions: list):
+    """
+    Indexa questões recém-inseridas (objetos com id, text e options) na transação
+    atual, junto com o insert delas. Não faz commit.
+    """
+    if questions:
+        db.execute(insert(models.QuestionSearch), [{"question_id": q.id, "documento": document(q)} for q in questions])
+
+
+def backfill(db: Session, batch_size: int = BACKFILL_BATCH_SIZE) -> int:
+    """
+    Indexa as questões que ainda não estão em 'question_search' (anti-join, paginado
+    por ID). Não basta olhar só os IDs acima do maior já indexado: com gravações
+    concorrentes no PostgreSQL, um ID menor pode ser commitado depois de um maior.
+    Faz commit a cada lote. Retorna quantas questões foram indexadas.
+    """
+    last_id = 0
+    indexed = 0
+    while True:
+        batch = db.query(
+            models.Question.id, models.Question.text, models.Question.options
+        ).outerjoin(
+            models.QuestionSearch, models.QuestionSearch.question_id == models.Question.id
+        ).filter(
+            models.QuestionSearch.question_id.is_(None), models.Question.id > last_id
+        ).order_by(models.Question.id).limit(batch_size).all()
+        if not batch:
+            return indexed
+        _insert_ignoring_duplicates(db, [{"question_id": row.id, "documento": document(row)} for row in batch])
+        db.commit()
+        indexed += len(batch)
+        last_id = batch[-1].id
+
+
+# --- Busca ---
+
+def _filters(subject: str | None, source: str | None, year: int | None, params: dict) -> str:
+    clauses = []
+    if subject:
+        clauses.append("q.subject = :subject")
+        params["subject"] = subject
+    if source:
+        clauses.append("q.source = :source")
+        params["source"] = source
+    if year:
+        clauses.append("q.year = :year")
+        params["year"] = year
+    return "".join(f" AND {clause}" for clause in clauses)
+
+
+def search_ids(db: Session, q: str, subject: str | None = None, source: str | None = None,
+               year: int | None = None, limit: int = 20, cursor: str | None = None) -> tuple[list[int], str | None]:
+    """
+    IDs das questões que contêm todos os termos de 'q', da mais para a menos relevante.
+    Retorna (ids, próximo cursor ou None). 'cursor' vem da página anterior.
+    """
+    terms = _WORD.findall(normalize(q))
+    if not terms:
+        return [], None
+    limit = min(max(limit, 1), MAX_SEARCH_LIMIT)
+    params = {"limit": limit + 1}
+    filters = _filters(subject, source, year, params)
+
+    if db.get_bind().dialect.name == "postgresql":
+        params["query"] = " ".join(terms)
+        ranked = (
+            "SELECT q.id AS id, ts_rank(to_tsvector('portuguese', s.documento), query) AS score "
+            "FROM question_search s JOIN questions q ON q.id = s.question_id, "
+            "plainto_tsquery('portuguese', :query) query "
+            f"WHERE to_tsvector('portuguese', s.documento) @@ query{filters}"
+        )
+    else:
+        # Cada termo entre aspas: todos obrigatórios, sem sintaxe especial do FTS5
+        params["query"] = " ".join(f'"{term}"' for term in terms)
+        ranked = (
+            "SELECT q.id AS id, -bm25(question_search_fts) AS score "
+            "FROM question_search_fts JOIN questions q ON q.id = question_search_fts.rowid "
+            f"WHERE question_search_fts MATCH :query{filters}"
+        )
+
+    after = ""
+    if cursor:
+        params["after_score"], params["after_id"] = decode_cursor(cursor, float, int)
+        after = "WHERE score < :after_score OR (score = :after_score AND id > :after_id) "
+
+    rows = db.execute(text(
+        f"SELECT id, score FROM ({ranked}) ranked {after}ORDER BY score DESC, id LIMIT :limit"
+    ), params).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].score, rows[-1].id)
+    return [row.id for row in rows], next_cursor
+
+
+if __name__ == "__main__":
+    # Indexa as questões que ainda não estão no índice de busca (ex: banco antigo)
+    import database
+    from database import SessionLocal
+    database.sync_schema(models.Base.metadata)
+    with SessionLocal() as db:
+        print(f"{backfill(db)} questões indexadas para a busca.")
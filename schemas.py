@@ -1,8 +1,9 @@
 # schemas.py
 
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 # ALTERADO: Importa 'List' de 'typing'
-from typing import Dict, List, Union
+from typing import Annotated, Dict, List, Union
+from datetime import date, datetime
 
 # --- Esquemas para Usuários ---
 class UserBase(BaseModel):
@@ -17,6 +18,8 @@ class User(UserBase):
 # --- Esquemas para Autenticação (Token) ---
 class TokenData(BaseModel):
     email: str | None = None
+    user_id: int | None = None
+    exp: int | None = None # Expiração (timestamp UNIX)
 class Token(BaseModel):
     access_token: str
     token_type: str
@@ -35,6 +38,39 @@ class Question(QuestionBase):
     class Config:
         from_attributes = True
 
+# Resultado de cada item de POST /perguntas/lote
+class QuestionBatchItem(BaseModel):
+    index: int # Posição do item no corpo da requisição
+    # "criada", "duplicada" ou "invalida". "duplicada" é melhor esforço: o texto é comparado
+    # antes do insert, sem trava, então dois lotes simultâneos com o mesmo texto podem
+    # criar as duas (o upload_questoes.py tira as repetições do arquivo antes de enviar)
+    status: str
+    id: int | None = None
+    detail: str | None = None
+class QuestionBatchResponse(BaseModel):
+    created: int
+    duplicates: int
+    invalid: int
+    items: List[QuestionBatchItem]
+
+# Item de GET /perguntas: só vêm os campos pedidos em 'fields'
+class QuestionListItem(BaseModel):
+    id: int | None = None
+    subject: str | None = None
+    text: str | None = None
+    options: Union[List[str], Dict[str, str]] | None = None
+    source: str | None = None
+    year: int | None = None
+
+class QuestionPage(BaseModel):
+    items: List[QuestionListItem]
+    next_cursor: str | None = None # Passe em 'cursor' para a próxima página (None = acabou)
+
+# Resposta de GET /perguntas/busca
+class QuestionSearchResponse(BaseModel):
+    items: List[Question]
+    next_cursor: str | None = None # Passe em 'cursor' para a próxima página (None = acabou)
+
 # --- NOVO: Esquemas para Tópicos do Cronograma ---
 
 # O que o usuário envia para criar um tópico (apenas o nome)
@@ -49,6 +85,16 @@ class TopicoCronograma(TopicoCronogramaCreate):
     class Config:
         from_attributes = True # Permite ler de objetos SQLAlchemy
 
+# Um item de PATCH /cronograma/topicos (só os campos enviados são alterados)
+class TopicoCronogramaUpdate(BaseModel):
+    id: int
+    nome: str | None = None
+    concluido: bool | None = None
+
+class TopicoCronogramaBulkUpdateResponse(BaseModel):
+    atualizados: List[TopicoCronograma]
+    nao_encontrados: List[int] = [] # IDs inexistentes ou de outro usuário
+
 # --- NOVO: Esquemas para Matérias do Cronograma ---
 
 # O que o usuário envia para criar uma matéria (apenas o nome)
@@ -78,6 +124,40 @@ class Cronograma(CronogramaCreate):
     class Config:
         from_attributes = True # Permite ler de objetos SQLAlchemy
 
+# --- Esquemas para o Plano de Estudos (N semanas) ---
+
+# O que o usuário envia para criar/reconfigurar o plano
+class PlanoEstudoConfig(BaseModel):
+    semanas: int = Field(default=4, ge=1, le=52)
+    # Horas disponíveis em cada dia da semana, de segunda a domingo
+    horas_por_dia: List[Annotated[float, Field(ge=0, le=24)]] = Field(
+        default=[2.0, 2.0, 2.0, 2.0, 2.0, 1.0, 0.0], min_length=7, max_length=7
+    )
+    pesos: Dict[int, Annotated[float, Field(ge=0)]] = {} # {materia_id: peso}; padrão 1
+    data_inicio: date | None = None # Padrão: hoje
+
+class PlanoEstudo(BaseModel):
+    id: int
+    data_inicio: date
+    semanas: int
+    horas_por_dia: List[float]
+    pesos: Dict[int, float]
+
+    class Config:
+        from_attributes = True
+
+class SessaoEstudo(BaseModel):
+    data: date
+    materia_id: int
+    materia: str | None
+    topico_id: int | None
+    topico: str | None
+    horas: float
+
+class PlanoEstudoResponse(BaseModel):
+    plano: PlanoEstudo
+    sessoes: List[SessaoEstudo]
+
 class AnswerCheckRequest(BaseModel):
     """ O que o frontend envia para /verificar """
     question_id: int
@@ -89,10 +169,81 @@ class AnswerCheckResponse(BaseModel):
     correct_answer: str
     question_id: int
 
+class AnswerCheckBatchItem(BaseModel):
+    """ Resultado de uma questão dentro de /verificar/lote """
+    question_id: int
+    is_correct: bool | None = None
+    correct_answer: str | None = None
+    error: str | None = None # Preenchido quando a questão não existe
+
+class AnswerCheckBatchResponse(BaseModel):
+    """ O que o backend responde para /verificar/lote """
+    results: List[AnswerCheckBatchItem]
+    score: int # Quantidade de acertos
+    total: int
+
 class AIPlanRequest(BaseModel):
     months: int
     focus: List[str] = ["Geral"]
 
 
+# Resposta de POST /cronograma/ia e GET /cronograma/ia/{job_id}
+class AIPlanJob(BaseModel):
+    job_id: str
+    status: str # "pendente", "executando", "concluido" ou "erro"
+    nome_plano: str | None = None
+    materias: List[MateriaCronograma] | None = None # Matérias criadas no cronograma
+    erro: str | None = None
+
+
 class HintRequest(BaseModel):
-    question_id: int
\ No newline at end of file
+    question_id: int
+
+# --- Esquemas do Catálogo (GET /catalogo) ---
+
+class CatalogoMateria(BaseModel):
+    subject: str
+    total: int
+    fontes: Dict[str, int]
+    anos: Dict[int, int]
+
+class CatalogoCombinacao(BaseModel):
+    subject: str
+    source: str | None
+    year: int | None
+    total: int
+
+class Catalogo(BaseModel):
+    total: int
+    materias: List[CatalogoMateria]
+    fontes: Dict[str, int]
+    anos: Dict[int, int]
+    combinacoes: List[CatalogoCombinacao]
+
+# --- Esquemas para Simulados ---
+
+# Máximo de questões num simulado (o ENEM tem 180)
+MAX_SIMULADO_QUESTOES = 180
+
+class SimuladoCreate(BaseModel):
+    # Quantas questões de cada matéria, ex: {"Matemática": 45, "Ciências da Natureza": 45}
+    cotas: Dict[str, Annotated[int, Field(ge=1, le=MAX_SIMULADO_QUESTOES)]] = Field(min_length=1)
+    source: str | None = None
+    year: int | None = None
+    excluir: List[int] = [] # IDs de questões que não podem cair (ex: já respondidas)
+
+class SimuladoCota(BaseModel):
+    pedidas: int
+    obtidas: int # Menor que 'pedidas' quando a matéria não tem questões suficientes
+
+class Simulado(BaseModel):
+    id: int
+    created_at: datetime
+    cotas: Dict[str, SimuladoCota]
+    questoes: List[Question] # Sem o gabarito
+    acertos: int | None = None # Preenchido depois da correção
+    corrigido_em: datetime | None = None
+
+    class Config:
+        from_attributes = True
+
@@ -6,8 +6,15 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from datetime import datetime, timedelta, timezone
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-import schemas, database, models, crud
+from typing import NamedTuple
+from cachetools import TTLCache
+import hashlib
+import threading
+import time
+import schemas, database, models, crud, crud_async
 
 # CHAMA A FUNÇÃO PARA CARREGAR O ARQUIVO .env (se ele existir)
 # Isso permite que a variável SECRET_KEY seja lida localmente
@@ -26,10 +33,38 @@ if SECRET_KEY is None:
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7 #7 dias
 
+# Cache de tokens já verificados: evita decodificar o JWT e buscar o usuário
+# no banco a cada requisição protegida. Cada entrada vale até o 'exp' do token
+# ou AUTH_CACHE_TTL segundos, o que vier primeiro.
+AUTH_CACHE_SIZE = int(os.environ.get("AUTH_CACHE_SIZE", 10000))
+AUTH_CACHE_TTL = float(os.environ.get("AUTH_CACHE_TTL", 300))
+
 # Este é o "esquema" que diz ao FastAPI "Vá no Header da requisição, procure por
 # 'Authorization' e me dê o token que está lá".
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
+# --- Usuário autenticado ---
+
+class Principal(NamedTuple):
+    """ O usuário logado, como os endpoints o enxergam (cópia leve, sem sessão do banco). """
+    id: int
+    email: str
+
+# sha256(token) -> (Principal, exp em timestamp)
+_token_cache: TTLCache = TTLCache(maxsize=AUTH_CACHE_SIZE, ttl=AUTH_CACHE_TTL)
+_token_cache_lock = threading.Lock()
+
+def invalidate_user(user_id: int):
+    """ Remove do cache todos os tokens de um usuário (chamado quando o usuário muda). """
+    with _token_cache_lock:
+        for digest in [d for d, (principal, _) in _token_cache.items() if principal.id == user_id]:
+            _token_cache.pop(digest, None)
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _evict_changed_user(mapper, connection, target):
+    invalidate_user(target.id)
+
 # --- Funções de Criação e Verificação ---
 
 def create_access_token(data: dict):
@@ -52,7 +87,8 @@ def verify_token(token: str, credentials_exception) -> schemas.TokenData:
         if email is None:
             raise credentials_exception
         # Valida os dados do token usando nosso schema Pydantic
-        token_data = schemas.TokenData(email=email)
+        # ('uid' só existe nos tokens novos; os antigos continuam valendo pelo email)
+        token_data = schemas.TokenData(email=email, user_id=payload.get("uid"), exp=payload.get("exp"))
     except JWTError:
         # Se o token for inválido (expirado, assinatura errada, etc)
         raise credentials_exception
@@ -60,22 +96,63 @@ def verify_token(token: str, credentials_exception) -> schemas.TokenData:
 
 # --- Dependência "Get Current User" ---
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_db)) -> models.User:
-    """
-    Uma dependência do FastAPI que valida o token e retorna o usuário do banco.
-    Nossos endpoints protegidos (como /cronograma/me) usarão isso.
-    """
+def _credentials_exception() -> HTTPException:
     # Exceção padrão para erros de autenticação
-    credentials_exception = HTTPException(
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Não foi possível validar as credenciais",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    # Valida o token
-    token_data = verify_token(token, credentials_exception)
-    # Busca o usuário no banco de dados
-    user = crud.get_user_by_email(db, email=token_data.email)
+
+def _cached_principal(digest: bytes) -> Principal | None:
+    with _token_cache_lock:
+        cached = _token_cache.get(digest)
+    if cached is not None and cached[1] > time.time():
+        return cached[0]
+    return None
+
+def _remember(digest: bytes, user, token_data: schemas.TokenData) -> Principal:
     if user is None:
-        raise credentials_exception
-    # Retorna o objeto User do SQLAlchemy
-    return user
\ No newline at end of file
+        raise _credentials_exception()
+    principal = Principal(id=user.id, email=user.email)
+    with _token_cache_lock:
+        _token_cache[digest] = (principal, token_data.exp or time.time() + AUTH_CACHE_TTL)
+    return principal
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_db)) -> Principal:
+    """
+    Uma dependência do FastAPI que valida o token e retorna o usuário logado.
+    Nossos endpoints protegidos (como /cronograma/me) usarão isso.
+    Tokens já vistos são resolvidos pelo cache, sem decodificar o JWT nem ir ao banco.
+    """
+    digest = hashlib.sha256(token.encode("utf-8")).digest()
+    principal = _cached_principal(digest)
+    if principal is not None:
+        return principal
+
+    # Valida o token
+    token_data = verify_token(token, _credentials_exception())
+    # Busca o usuário no banco de dados (pela chave primária quando o token traz o 'uid')
+    if token_data.user_id is not None:
+        user = db.get(models.User, token_data.user_id)
+    else:
+        user = crud.get_user_by_email(db, email=token_data.email)
+    return _remember(digest, user, token_data)
+
+async def get_current_user_async(token: str = Depends(oauth2_scheme),
+                                 db: AsyncSession = Depends(database.get_async_db)) -> Principal:
+    """
+    Igual a get_current_user, para endpoints 'async def'. Uma dependência síncrona
+    rodaria no threadpool, e o endpoint perderia a vantagem de ser assíncrono.
+    """
+    digest = hashlib.sha256(token.encode("utf-8")).digest()
+    principal = _cached_principal(digest)
+    if principal is not None:
+        return principal
+
+    token_data = verify_token(token, _credentials_exception())
+    if token_data.user_id is not None:
+        user = await crud_async.get_user(db, token_data.user_id)
+    else:
+        user = await crud_async.get_user_by_email(db, email=token_data.email)
+    return _remember(digest, user, token_data)
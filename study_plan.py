@@ -0,0 +1,188 @@
+# study_plan.py
+
+from datetime import date, timedelta
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session, joinedload
+import models
+
+# --- Motor do plano de estudos de N semanas ---
+# 1. Cada dia do plano é dividido em blocos de até SLOT_HORAS, conforme as horas
+#    disponíveis naquele dia da semana.
+# 2. Cada bloco vai para uma matéria, por round-robin ponderado (os pesos do plano).
+#    Só participam matérias com tópicos pendentes e peso > 0.
+# 3. Dentro de cada matéria, os blocos rodam pelos tópicos pendentes.
+#
+# O plano fica guardado em 'sessoes_estudo'. Quando um tópico de uma matéria é
+# adicionado, apagado ou concluído, só os blocos daquela matéria são reatribuídos;
+# o plano inteiro só é refeito se a lista de matérias participantes mudar.
+
+SLOT_HORAS = 1.0
+
+
+def _blocks(horas: float) -> list[float]:
+    """ 2.5h -> [1.0, 1.0, 0.5] """
+    full = int(horas // SLOT_HORAS)
+    rest = round(horas - full * SLOT_HORAS, 2)
+    return [SLOT_HORAS] * full + ([rest] if rest > 0 else [])
+
+
+def _weight(plano: models.PlanoEstudo, materia_id: int) -> float:
+    return float((plano.pesos or {}).get(str(materia_id), 1))
+
+
+def _pending_topicos(materia: models.MateriaCronograma) -> list[int]:
+    return [t.id for t in sorted(materia.topicos, key=lambda t: t.id) if not t.concluido]
+
+
+def allocate(plano: models.PlanoEstudo, materias: dict[int, list[int]]) -> list[dict]:
+    """
+    Gera as sessões do plano. 'materias' é {materia_id: [ids dos tópicos pendentes]}.
+    Round-robin ponderado "suave": cada matéria recebe blocos na proporção do seu peso,
+    intercalados ao longo dos dias em vez de agrupados.
+    """
+    weights = {m: _weight(plano, m) for m, topicos in sorted(materias.items()) if topicos and _weight(plano, m) > 0}
+    if not weights:
+        return []
+    total = sum(weights.values())
+    current = {m: 0.0 for m in weights}
+    given = {m: 0 for m in weights}
+
+    sessions = []
+    for offset in range(plano.semanas * 7):
+        day = plano.data_inicio + timedelta(days=offset)
+        for horas in _blocks(plano.horas_por_dia[day.weekday()]):
+            for m, w in weights.items():
+                current[m] += w
+            chosen = max(weights, key=lambda m: current[m])
+            current[chosen] -= total
+            topicos = materias[chosen]
+            sessions.append({
+                "plano_id": plano.id,
+                "data": day,
+                "materia_id": chosen,
+                "topico_id": topicos[given[chosen] % len(topicos)],
+                "horas": horas,
+            })
+            given[chosen] += 1
+    return sessions
+
+
+def _load_materias(db: Session, cronograma_id: int) -> dict[int, list[int]]:
+    """
+    {materia_id: [tópicos pendentes]} do cronograma, em uma consulta.
+    ('populate_existing' porque a sessão pode ter as coleções carregadas antes da mudança.)
+    """
+    materias = db.query(models.MateriaCronograma).options(
+        joinedload(models.MateriaCronograma.topicos)
+    ).filter(models.MateriaCronograma.cronograma_id == cronograma_id).populate_existing().all()
+    return {m.id: _pending_topicos(m) for m in materias}
+
+
+def rebuild(db: Session, plano: models.PlanoEstudo):
+    """ Refaz todas as sessões do plano. Não faz commit. """
+    db.query(models.SessaoEstudo).filter(models.SessaoEstudo.plano_id == plano.id).delete(synchronize_session=False)
+    sessions = allocate(plano, _load_materias(db, plano.cronograma_id))
+    if sessions:
+        db.execute(insert(models.SessaoEstudo), sessions)
+
+
+def _refresh_materia(db: Session, plano: models.PlanoEstudo, materia_id: int) -> bool:
+    """
+    Reatribui os tópicos só nos blocos de uma matéria.
+    Retorna False quando a matéria entrou ou saiu do plano (aí é preciso refazer tudo).
+    """
+    materia = db.query(models.MateriaCronograma).options(
+        joinedload(models.MateriaCronograma.topicos)
+    ).filter(models.MateriaCronograma.id == materia_id).populate_existing().first()
+    topicos = _pending_topicos(materia) if materia else []
+    participates = bool(topicos) and _weight(plano, materia_id) > 0
+
+    session_ids = [row[0] for row in db.query(models.SessaoEstudo.id).filter(
+        models.SessaoEstudo.plano_id == plano.id, models.SessaoEstudo.materia_id == materia_id
+    ).order_by(models.SessaoEstudo.data, models.SessaoEstudo.id)]
+
+    if participates != bool(session_ids):
+        return False
+    if session_ids:
+        db.execute(update(models.SessaoEstudo), [
+            {"id": session_id, "topico_id": topicos[i % len(topicos)]} for i, session_id in enumerate(session_ids)
+        ])
+    return True
+
+
+def refresh(db: Session, cronograma_id: int, materia_ids: set[int] | None = None):
+    """
+    Atualiza o plano guardado depois de uma mudança no cronograma (antes do commit).
+    Com 'materia_ids', tenta atualizar só essas matérias; sem, refaz o plano inteiro.
+    Não faz nada se o usuário ainda não criou um plano.
+    """
+    plano = db.query(models.PlanoEstudo).filter(models.PlanoEstudo.cronograma_id == cronograma_id).first()
+    if plano is None:
+        return
+    if materia_ids is None or not all(_refresh_materia(db, plano, m) for m in materia_ids):
+        rebuild(db, plano)
+
+
+def configure(db: Session, cronograma_id: int, semanas: int, horas_por_dia: list[float],
+              pesos: dict[int, float], data_inicio: date | None = None) -> models.PlanoEstudo:
+    """ Cria (ou reconfigura) o plano do cronograma e gera as sessões. """
+    plano = db.query(models.PlanoEstudo).filter(models.PlanoEstudo.cronograma_id == cronograma_id).first()
+    if plano is None:
+        plano = models.PlanoEstudo(cronograma_id=cronograma_id)
+        db.add(plano)
+    plano.data_inicio = data_inicio or date.today()
+    plano.semanas = semanas
+    plano.horas_por_dia = list(horas_por_dia)
+    plano.pesos = {str(materia_id): peso for materia_id, peso in pesos.items()}
+    db.flush()
+    rebuild(db, plano)
+    db.commit()
+    db.refresh(plano)
+    return plano
+
+
+def get_sessions(db: Session, owner_id: int, inicio: date | None = None, fim: date | None = None):
+    """
+    Lê o plano guardado do usuário (com os nomes de matéria e tópico) em uma consulta.
+    Retorna (plano, sessões) ou (None, []) se não há plano.
+    """
+    query = db.query(
+        models.PlanoEstudo,
+        models.SessaoEstudo,
+        models.MateriaCronograma.nome,
+        models.TopicoCronograma.nome,
+    ).join(
+        models.Cronograma, models.PlanoEstudo.cronograma_id == models.Cronograma.id
+    ).outerjoin(
+        models.SessaoEstudo, models.SessaoEstudo.plano_id == models.PlanoEstudo.id
+    ).outerjoin(
+        models.MateriaCronograma, models.SessaoEstudo.materia_id == models.MateriaCronograma.id
+    ).outerjoin(
+        models.TopicoCronograma, models.SessaoEstudo.topico_id == models.TopicoCronograma.id
+    ).filter(models.Cronograma.owner_id == owner_id)
+    if inicio:
+        query = query.filter((models.SessaoEstudo.data >= inicio) | (models.SessaoEstudo.id.is_(None)))
+    if fim:
+        query = query.filter((models.SessaoEstudo.data <= fim) | (models.SessaoEstudo.id.is_(None)))
+    rows = query.order_by(models.SessaoEstudo.data, models.SessaoEstudo.id).all()
+
+    if not rows:
+        # Sem plano, ou nenhuma sessão no intervalo: distingue os dois casos
+        plano = db.query(models.PlanoEstudo).join(
+            models.Cronograma, models.PlanoEstudo.cronograma_id == models.Cronograma.id
+        ).filter(models.Cronograma.owner_id == owner_id).first()
+        return plano, []
+
+    plano = rows[0][0]
+    sessions = [
+        {
+            "data": sessao.data,
+            "materia_id": sessao.materia_id,
+            "materia": materia_nome,
+            "topico_id": sessao.topico_id,
+            "topico": topico_nome,
+            "horas": sessao.horas,
+        }
+        for _, sessao, materia_nome, topico_nome in rows if sessao is not None
+    ]
+    return plano, sessions
@@ -0,0 +1,52 @@
+# tests/conftest.py
+"""
+Configuração dos testes (pytest, a partir da raiz do projeto):
+
+    python -m pytest -q tests
+
+Cada sessão usa um SQLite novo num diretório temporário e o modelo falso
+(fake_genai), sem rede e sem GEMINI_API_KEY.
+"""
+
+import os
+import sys
+import tempfile
+import uuid
+
+# Antes de importar qualquer módulo da API: database.py lê DATABASE_URL na importação
+_tmpdir = tempfile.mkdtemp(prefix="seshat-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmpdir, 'tests.db')}"
+os.environ.setdefault("SECRET_KEY", "testes")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ["GEMINI_FAKE"] = "1"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi.testclient import TestClient
+import ai_service, fake_genai
+
+
+@pytest.fixture
+def fake_client(monkeypatch):
+    """ Modelo falso novo para o teste, com o semáforo de concorrência zerado. """
+    fake = fake_genai.FakeGenaiClient(seed=42)
+    monkeypatch.setattr(ai_service, "client", fake)
+    monkeypatch.setattr(ai_service, "_semaphore", None)
+    return fake
+
+
+@pytest.fixture(scope="session")
+def client():
+    import main
+    with TestClient(main.app) as test_client:  # roda o lifespan (migrate)
+        yield test_client
+
+
+@pytest.fixture
+def auth(client):
+    """ Cabeçalho de um usuário novo (e, portanto, com um cronograma vazio). """
+    email = f"aluno-{uuid.uuid4().hex[:8]}@seshat.com"
+    client.post("/register", json={"email": email, "password": "senha-forte"})
+    token = client.post("/login", data={"username": email, "password": "senha-forte"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
@@ -0,0 +1,45 @@
+# tests/test_ai_service.py
+
+import asyncio
+import time
+import ai_service, fake_genai
+
+
+def _hint():
+    return ai_service.generate_question_hint("Quanto é 2 + 2?", {"A": "3", "B": "4"}, "B")
+
+
+def test_concorrencia_respeita_o_limite(fake_client, monkeypatch):
+    monkeypatch.setattr(ai_service, "AI_MAX_CONCURRENCY", 3)
+    fake_client.latency = 0.05
+
+    async def burst():
+        return await asyncio.gather(*(_hint() for _ in range(20)))
+
+    hints = asyncio.run(burst())
+
+    assert hints == [fake_genai.FAKE_HINT] * 20
+    assert fake_client.calls == 20
+    assert fake_client.max_in_flight == 3
+
+
+def test_chamada_lenta_devolve_a_dica_padrao(fake_client, monkeypatch):
+    monkeypatch.setattr(ai_service, "AI_CALL_TIMEOUT", 0.05)
+    monkeypatch.setattr(ai_service, "AI_MAX_ATTEMPTS", 1)
+    fake_client.latency = 1.0
+
+    start = time.perf_counter()
+    hint = asyncio.run(_hint())
+
+    assert hint == ai_service.FALLBACK_HINT
+    # Desistiu no timeout, sem esperar o modelo
+    assert time.perf_counter() - start < fake_client.latency
+
+
+def test_falha_e_repetida_ate_dar_certo(fake_client):
+    fake_client.fail_next(1)
+
+    hint = asyncio.run(_hint())
+
+    assert hint == fake_genai.FAKE_HINT
+    assert fake_client.calls == 2
@@ -0,0 +1,41 @@
+# tests/test_cronograma.py
+
+import metrics
+
+
+def _query_count(response) -> int:
+    return int(response.headers["x-db-query-count"])
+
+
+def test_topicos_custam_o_mesmo_numero_de_consultas(client, auth, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_QUERY_HEADER", True)
+    client.get("/cronograma/me", headers=auth)
+
+    ids = []
+    adds = []
+    for i in range(3):
+        materia = client.post("/cronograma/materias", json={"nome": f"Matéria {i}"}, headers=auth).json()
+        for j in range(3):
+            response = client.post(f"/cronograma/materias/{materia['id']}/topicos", json={"nome": f"Tópico {j}"}, headers=auth)
+            assert response.status_code == 200
+            ids.append(response.json()["id"])
+            adds.append(_query_count(response))
+    # O 1º tópico de uma matéria custa o mesmo que o 3º (sem recarregar a matéria nem 'topicos')
+    assert len(set(adds)) == 1
+
+    patches = []
+    for count in (1, 3, 9):
+        response = client.patch("/cronograma/topicos", json=[{"id": i, "concluido": True} for i in ids[:count]], headers=auth)
+        assert [t["concluido"] for t in response.json()["atualizados"]] == [True] * count
+        patches.append(_query_count(response))
+    assert len(set(patches)) == 1
+
+
+def test_limite_de_3_topicos_por_materia(client, auth):
+    client.get("/cronograma/me", headers=auth)
+    materia = client.post("/cronograma/materias", json={"nome": "Física"}, headers=auth).json()
+    for j in range(3):
+        client.post(f"/cronograma/materias/{materia['id']}/topicos", json={"nome": f"Tópico {j}"}, headers=auth)
+
+    response = client.post(f"/cronograma/materias/{materia['id']}/topicos", json={"nome": "Sobrando"}, headers=auth)
+    assert response.status_code == 400
@@ -0,0 +1,96 @@
+# tests/test_plan_jobs.py
+
+import time
+import pytest
+from fastapi import HTTPException
+import crud, fake_genai, models, schemas
+from database import SessionLocal
+
+
+def _wait_for_job(client, auth, job_id: str, timeout: float = 5) -> dict:
+    """ Consulta GET /cronograma/ia/{job_id} até o job terminar. """
+    deadline = time.monotonic() + timeout
+    while True:
+        job = client.get(f"/cronograma/ia/{job_id}", headers=auth).json()
+        if job["status"] in ("concluido", "erro") or time.monotonic() > deadline:
+            return job
+        time.sleep(0.01)
+
+
+def test_job_vai_de_pendente_a_concluido(client, auth, fake_client):
+    fake_client.latency = 0.1
+
+    response = client.post("/cronograma/ia", json={"months": 3, "focus": ["Física"]}, headers=auth)
+    assert response.status_code == 202
+    job = response.json()
+    assert job["status"] == "pendente"
+    assert client.get(f"/cronograma/ia/{job['job_id']}", headers=auth).json()["status"] in ("pendente", "executando")
+
+    job = _wait_for_job(client, auth, job["job_id"])
+
+    assert job["status"] == "concluido"
+    assert job["nome_plano"] == "Plano de Estudos (modelo falso)"
+    assert [m["nome"] for m in job["materias"]] == ["Matéria 1", "Matéria 2", "Matéria 3"]
+    tree = client.get("/cronograma/me", headers=auth).json()
+    assert [len(m["topicos"]) for m in tree["materias"]] == [3, 3, 3]
+
+
+@pytest.mark.parametrize("text", [None, "isto não é JSON"])
+def test_job_termina_em_erro_sem_plano_valido(client, auth, fake_client, monkeypatch, text):
+    monkeypatch.setattr(fake_genai, "_fake_text", lambda contents, config: text)
+
+    job = client.post("/cronograma/ia", json={"months": 3}, headers=auth).json()
+    job = _wait_for_job(client, auth, job["job_id"])
+
+    assert job["status"] == "erro"
+    assert job["erro"] and job["materias"] is None
+    assert client.get("/cronograma/me", headers=auth).json()["materias"] == []
+
+
+def test_job_de_outro_usuario_nao_aparece(client, auth, fake_client):
+    job = client.post("/cronograma/ia", json={"months": 3}, headers=auth).json()
+    _wait_for_job(client, auth, job["job_id"])
+
+    client.post("/register", json={"email": "outro@seshat.com", "password": "senha-forte"})
+    token = client.post("/login", data={"username": "outro@seshat.com", "password": "senha-forte"}).json()["access_token"]
+
+    response = client.get(f"/cronograma/ia/{job['job_id']}", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 404
+
+
+# --- crud.add_ai_plan_to_cronograma ---
+
+def _plan(materias: int, topicos: int) -> dict:
+    return {"nome_plano": "Plano", "materias": [
+        {"nome": f"M{i}", "topicos": [f"T{i}.{j}" for j in range(topicos)]} for i in range(materias)
+    ]}
+
+
+@pytest.fixture
+def cronograma_id(client):
+    with SessionLocal() as db:
+        user = crud.create_user(db, schemas.UserCreate(email=f"crud-{time.monotonic_ns()}@seshat.com", password="x"),
+                                hashed_password="x")
+        return crud.create_user_cronograma(db, schemas.CronogramaCreate(nome="Teste"), owner_id=user.id).id
+
+
+def test_plano_e_cortado_em_3_materias_e_3_topicos(cronograma_id):
+    with SessionLocal() as db:
+        materias = crud.add_ai_plan_to_cronograma(db, cronograma_id=cronograma_id, plan=_plan(5, 6))
+
+        assert [m.nome for m in materias] == ["M0", "M1", "M2"]
+        assert [[t.nome for t in m.topicos] for m in materias] == [[f"T{i}.{j}" for j in range(3)] for i in range(3)]
+        assert db.query(models.TopicoCronograma).join(models.MateriaCronograma).filter(
+            models.MateriaCronograma.cronograma_id == cronograma_id
+        ).count() == 9
+
+
+def test_plano_so_preenche_as_vagas_que_sobram(cronograma_id):
+    with SessionLocal() as db:
+        crud.add_ai_plan_to_cronograma(db, cronograma_id=cronograma_id, plan=_plan(2, 3))
+        materias = crud.add_ai_plan_to_cronograma(db, cronograma_id=cronograma_id, plan=_plan(3, 3))
+        assert [m.nome for m in materias] == ["M0"]
+
+        with pytest.raises(HTTPException) as error:
+            crud.add_ai_plan_to_cronograma(db, cronograma_id=cronograma_id, plan=_plan(3, 3))
+        assert error.value.status_code == 400
@@ -0,0 +1,40 @@
+# tests/test_question_pool.py
+
+import pytest
+import question_pool
+
+
+@pytest.fixture(autouse=True)
+def _limpa_pools():
+    question_pool.invalidate()
+    yield
+    question_pool.invalidate()
+
+
+def test_filtro_sem_questoes_nao_fica_em_memoria(client):
+    response = client.get("/perguntas/Matéria que não existe", params={"count": 5})
+
+    assert response.status_code == 404
+    assert len(question_pool._pools) == 0
+
+
+def test_numero_de_filtros_e_limitado(monkeypatch):
+    monkeypatch.setattr(question_pool, "_pools", question_pool.TTLCache(maxsize=3, ttl=60))
+
+    for year in range(10):
+        _, generation = question_pool._cached(("Física", None, year))
+        question_pool._store(("Física", None, year), generation, [year])
+
+    assert len(question_pool._pools) == 3
+
+
+def test_carga_anterior_ao_invalidate_e_descartada():
+    key = ("Física", None, None)
+    ids, generation = question_pool._cached(key)
+    assert ids is None
+
+    # Uma questão nova entra enquanto a carga (com a lista antiga) ainda está em andamento
+    question_pool.invalidate(subject="Física")
+    question_pool._store(key, generation, [1, 2])
+
+    assert question_pool._cached(key)[0] is None
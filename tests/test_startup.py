@@ -0,0 +1,24 @@
+# tests/test_startup.py
+
+import os
+import statistics
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+import bench_startup
+
+RUNS = 3
+
+
+def test_subida_a_frio_dentro_do_orcamento():
+    with tempfile.TemporaryDirectory(prefix="seshat-startup-") as tmpdir:
+        database_url = f"sqlite:///{os.path.join(tmpdir, 'startup.db')}"
+        bench_startup.cold_start(database_url)  # a primeira subida cria as tabelas
+        samples = [bench_startup.cold_start(database_url) for _ in range(RUNS)]
+
+    import_ms = statistics.median(s["import_ms"] for s in samples)
+    total_ms = statistics.median(s["total_ms"] for s in samples)
+    assert import_ms <= bench_startup.IMPORT_BUDGET_MS, f"import main levou {import_ms:.0f}ms"
+    assert total_ms <= bench_startup.BUDGET_MS, f"até a 1ª resposta levou {total_ms:.0f}ms"
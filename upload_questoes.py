@@ -1,60 +1,170 @@
 # upload_questoes.py
-import requests # A biblioteca que acabamos de instalar
+import argparse
+import hashlib
 import json
-from time import sleep # Para adicionar um pequeno atraso e não sobrecarregar a API
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import requests # A biblioteca que acabamos de instalar
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # --- Configuração ---
-# A URL da sua API que está online no Render
-API_URL = "https://seshat-api-m30w.onrender.com" 
-ENDPOINT = f"{API_URL}/perguntas"
+# A URL da sua API que está online no Render (use --api-url http://127.0.0.1:8000 para testar localmente)
+API_URL = "https://seshat-api-m30w.onrender.com"
 JSON_FILE = "questoes.json"
+CHUNK_SIZE = 200 # Questões por requisição para /perguntas/lote
+WORKERS = 4 # Requisições em paralelo (o plano gratuito do Render não aguenta muito mais)
+
+
+def read_questions(path: str) -> list:
+    """ Lê as questões de um array JSON ou de um arquivo NDJSON (uma por linha). """
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    if content.lstrip().startswith("["):
+        return json.loads(content)
+    return [json.loads(line) for line in content.splitlines() if line.strip()]
+
+
+def dedupe_by_text(questions: list) -> tuple[list, int]:
+    """
+    Tira as questões com texto repetido no próprio arquivo (fica a primeira).
+    A checagem de duplicata do servidor não é atômica: o mesmo texto em dois lotes
+    enviados em paralelo entraria duas vezes.
+    """
+    seen = set()
+    unique = []
+    for question in questions:
+        text = question.get("text") if isinstance(question, dict) else None
+        if isinstance(text, str):
+            if text in seen:
+                continue
+            seen.add(text)
+        unique.append(question)
+    return unique, len(questions) - len(unique)
+
+
+def build_session(workers: int) -> requests.Session:
+    """ Sessão com conexões reaproveitadas (keep-alive) e retry automático para erros temporários. """
+    retry = Retry(
+        total=5,
+        backoff_factor=1, # 1s, 2s, 4s... entre tentativas
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"POST"}),
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+# --- Estado para retomar o envio ---
+# Guarda quais lotes já foram aceitos pelo servidor. Se o upload cair no meio,
+# rodar de novo envia só os lotes que faltam.
+
+def state_path_for(json_file: str, api_url: str, chunk_size: int) -> str:
+    key = hashlib.sha256(f"{os.path.abspath(json_file)}|{api_url}|{chunk_size}".encode()).hexdigest()[:12]
+    return f".upload_state_{key}.json"
+
+
+def load_done_chunks(state_path: str) -> set[int]:
+    try:
+        with open(state_path, 'r', encoding='utf-8') as f:
+            return set(json.load(f)["done"])
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        return set()
+
+
+def save_done_chunks(state_path: str, done: set[int]):
+    tmp_path = f"{state_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({"done": sorted(done)}, f)
+    os.replace(tmp_path, state_path)
+
 
-print(f"Iniciando upload para: {API_URL}")
-print("Lendo questões de:", JSON_FILE)
+def upload_chunk(session: requests.Session, endpoint: str, chunk: list) -> dict:
+    response = session.post(endpoint, json=chunk, timeout=120)
+    response.raise_for_status()
+    return response.json()
 
-try:
-    with open(JSON_FILE, 'r', encoding='utf-8') as f:
-        questions_data = json.load(f)
-except FileNotFoundError:
-    print(f"ERRO: Arquivo '{JSON_FILE}' não encontrado.")
-    exit()
-except json.JSONDecodeError:
-    print(f"ERRO: Falha ao ler o arquivo JSON. Verifique a formatação.")
-    exit()
 
-print(f"Encontradas {len(questions_data)} questões. Iniciando envio...")
-print("--------------------------------------------------")
+def main():
+    parser = argparse.ArgumentParser(description="Envia as questões para a API em lotes paralelos.")
+    parser.add_argument("arquivo", nargs="?", default=JSON_FILE)
+    parser.add_argument("--api-url", default=API_URL)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--restart", action="store_true", help="Ignora o progresso salvo e envia tudo de novo")
+    args = parser.parse_args()
 
-questions_added = 0
-questions_failed = 0
+    endpoint = f"{args.api_url.rstrip('/')}/perguntas/lote"
+    print(f"Iniciando upload para: {args.api_url}")
+    print("Lendo questões de:", args.arquivo)
 
-# Faz um loop por cada questão no arquivo JSON
-for q_data in questions_data:
     try:
-        # Tenta enviar a questão para o endpoint POST /perguntas
-        response = requests.post(ENDPOINT, json=q_data)
-
-        # Verifica o código de status da resposta
-        if response.status_code == 201: # 201 Created (Sucesso!)
-            print(f"SUCESSO: Questão '{q_data['text'][:50]}...' adicionada.")
-            questions_added += 1
-        elif response.status_code == 400: # 400 Bad Request (Provavelmente duplicada)
-            print(f"AVISO: Questão '{q_data['text'][:50]}...' provavelmente já existe ou dados inválidos. (Servidor disse: {response.json().get('detail')})")
-            questions_failed += 1
-        else:
-            # Outros erros (500, 404, etc.)
-            print(f"ERRO: Falha ao adicionar questão '{q_data['text'][:50]}...'. Status: {response.status_code}, Resposta: {response.text}")
-            questions_failed += 1
-
-    except requests.exceptions.RequestException as e:
-        print(f"ERRO DE CONEXÃO: Não foi possível conectar à API. {e}")
-        print("Verifique se a API está online e a URL está correta.")
-        exit()
-    
-    # Adiciona um pequeno atraso para não sobrecarregar o plano gratuito do Render
-    sleep(0.5) # Meio segundo de pausa entre cada requisição
-
-print("--------------------------------------------------")
-print("Upload concluído!")
-print(f"Questões adicionadas com sucesso: {questions_added}")
-print(f"Falhas ou duplicatas: {questions_failed}")
\ No newline at end of file
+        questions_data = read_questions(args.arquivo)
+    except FileNotFoundError:
+        print(f"ERRO: Arquivo '{args.arquivo}' não encontrado.")
+        exit(1)
+    except json.JSONDecodeError:
+        print(f"ERRO: Falha ao ler o arquivo JSON. Verifique a formatação.")
+        exit(1)
+
+    questions_data, repeated_in_file = dedupe_by_text(questions_data)
+    if repeated_in_file:
+        print(f"AVISO: {repeated_in_file} questões com texto repetido no arquivo foram ignoradas.")
+
+    chunks = [questions_data[i:i + args.chunk_size] for i in range(0, len(questions_data), args.chunk_size)]
+    state_path = state_path_for(args.arquivo, args.api_url, args.chunk_size)
+    done = set() if args.restart else load_done_chunks(state_path)
+    pending = [i for i in range(len(chunks)) if i not in done]
+
+    print(f"Encontradas {len(questions_data)} questões em {len(chunks)} lotes "
+          f"({len(done)} lotes já enviados antes). Iniciando envio...")
+    print("--------------------------------------------------")
+
+    questions_added = 0
+    questions_duplicated = repeated_in_file
+    questions_invalid = 0
+    chunks_failed = 0
+    start = time.perf_counter()
+
+    session = build_session(args.workers)
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = {executor.submit(upload_chunk, session, endpoint, chunks[i]): i for i in pending}
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                result = future.result()
+            except requests.exceptions.RequestException as e:
+                print(f"ERRO: Lote {i + 1}/{len(chunks)} falhou ({e}). Rode o script de novo para reenviar.")
+                chunks_failed += 1
+                continue
+
+            questions_added += result["created"]
+            questions_duplicated += result["duplicates"]
+            questions_invalid += result["invalid"]
+            for item in result["items"]:
+                if item["status"] == "invalida":
+                    print(f"AVISO: Lote {i + 1}, item {item['index']} inválido: {item['detail']}")
+            done.add(i)
+            save_done_chunks(state_path, done)
+            print(f"SUCESSO: Lote {i + 1}/{len(chunks)} enviado "
+                  f"({result['created']} criadas, {result['duplicates']} duplicadas).")
+
+    elapsed = time.perf_counter() - start
+    print("--------------------------------------------------")
+    print("Upload concluído!" if not chunks_failed else "Upload incompleto.")
+    print(f"Questões adicionadas com sucesso: {questions_added}")
+    print(f"Duplicatas: {questions_duplicated} | Inválidas: {questions_invalid}")
+    print(f"Tempo: {elapsed:.1f}s")
+    if chunks_failed:
+        print(f"Lotes com falha: {chunks_failed} (o progresso foi salvo em {state_path})")
+        exit(1)
+    if os.path.exists(state_path):
+        os.remove(state_path)
+
+
+if __name__ == "__main__":
+    main()